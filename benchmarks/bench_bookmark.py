@@ -0,0 +1,70 @@
+"""
+Per-record cost of the bookmark filter of `IncrementalStream.sync`: the datetime round trip of each
+epoch milliseconds `date` against the comparison of the integers. Both are checked to keep the same
+records and the same bookmark.
+
+    python benchmarks/bench_bookmark.py --records 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# pylint: disable=wrong-import-position
+import singer
+
+from tap_fireflies.streams import BaseStream
+
+
+def datetime_filter(records, bookmark):
+    kept = 0
+    max_datetime = bookmark
+    for record in records:
+        record_datetime = singer.utils.strptime_to_utc(BaseStream.epoch_milliseconds_to_dt_str(record["date"]))
+        if record_datetime >= bookmark:
+            kept += 1
+            max_datetime = max(record_datetime, max_datetime)
+    return kept, singer.utils.strftime(max_datetime)
+
+
+def epoch_milliseconds_filter(records, bookmark):
+    kept = 0
+    bookmark_ms = BaseStream.dt_to_epoch_milliseconds(bookmark)
+    max_record_ms = None
+    for record in records:
+        record_ms = record["date"]
+        if record_ms >= bookmark_ms:
+            kept += 1
+            if max_record_ms is None or record_ms > max_record_ms:
+                max_record_ms = record_ms
+    return kept, singer.utils.strftime(BaseStream.max_datetime_with_epoch_milliseconds(bookmark, max_record_ms))
+
+
+def bench(name, func, records, bookmark):
+    start = time.perf_counter()
+    output = func(records, bookmark)
+    elapsed = time.perf_counter() - start
+    print("{:<14} {:>10.3f} us/record".format(name, elapsed / len(records) * 1e6))
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=200000)
+    args = parser.parse_args()
+
+    # Half of the records are before the bookmark
+    records = [{"date": 1750000000000 + index * 1001} for index in range(args.records)]
+    bookmark = BaseStream.epoch_milliseconds_to_datetime(records[args.records // 2]["date"] - 500)
+
+    datetime_output = bench("datetime", datetime_filter, records, bookmark)
+    epoch_output = bench("epoch_ms", epoch_milliseconds_filter, records, bookmark)
+
+    assert datetime_output == epoch_output, "outputs differ: {} {}".format(datetime_output, epoch_output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Memory used by the transcripts dedupe over a long backfill of synthetic transcripts, compared to
+the former set of all the visited ids. The traced memory is printed as the records are consumed:
+it stays flat with `BoundaryDedupe` and grows with the number of transcripts with the set.
+
+    python benchmarks/bench_dedupe_memory.py --transcripts 200000 --ties 5
+
+It fails if a transcript is missed, eg. with `--ties 120`, more transcripts sharing a `date` than fit in a page.
+"""
+
+import argparse
+import datetime
+import logging
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# pylint: disable=wrong-import-position
+import singer
+
+from tap_fireflies import streams
+from tap_fireflies.dedupe import BoundaryDedupe
+from tap_fireflies.streams import Transcripts
+
+BASE_MS = 1500000000000
+STEP_MS = 60000
+
+
+class UnboundedDedupe(BoundaryDedupe):
+    """
+    Never forgets an id, like the set used before `BoundaryDedupe`.
+    """
+    def advance(self, boundary):
+        if boundary is not None:
+            self.boundary = boundary
+
+
+class SyntheticClient:
+    """
+    Answers the transcripts query from `num_transcripts` transcripts computed on the fly, `ties` of
+    them sharing each `date`, so the benchmark itself does not hold the transcripts in memory.
+    """
+    # The pages are not read from a response cache, their size adapts
+    response_cache = None
+
+    def __init__(self, num_transcripts, ties):
+        self.num_transcripts = num_transcripts
+        self.ties = ties
+
+    @staticmethod
+    def to_ms(value):
+        return int(singer.utils.strptime_to_utc(value).timestamp() * 1000)
+
+    def post(self, path=None, endpoint=None, json=None):
+        variables = json["variables"]
+        from_ms = self.to_ms(variables["fromDate"])
+        to_ms = self.to_ms(variables["toDate"])
+        last_group = min((to_ms - BASE_MS) // STEP_MS, (self.num_transcripts - 1) // self.ties)
+        index = min(self.num_transcripts - 1, (last_group + 1) * self.ties - 1) - variables["skip"]
+
+        transcripts = []
+        while index >= 0 and len(transcripts) < variables["limit"]:
+            date = BASE_MS + (index // self.ties) * STEP_MS
+            if date < from_ms:
+                break
+            transcripts.append({"id": "transcript-{:09d}".format(index), "date": date})
+            index -= 1
+        return {"data": {"transcripts": transcripts}}
+
+    def fetch(self, method, path=None, endpoint=None, json=None):
+        return self.post(path=path, endpoint=endpoint, json=json), 0
+
+
+class BenchTranscripts(Transcripts):
+    last_processed = None
+
+    def build_query(self, operation_name, stream_metadata=None, variable_definitions=None):
+        return "query {}".format(operation_name)
+
+
+def run(num_transcripts, ties, samples):
+    stream = BenchTranscripts(SyntheticClient(num_transcripts, ties), None, ["transcripts"])
+    from_datetime = datetime.datetime.fromtimestamp(BASE_MS / 1000, datetime.timezone.utc)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    count = 0
+    for count, _ in enumerate(stream.get_records(from_datetime), 1):
+        if count % (num_transcripts // samples) == 0:
+            print("{:>10} records {:>10.1f} KiB".format(count, (tracemalloc.get_traced_memory()[0] - baseline) / 1024))
+    tracemalloc.stop()
+    assert count == num_transcripts, "{} transcripts synced out of {}".format(count, num_transcripts)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transcripts", type=int, default=100000)
+    parser.add_argument("--ties", type=int, default=3)
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+    # One line is logged per page
+    logging.disable(logging.INFO)
+
+    print("BoundaryDedupe")
+    run(args.transcripts, args.ties, args.samples)
+
+    print("set of all the visited ids")
+    streams.BoundaryDedupe = UnboundedDedupe
+    run(args.transcripts, args.ties, args.samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Cold-start latency of the tap: the import of the package, and a discover run without the catalog
+cache and with it. Each case runs in a new interpreter, the median and the fastest wall-clock
+times are reported, the fastest being the least affected by the noise of the machine.
+
+    python benchmarks/bench_startup.py --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Runs the entry point of the `tap-fireflies` script from the source tree
+MAIN = "import sys; sys.path.insert(0, {!r}); sys.argv[0] = 'tap-fireflies'; from tap_fireflies import main; main()"
+
+
+def run(args, env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + args, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def bench(name, args, runs, env):
+    run(args, env)  # warms up the file system cache and the cache of the catalog
+    durations = [run(args, env) for _ in range(runs)]
+    print("{:<22} {:>8.1f} ms median {:>8.1f} ms min".format(name,
+                                                          statistics.median(durations) * 1000,
+                                                          min(durations) * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        env = dict(os.environ)
+        main_code = MAIN.format(ROOT_DIR)
+        config = {"access_token": "token", "start_date": "2025-01-01T00:00:00Z"}
+        config_path = os.path.join(temp_dir, "config.json")
+        uncached_config_path = os.path.join(temp_dir, "config_uncached.json")
+        with open(config_path, "w") as file:
+            json.dump(dict(config, catalog_cache_dir=os.path.join(temp_dir, "cache")), file)
+        with open(uncached_config_path, "w") as file:
+            json.dump(config, file)
+
+        bench("python", ["-c", "pass"], args.runs, env)
+        bench("import tap_fireflies", ["-c", "import sys; sys.path.insert(0, {!r}); import tap_fireflies".format(ROOT_DIR)],
+              args.runs, env)
+        bench("discover (no cache)", ["-c", main_code, "-c", uncached_config_path, "--discover"], args.runs, env)
+        bench("discover (cached)", ["-c", main_code, "-c", config_path, "--discover"], args.runs, env)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+End to end benchmark of `sync.sync` against the local mock of the Fireflies API (`mock_server.py`),
+which runs in its own process so that it does not share the CPU time and the memory of the tap.
+
+Reports the records/sec, the bytes/sec read from the API and written to stdout, the peak RSS of the tap
+and the time spent in each phase: HTTP (requests and rate limiting), JSON decode, transform and write
+(serialization and stdout). Singer messages go to a sink counting their bytes. With `backfill_workers`,
+the HTTP time is summed over the worker threads.
+
+    python benchmarks/bench_sync.py --transcripts 2000 --sentences 100 --streams transcripts
+    python benchmarks/bench_sync.py --transcripts 2000 --config stream_json=true --config fast_json=true --json
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+# pylint: disable=wrong-import-position
+import requests
+import singer
+from singer import metadata
+
+from tap_fireflies import client as client_module
+from tap_fireflies.client import FirefliesClient
+from tap_fireflies.discover import discover
+from tap_fireflies.streams import BaseStream
+from tap_fireflies.sync import sync
+from tap_fireflies.writer import RecordWriter
+
+from mock_server import add_dataset_arguments, BASE_MS
+
+PHASES = ("http", "decode", "transform", "write")
+
+
+class PhaseTimer:
+    """
+    Accumulates the time spent in the wrapped functions by phase. Nested calls of the same phase
+    are only counted once.
+    """
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.__active = set()
+
+    @contextmanager
+    def measure(self, phase):
+        if phase in self.__active:
+            yield
+            return
+        self.__active.add(phase)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[phase] += time.perf_counter() - start
+            self.__active.discard(phase)
+
+    def wrap(self, owner, name, phase):
+        func = getattr(owner, name)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.measure(phase):
+                return func(*args, **kwargs)
+        setattr(owner, name, wrapper)
+
+    def wrap_generator(self, owner, name, phase):
+        """
+        Times each item of a generator, eg. the streaming JSON parser which reads the body while parsing.
+        """
+        func = getattr(owner, name)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            iterator = iter(func(*args, **kwargs))
+            while True:
+                with self.measure(phase):
+                    item = next(iterator, StopIteration)
+                if item is StopIteration:
+                    return
+                yield item
+        setattr(owner, name, wrapper)
+
+
+class CountingSink:
+    """
+    Replaces stdout, counts the bytes of the Singer messages instead of writing them.
+    """
+    def __init__(self):
+        self.bytes = 0
+        self.buffer = self
+
+    def write(self, data):
+        self.bytes += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+def instrument(timer, counters):
+    send = FirefliesClient.send
+
+    @wraps(send)
+    def counting_send(self, *args, **kwargs):
+        with timer.measure("http"):
+            response = send(self, *args, **kwargs)
+        counters["requests"] += 1
+        counters["response_bytes"] += int(response.headers.get("Content-Length") or 0)
+        return response
+    FirefliesClient.send = counting_send
+
+    write_record = RecordWriter.write_record
+
+    @wraps(write_record)
+    def counting_write_record(self, *args, **kwargs):
+        counters["records"] += 1
+        return write_record(self, *args, **kwargs)
+    RecordWriter.write_record = counting_write_record
+
+    timer.wrap(requests.models.Response, "json", "decode")
+    timer.wrap_generator(client_module, "iter_json_items", "decode")
+    timer.wrap(BaseStream, "transform_record", "transform")
+    timer.wrap(RecordWriter, "format_message", "write")
+    timer.wrap(RecordWriter, "flush", "write")
+
+
+def start_mock_server(args):
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_server.py"),
+               "--transcripts", str(args.transcripts),
+               "--sentences", str(args.sentences),
+               "--words", str(args.words),
+               "--dates", args.dates,
+               "--ties", str(args.ties),
+               "--latency", str(args.latency)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    return process, process.stdout.readline().strip()
+
+
+def get_catalog(stream_names):
+    catalog = discover()
+    for stream in catalog.streams:
+        stream_metadata = metadata.to_map(stream.metadata)
+        stream_metadata[()]["selected"] = stream.tap_stream_id in stream_names
+        stream.metadata = metadata.to_list(stream_metadata)
+    return catalog
+
+
+def parse_config_value(value):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    add_dataset_arguments(parser)
+    parser.add_argument("--streams", default="users,transcripts,transcript_sentences",
+                        help="comma separated streams to select")
+    parser.add_argument("--config", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra tap setting, eg. stream_json=true")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--log", action="store_true", help="keep the INFO logs of the tap")
+    args = parser.parse_args()
+
+    if not args.log:
+        # `singer.get_logger` resets the level of the logger every time it is called
+        logging.disable(logging.INFO)
+
+    config = {
+        "access_token": "benchmark",
+        # Just before the oldest transcript of the mock server
+        "start_date": singer.utils.strftime(datetime.datetime.fromtimestamp(BASE_MS / 1000 - 60, datetime.timezone.utc)),
+        "rate_limit_per_minute": 10 ** 9,
+        "rate_limit_burst": 10 ** 6,
+    }
+    for setting in args.config:
+        key, _, value = setting.partition("=")
+        config[key] = parse_config_value(value)
+
+    catalog = get_catalog(args.streams.split(","))
+    timer = PhaseTimer()
+    counters = defaultdict(int)
+    instrument(timer, counters)
+
+    process, url = start_mock_server(args)
+    config["base_url"] = url
+    sink = CountingSink()
+    stdout = sys.stdout
+    try:
+        sys.stdout = sink
+        start = time.perf_counter()
+        sync(config, {}, catalog)
+        elapsed = time.perf_counter() - start
+    finally:
+        sys.stdout = stdout
+        process.terminate()
+        process.wait()
+
+    phases = {phase: round(timer.seconds[phase], 3) for phase in PHASES}
+    phases["other"] = round(elapsed - sum(timer.seconds.values()), 3)
+    report = {
+        "seconds": round(elapsed, 3),
+        "requests": counters["requests"],
+        "records": counters["records"],
+        "records_per_second": round(counters["records"] / elapsed, 1),
+        "response_bytes_per_second": round(counters["response_bytes"] / elapsed),
+        "output_bytes_per_second": round(sink.bytes / elapsed),
+        # kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "phase_seconds": phases,
+    }
+
+    if args.json:
+        print(json.dumps(report))
+        return
+
+    print("{} records in {:.2f}s, {} requests".format(report["records"], elapsed, report["requests"]))
+    print("{:>12.1f} records/s".format(report["records_per_second"]))
+    print("{:>12.1f} MB/s read from the API".format(report["response_bytes_per_second"] / 1e6))
+    print("{:>12.1f} MB/s written".format(report["output_bytes_per_second"] / 1e6))
+    print("{:>12.1f} MB peak RSS".format(report["peak_rss_mb"]))
+    for phase, seconds in phases.items():
+        print("{:>12.3f}s {:<10} {:>5.1f}%".format(seconds, phase, 100 * seconds / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Per-record cost of `singer.transform` against the compiled transformer of `tap_fireflies.transform`,
+on synthetic transcripts. Both outputs are checked to be identical.
+
+    python benchmarks/bench_transform.py --records 2000 --sentences 200
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# pylint: disable=wrong-import-position
+from singer import UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING, metadata
+from singer.transform import transform
+
+from tap_fireflies.schema import get_schemas
+from tap_fireflies.transform import compile_transformer
+
+
+def make_transcript(index, num_sentences):
+    return {
+        "id": "transcript-{}".format(index),
+        "title": "Meeting {}".format(index),
+        "date": 1750000000000 + index * 60000,
+        "duration": 42.5,
+        "organizer_email": "organizer@example.com",
+        "participants": ["a@example.com", "b@example.com"],
+        "speakers": [{"id": "1", "name": "A"}, {"id": "2", "name": "B"}],
+        "meeting_info": {"fred_joined": True, "silent_meeting": False, "summary_status": "processed"},
+        "analytics": {
+            "sentiments": {"negative_pct": 1, "neutral_pct": 80.5, "positive_pct": 18.5},
+            "speakers": [{"speaker_id": "1", "name": "A", "duration": 10, "word_count": 100}],
+        },
+        "sentences": [
+            {"index": i, "speaker_id": str(i % 2), "text": "sentence {}".format(i),
+             "start_time": i * 1.5, "end_time": i * 1.5 + 1}
+            for i in range(num_sentences)
+        ],
+        "summary": {"keywords": ["a", "b"], "overview": "overview", "action_items": None},
+    }
+
+
+def bench(name, func, records):
+    # Both transforms may modify their input, each run gets its own copy
+    records = copy.deepcopy(records)
+    start = time.perf_counter()
+    output = [func(record) for record in records]
+    elapsed = time.perf_counter() - start
+    print("{:<10} {:>10.1f} us/record".format(name, elapsed / len(records) * 1e6))
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--sentences", type=int, default=100)
+    args = parser.parse_args()
+
+    schemas, field_metadata = get_schemas()
+    schema = schemas["transcripts"]
+    stream_metadata = metadata.to_map(field_metadata["transcripts"])
+    records = [make_transcript(index, args.sentences) for index in range(args.records)]
+
+    singer_output = bench("singer", lambda record: transform(
+        record, schema, integer_datetime_fmt=UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING,
+        metadata=stream_metadata), records)
+    compiled_output = bench("compiled", compile_transformer(schema, stream_metadata), records)
+
+    assert json.dumps(singer_output) == json.dumps(compiled_output), "outputs differ"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Local fake of the Fireflies GraphQL API (https://api.fireflies.ai/graphql) serving synthetic transcripts,
+for the benchmarks. It answers the queries sent by the tap: the `transcripts` pages (`fromDate`, `toDate`,
+`limit`, `skip`), a single `transcript(id:)`, aliased `transcript(id:)` batches and `users`.
+
+Run it on its own and point the tap to it with the `base_url` setting:
+
+    python benchmarks/mock_server.py --port 8080 --transcripts 10000 --sentences 200
+"""
+
+import argparse
+import datetime
+import functools
+import json
+import random
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BASE_MS = 1600000000000
+STEP_MS = 60000
+DATE_DISTRIBUTIONS = ("uniform", "ties", "random")
+
+TRANSCRIPTS_RE = re.compile(r"\btranscripts\(")
+ALIASED_TRANSCRIPT_RE = re.compile(r"(\w+): transcript\(id: \$(\w+)\)")
+TRANSCRIPT_RE = re.compile(r"\btranscript\(id: \$(\w+)\)")
+USERS_RE = re.compile(r"\busers\b")
+
+
+def to_ms(value):
+    return round(datetime.datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() * 1000)
+
+
+class Dataset:
+    """
+    Synthetic transcripts, generated from their index. Only their dates are kept in memory,
+    the encoded transcripts are cached.
+
+    :param num_transcripts: Number of transcripts
+    :param num_sentences: Number of sentences of each transcript
+    :param words_per_sentence: Size of the sentences
+    :param date_distribution: 'uniform' (one transcript per minute), 'ties' (`ties` transcripts per minute)
+        or 'random' (exponential gaps between the transcripts, with ties)
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, num_transcripts=1000, num_sentences=50, words_per_sentence=12,
+                 date_distribution="uniform", ties=3, num_users=20, seed=0):
+        self.num_sentences = num_sentences
+        self.words_per_sentence = words_per_sentence
+        self.num_users = num_users
+        rng = random.Random(seed)
+        # Ascending dates, the transcript `index` has the date `dates[index]`
+        if date_distribution == "uniform":
+            self.dates = [BASE_MS + index * STEP_MS for index in range(num_transcripts)]
+        elif date_distribution == "ties":
+            self.dates = [BASE_MS + (index // ties) * STEP_MS for index in range(num_transcripts)]
+        elif date_distribution == "random":
+            self.dates = []
+            date = BASE_MS
+            for _ in range(num_transcripts):
+                date += int(rng.expovariate(1.0 / STEP_MS)) // 1000 * 1000
+                self.dates.append(date)
+        else:
+            raise ValueError("Unknown date distribution: {}".format(date_distribution))
+        # `meeting_info.summary_status` of the transcripts by index, "processed" for the others
+        self.summary_statuses = {}
+
+    @staticmethod
+    def get_id(index):
+        return "transcript-{:08d}".format(index)
+
+    @staticmethod
+    def get_index(transcript_id):
+        try:
+            return int(transcript_id.rsplit("-", 1)[1])
+        except (AttributeError, IndexError, ValueError):
+            return None
+
+    def make_transcript(self, index):
+        sentences = [{
+            "index": sentence_index,
+            "speaker_id": str(sentence_index % 3),
+            "speaker_name": "Speaker {}".format(sentence_index % 3),
+            "text": " ".join("word{}".format((index + sentence_index + word) % 97)
+                             for word in range(self.words_per_sentence)),
+            "raw_text": "raw",
+            "start_time": sentence_index * 4.5,
+            "end_time": sentence_index * 4.5 + 4,
+        } for sentence_index in range(self.num_sentences)]
+
+        return {
+            "id": self.get_id(index),
+            "title": "Meeting {}".format(index),
+            "date": self.dates[index],
+            "dateString": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(self.dates[index] / 1000)),
+            "duration": self.num_sentences * 4.5 / 60,
+            "host_email": "host@example.com",
+            "organizer_email": "organizer@example.com",
+            "participants": ["participant{}@example.com".format(number) for number in range(3)],
+            "transcript_url": "https://app.fireflies.ai/view/{}".format(self.get_id(index)),
+            "speakers": [{"id": str(number), "name": "Speaker {}".format(number)} for number in range(3)],
+            "meeting_info": {"fred_joined": True, "silent_meeting": False,
+                             "summary_status": self.summary_statuses.get(index, "processed")},
+            "sentences": sentences,
+            "summary": {
+                "keywords": ["keyword{}".format(number) for number in range(5)],
+                "action_items": "Follow up",
+                "overview": "Overview of meeting {}".format(index),
+            },
+        }
+
+    @functools.lru_cache(maxsize=4096)
+    def encode_transcript(self, index):
+        return json.dumps(self.make_transcript(index))
+
+    def set_summary_status(self, index, status):
+        self.summary_statuses[index] = status
+        self.encode_transcript.cache_clear()
+
+    def get_page(self, from_ms, to_ms, limit, skip):
+        """
+        Returns the encoded transcripts of [from_ms, to_ms], from the newest to the oldest.
+        """
+        low = bisect_left(self.dates, from_ms)
+        high = bisect_right(self.dates, to_ms) - skip
+        return [self.encode_transcript(index) for index in range(high - 1, max(low, high - limit) - 1, -1)]
+
+    def get_transcript(self, transcript_id):
+        index = self.get_index(transcript_id)
+        if index is None or not 0 <= index < len(self.dates):
+            return "null"
+        return self.encode_transcript(index)
+
+    def get_users(self):
+        return json.dumps([{
+            "user_id": "user-{}".format(number),
+            "email": "user{}@example.com".format(number),
+            "name": "User {}".format(number),
+            "num_transcripts": number,
+            "is_admin": number == 0,
+            "integrations": [],
+        } for number in range(self.num_users)])
+
+    def execute(self, query, variables):
+        """
+        Returns the encoded `data` of a GraphQL query and its errors, or None for an unknown query.
+        Like the API, the aliased lookups of unknown ids are null with an `object_not_found` error.
+        """
+        if TRANSCRIPTS_RE.search(query):
+            page = self.get_page(to_ms(variables["fromDate"]) if variables.get("fromDate") else 0,
+                                 to_ms(variables["toDate"]) if variables.get("toDate") else sys.maxsize,
+                                 int(variables.get("limit") or 50),
+                                 int(variables.get("skip") or 0))
+            return '{"transcripts": [' + ", ".join(page) + ']}', []
+
+        aliases = ALIASED_TRANSCRIPT_RE.findall(query)
+        if aliases:
+            items = [(alias, self.get_transcript(variables.get(variable))) for alias, variable in aliases]
+            errors = [{"message": "Object not found", "code": "object_not_found", "path": [alias],
+                       "extensions": {"status": 404}} for alias, item in items if item == "null"]
+            return "{" + ", ".join('"{}": {}'.format(alias, item) for alias, item in items) + "}", errors
+
+        match = TRANSCRIPT_RE.search(query)
+        if match:
+            return '{"transcript": ' + self.get_transcript(variables.get(match.group(1))) + '}', []
+
+        if USERS_RE.search(query):
+            return '{"users": ' + self.get_users() + '}', []
+        return None
+
+
+class MockFirefliesHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Keep-alive responses would otherwise wait for the delayed ACK of the client
+    disable_nagle_algorithm = True
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        dataset = self.server.get_dataset(self.headers.get("Authorization", "")[len("Bearer "):])
+        error_status = self.server.fail(body) if self.server.fail else None
+        result = None
+        if dataset is not None and not error_status:
+            result = dataset.execute(body.get("query", ""), body.get("variables") or {})
+        if dataset is None:
+            status = 403
+            payload = json.dumps({"errors": [{"message": "Invalid API key", "code": "forbidden",
+                                              "extensions": {"status": 403}}]})
+        elif error_status:
+            status = error_status
+            payload = json.dumps({"errors": [{"message": "Injected error",
+                                              "code": "invalid_arguments" if status < 500 else None,
+                                              "extensions": {"status": status}}]})
+        elif result is None:
+            status = 400
+            payload = json.dumps({"errors": [{"message": "Unknown query", "code": "invalid_arguments",
+                                              "extensions": {"status": 400}}]})
+        else:
+            status = 200
+            data, errors = result
+            payload = '{"data": ' + data + (', "errors": ' + json.dumps(errors) if errors else '') + '}'
+
+        encoded = payload.encode("utf-8")
+        cut_share = self.server.cut(body) if self.server.cut and status == 200 else None
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        if cut_share is not None:
+            # The connection is closed in the middle of the body
+            self.wfile.write(encoded[:int(len(encoded) * cut_share)])
+            self.close_connection = True
+            return
+        self.wfile.write(encoded)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class MockFirefliesServer(ThreadingHTTPServer):
+    """
+    The mock API, listening on localhost. `start` serves it from a background thread.
+
+    :param dataset: The `Dataset` served
+    :param port: Port to listen on, a free port by default
+    :param latency: Seconds added to every response
+    :param fail: Called with the decoded body of each request, returns the HTTP status of an error to answer
+        instead, eg. to test the retries, or None. Errors below 500 are `invalid_arguments` errors.
+    :param datasets: The `Dataset` served to each access token, eg. to mock several workspaces. The other
+        tokens are then answered a `forbidden` error.
+    :param cut: Called with the decoded body of each successful request, returns the share of the response
+        sent before the connection is closed, eg. 0.5, or None to send the whole response.
+    """
+    daemon_threads = True
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, dataset, port=0, latency=0.0, fail=None, datasets=None, cut=None):
+        super().__init__(("127.0.0.1", port), MockFirefliesHandler)
+        self.dataset = dataset
+        self.latency = latency
+        self.fail = fail
+        self.datasets = datasets
+        self.cut = cut
+
+    def get_dataset(self, access_token):
+        """
+        Returns the `Dataset` served to an access token, None when it is not accepted.
+        """
+        if self.datasets is None:
+            return self.dataset
+        return self.datasets.get(access_token)
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:{}/graphql".format(self.server_address[1])
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def add_dataset_arguments(parser):
+    parser.add_argument("--transcripts", type=int, default=1000, help="number of transcripts")
+    parser.add_argument("--sentences", type=int, default=50, help="sentences per transcript")
+    parser.add_argument("--words", type=int, default=12, help="words per sentence")
+    parser.add_argument("--dates", choices=DATE_DISTRIBUTIONS, default="uniform", help="date distribution")
+    parser.add_argument("--ties", type=int, default=3, help="transcripts per date with --dates ties")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+
+
+def make_dataset(args):
+    return Dataset(num_transcripts=args.transcripts,
+                   num_sentences=args.sentences,
+                   words_per_sentence=args.words,
+                   date_distribution=args.dates,
+                   ties=args.ties)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=0)
+    add_dataset_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockFirefliesServer(make_dataset(args), port=args.port, latency=args.latency)
+    # The benchmarks read the URL from the first line
+    print(server.url, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
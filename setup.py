@@ -15,6 +15,16 @@ setup(
         'requests==2.33.0',
         'singer-python==6.0.0'
     ],
+    extras_require={
+        # Asyncio client with HTTP/2 (`tap_fireflies.async_client`)
+        'async': ['httpx[http2]'],
+        # Incremental parsing of the transcripts pages (`stream_json`)
+        'stream': ['ijson'],
+        # Faster encoding of the Singer messages (`fast_json`)
+        'fast': ['orjson'],
+        # Parquet batch files (`batch_format`)
+        'parquet': ['pyarrow'],
+    },
     entry_points="""
     [console_scripts]
     tap-fireflies=tap_fireflies:main
@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 
+import json
+import sys
+
 import singer
 
 from singer import utils
-from tap_fireflies.discover import discover
-from tap_fireflies.sync import sync
+from singer.catalog import Catalog
+from tap_fireflies.catalog_cache import get_catalog_dict
 
 LOGGER = singer.get_logger()
 
@@ -13,11 +16,11 @@ REQUIRED_CONFIG_KEYS = [
     'start_date',
 ]
 
-def do_discover():
+def do_discover(config):
 
     LOGGER.info('Starting discover')
-    catalog = discover()
-    catalog.dump()
+    # Same output as `Catalog.dump`
+    json.dump(get_catalog_dict(config.get('catalog_cache_dir')), sys.stdout, indent=2)
     LOGGER.info('Finished discover')
 
 
@@ -31,13 +34,16 @@ def main():
 
     # If discover flag was passed, run discovery mode and dump output to stdout
     if parsed_args.discover:
-        do_discover()
+        do_discover(parsed_args.config)
     # Otherwise run in sync mode
     else:
+        # Imports the client and the streams only when syncing
+        from tap_fireflies.sync import sync  # pylint: disable=import-outside-toplevel
+
         if parsed_args.catalog:
             catalog = parsed_args.catalog
         else:
-            catalog = discover()
+            catalog = Catalog.from_dict(get_catalog_dict(parsed_args.config.get('catalog_cache_dir')))
         sync(parsed_args.config, parsed_args.state, catalog)
 
 if __name__ == '__main__':
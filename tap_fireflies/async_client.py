@@ -0,0 +1,117 @@
+"""
+This module defines an asyncio client of the Fireflies GraphQL API, with the same `request` and `post`
+surface and error mapping as `FirefliesClient`. It requires the optional `httpx` dependency:
+
+    pip install 'tap-fireflies[async]'
+"""
+
+import importlib.util
+import time
+
+import backoff
+import singer
+
+from singer import metrics
+from tap_fireflies import phase_metrics
+from tap_fireflies.client import (FIREFLIES_API_URL, FIREFLIES_LIMIT_PER_MINUTE, FirefliesBadResponseError,
+                                  FirefliesRateLimitError, Server5xxError, check_response,
+                                  get_request_timeout, log_request, log_response,
+                                  prepare_request)
+from tap_fireflies.rate_limit import RateLimiter
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+LOGGER = singer.get_logger()
+
+MAX_CONNECTIONS = 10
+KEEPALIVE_EXPIRY = 60
+
+# Same retries as the blocking client, for the httpx exceptions
+TIMEOUT_ERRORS = (httpx.TimeoutException,) if httpx else ()
+CONNECTION_ERRORS = (httpx.NetworkError,) if httpx else ()
+
+
+class AsyncFirefliesClient:
+    # pylint: disable=too-many-arguments
+    def __init__(self, access_token, config_request_timeout, rate_limit_per_minute=None, rate_limit_burst=None,
+                 max_connections=None, rate_limiter=None, http2=None, base_url=None):
+        """
+            token: token for making requests
+            rate_limit_per_minute: requests per minute allowed by the Fireflies plan
+            rate_limit_burst: number of requests that can be sent at once
+            max_connections: size of the connection pool, all kept alive between requests
+            rate_limiter: an existing rate limiter to share, eg. with a `FirefliesClient`
+            http2: use HTTP/2, by default when the `h2` package is installed
+            base_url: the GraphQL endpoint, the Fireflies API by default
+        """
+        if httpx is None:
+            raise ImportError("The async client requires httpx, install it with: pip install 'tap-fireflies[async]'")
+
+        self.base_url = base_url or FIREFLIES_API_URL
+        self.__access_token = access_token
+        self.rate_limiter = rate_limiter or RateLimiter(float(rate_limit_per_minute or FIREFLIES_LIMIT_PER_MINUTE),
+                                                        60,
+                                                        float(rate_limit_burst or 1))
+        if http2 is None:
+            http2 = importlib.util.find_spec("h2") is not None
+
+        max_connections = int(max_connections or MAX_CONNECTIONS)
+        self.__client = httpx.AsyncClient(
+            http2=http2,
+            timeout=get_request_timeout(config_request_timeout),
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections,
+                                keepalive_expiry=KEEPALIVE_EXPIRY))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exception_type, exception_value, traceback):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.__client.aclose()
+
+    @backoff.on_exception(backoff.expo, TIMEOUT_ERRORS, max_tries=5, factor=2,
+                          on_backoff=phase_metrics.on_backoff) # Backoff for request timeout
+    @backoff.on_exception(backoff.expo,
+                          (Server5xxError, FirefliesBadResponseError) + CONNECTION_ERRORS,
+                          max_tries=4,
+                          factor=3,
+                          on_backoff=phase_metrics.on_backoff)
+    # The rate limiter holds the retries of rate limited requests until the hinted time.
+    @backoff.on_exception(backoff.constant, FirefliesRateLimitError, max_tries=5, interval=0, jitter=None,
+                          on_backoff=phase_metrics.on_backoff)
+    async def request(self, method, path=None, url=None, **kwargs):
+        if not url and not path:
+            url = self.base_url
+
+        await self.rate_limiter.acquire_async()
+
+        log_request(method, url, kwargs)
+
+        endpoint, kwargs = prepare_request(self.__access_token, method, kwargs)
+
+        start = time.perf_counter()
+        with metrics.http_request_timer(endpoint) as timer, phase_metrics.measure(phase_metrics.REQUEST):
+            response = await self.__client.request(method, url, **kwargs)
+            timer.tags[metrics.Tag.http_status_code] = response.status_code
+        log_response(method, url, kwargs, response, time.perf_counter() - start)
+
+        check_response(response, self.rate_limiter)
+
+        # Sometimes a 200 status code is returned with no content, which breaks JSON decoding.
+        try:
+            with phase_metrics.measure(phase_metrics.DECODE):
+                return response.json()
+        except ValueError as err:
+            raise FirefliesBadResponseError from err
+
+    async def get(self, path, **kwargs):
+        return await self.request('GET', path=path, **kwargs)
+
+    async def post(self, path, **kwargs):
+        return await self.request('POST', path=path, **kwargs)
@@ -0,0 +1,308 @@
+"""
+This module defines a writer sending the records to compressed batch files instead of stdout, for
+loaders that bulk-copy files rather than parsing RECORD messages. Only the SCHEMA and STATE messages
+are written to stdout, with a BATCH message announcing each file:
+
+    {"type": "BATCH", "stream": "transcripts", "encoding": {"format": "jsonl", "compression": "gzip"},
+     "manifest": ["file:///data/transcripts-20250610T120000-00001.jsonl.gz"]}
+"""
+
+import copy
+import datetime
+import gzip
+import os
+import threading
+import time
+
+import singer
+
+from tap_fireflies import phase_metrics
+from tap_fireflies.writer import DEFAULT_BUFFER_SIZE, RecordWriter
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+LOGGER = singer.get_logger()
+
+BATCH_FORMATS = ("jsonl", "parquet")
+# A file is closed once it reaches one of these limits, the size being the compressed bytes written so far
+DEFAULT_BATCH_MAX_BYTES = 128 * 1024 * 1024
+DEFAULT_BATCH_MAX_ROWS = 1000000
+# The files are also closed once a STATE message is held for this many seconds, so the checkpoints are emitted
+DEFAULT_BATCH_MAX_SECONDS = 300
+GZIP_COMPRESS_LEVEL = 6
+# Rows of the row groups of the parquet files, the rows of a group are kept in memory until it is written
+PARQUET_ROW_GROUP_SIZE = 10000
+PARQUET_COMPRESSION = "snappy"
+# Suffix of the files being written, removed once they are complete
+PARTIAL_SUFFIX = ".partial"
+
+
+def get_json_type(json_schema):
+    """
+    Returns the type of the values of a JSON schema besides null, None when they can have several types.
+    """
+    json_types = json_schema.get("type", [])
+    if isinstance(json_types, str):
+        json_types = [json_types]
+    json_types = [json_type for json_type in json_types if json_type != "null"]
+    if len(json_types) != 1:
+        return None
+    json_type = json_types[0]
+    if (json_type == "object" and not json_schema.get("properties")) or (
+            json_type == "array" and not json_schema.get("items")):
+        return None
+    return json_type
+
+
+def to_arrow_type(json_schema):
+    """
+    Returns the Arrow type of the values of a JSON schema. The objects without properties, the arrays
+    without items and the values of several types are written as JSON strings, see `to_arrow_value`.
+    """
+    json_type = get_json_type(json_schema)
+    if json_type == "object":
+        return pyarrow.struct([(name, to_arrow_type(property_schema))
+                               for name, property_schema in json_schema["properties"].items()])
+    if json_type == "array":
+        return pyarrow.list_(to_arrow_type(json_schema["items"]))
+    return {
+        "integer": pyarrow.int64(),
+        "number": pyarrow.float64(),
+        "boolean": pyarrow.bool_(),
+    }.get(json_type, pyarrow.string())
+
+
+def to_arrow_value(value, json_schema, format_json):
+    """
+    Returns a value of a JSON schema as a value of its `to_arrow_type`.
+    """
+    if value is None:
+        return None
+    json_type = get_json_type(json_schema)
+    if json_type == "object":
+        return {name: to_arrow_value(value.get(name), property_schema, format_json)
+                for name, property_schema in json_schema["properties"].items()}
+    if json_type == "array":
+        return [to_arrow_value(item, json_schema["items"], format_json) for item in value]
+    if json_type is None and not isinstance(value, str):
+        return format_json(value).decode("utf-8")
+    return value
+
+
+def has_json_values(json_schema):
+    """
+    Returns True when some values of a JSON schema are written as JSON strings.
+    """
+    json_type = get_json_type(json_schema)
+    if json_type == "object":
+        return any(has_json_values(property_schema) for property_schema in json_schema["properties"].values())
+    if json_type == "array":
+        return has_json_values(json_schema["items"])
+    return json_type is None
+
+
+class JsonlBatchFile:
+    """
+    A gzip file of records, one JSON document per line.
+    """
+    extension = ".jsonl.gz"
+    encoding = {"format": "jsonl", "compression": "gzip"}
+
+    def __init__(self, path, format_record, schema=None):  # pylint: disable=unused-argument
+        self.path = path
+        self.rows = 0
+        self.__format_record = format_record
+        self.__file = open(path + PARTIAL_SUFFIX, "wb")
+        self.__gzip_file = gzip.GzipFile(fileobj=self.__file, mode="wb", compresslevel=GZIP_COMPRESS_LEVEL)
+
+    @property
+    def size(self):
+        return self.__file.tell()
+
+    def write(self, record):
+        self.__gzip_file.write(self.__format_record(record) + b"\n")
+        self.rows += 1
+
+    def close(self):
+        self.__gzip_file.close()
+        self.__file.close()
+        os.replace(self.path + PARTIAL_SUFFIX, self.path)
+
+
+class ParquetBatchFile:
+    """
+    A parquet file of records, with the columns of the JSON schema of their stream.
+    """
+    extension = ".parquet"
+    encoding = {"format": "parquet", "compression": PARQUET_COMPRESSION}
+
+    def __init__(self, path, format_record, schema=None):
+        if pyarrow is None:
+            raise ImportError("Parquet batch files require pyarrow, install it with: pip install 'tap-fireflies[parquet]'")
+        self.path = path
+        self.rows = 0
+        self.__schema = schema or {}
+        self.__format_record = format_record
+        # The records are converted only when some of their values are written as JSON strings
+        self.__convert = has_json_values(self.__schema)
+        self.__arrow_schema = pyarrow.schema([(name, to_arrow_type(property_schema))
+                                              for name, property_schema in self.__schema.get("properties", {}).items()])
+        self.__file = open(path + PARTIAL_SUFFIX, "wb")
+        self.__parquet_writer = pyarrow.parquet.ParquetWriter(self.__file,
+                                                              self.__arrow_schema,
+                                                              compression=PARQUET_COMPRESSION)
+        self.__rows = []
+
+    @property
+    def size(self):
+        return self.__file.tell()
+
+    def write(self, record):
+        if self.__convert:
+            record = to_arrow_value(record, self.__schema, self.__format_record)
+        self.__rows.append(record)
+        self.rows += 1
+        if len(self.__rows) >= PARQUET_ROW_GROUP_SIZE:
+            self.write_row_group()
+
+    def write_row_group(self):
+        if self.__rows:
+            self.__parquet_writer.write_table(pyarrow.Table.from_pylist(self.__rows, schema=self.__arrow_schema))
+            self.__rows = []
+
+    def close(self):
+        self.write_row_group()
+        self.__parquet_writer.close()
+        self.__file.close()
+        os.replace(self.path + PARTIAL_SUFFIX, self.path)
+
+
+class BatchWriter(RecordWriter):
+    """
+    Writes the records of each stream to batch files in `output_dir`, which are closed once they reach
+    `max_bytes` or `max_rows`, and announced by a BATCH message on stdout.
+
+    The STATE messages are held until the files holding the records written before them are announced:
+    closing a full file closes the files of all the streams, then writes the latest held state. So the
+    files are not cut by every state, and a state is never written before the records it covers. The files
+    are also closed once a state is held for `max_seconds`, so the checkpoints of a long sync are emitted.
+    The `time_extracted` and `version` of the records are not written to the files, so the streams do not write
+    table versions: an ACTIVATE_VERSION message could not tell the current records from the deleted ones.
+
+    :param output_dir: Directory of the batch files, created if it does not exist
+    :param batch_format: `jsonl` for gzip NDJSON files, or `parquet`
+    :param max_bytes: Size in bytes of the compressed data written to a file before it is closed
+    :param max_rows: Number of records of a file before it is closed
+    :param max_seconds: Seconds a STATE message is held before the files are closed, 0 to close them
+        with every STATE message
+    """
+    writes_versions = False
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, output_dir, batch_format="jsonl", max_bytes=DEFAULT_BATCH_MAX_BYTES,
+                 max_rows=DEFAULT_BATCH_MAX_ROWS, max_seconds=DEFAULT_BATCH_MAX_SECONDS,
+                 buffer_size=DEFAULT_BUFFER_SIZE, fast_json=False):
+        super().__init__(buffer_size=buffer_size, fast_json=fast_json)
+        if batch_format not in BATCH_FORMATS:
+            raise ValueError("Unknown batch_format: {}, expected one of {}".format(batch_format, BATCH_FORMATS))
+        self.output_dir = os.path.abspath(output_dir)
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.batch_file_class = ParquetBatchFile if batch_format == "parquet" else JsonlBatchFile
+        self.max_bytes = int(max_bytes)
+        self.max_rows = int(max_rows)
+        self.max_seconds = float(max_seconds)
+        self.__file_prefix = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%S")
+        self.__file_number = 0
+        self.__schemas = {}
+        self.__files = {}
+        self.__held_state = None
+        self.__held_callbacks = []
+        # Monotonic time of the first STATE message held since the files were last closed
+        self.__held_since = None
+        self.__lock = threading.RLock()
+
+    def write_schema(self, stream_name, schema, key_properties, bookmark_properties=None):
+        with self.__lock:
+            # A new schema is used from the next file of the stream
+            self.close_file(stream_name)
+            self.__schemas[stream_name] = schema
+            super().write_schema(stream_name, schema, key_properties, bookmark_properties)
+
+    def write_record(self, stream_name, record, time_extracted=None, version=None):
+        with self.__lock:
+            batch_file = self.__files.get(stream_name)
+            if batch_file is None:
+                batch_file = self.open_file(stream_name)
+            with phase_metrics.measure(phase_metrics.WRITE):
+                batch_file.write(record)
+            if batch_file.size >= self.max_bytes or batch_file.rows >= self.max_rows or self.is_state_overdue():
+                self.close_files()
+
+    def write_state(self, state, on_written=None):
+        with self.__lock:
+            if not self.__files:
+                super().write_state(state, on_written=on_written)
+                return
+            # The streams keep updating their state
+            self.__held_state = copy.deepcopy(state)
+            if on_written is not None:
+                self.__held_callbacks.append(on_written)
+            if self.__held_since is None:
+                self.__held_since = time.monotonic()
+            if self.is_state_overdue():
+                self.close_files()
+
+    def is_state_overdue(self):
+        return self.__held_since is not None and time.monotonic() - self.__held_since >= self.max_seconds
+
+    def write_version(self, stream_name, version):
+        with self.__lock:
+            # The records of the version are announced first
+            self.close_files()
+            super().write_version(stream_name, version)
+
+    def open_file(self, stream_name):
+        self.__file_number += 1
+        file_name = "{}-{}-{:05d}{}".format(stream_name, self.__file_prefix, self.__file_number,
+                                            self.batch_file_class.extension)
+        batch_file = self.batch_file_class(os.path.join(self.output_dir, file_name),
+                                           self.format_message,
+                                           self.__schemas.get(stream_name))
+        self.__files[stream_name] = batch_file
+        return batch_file
+
+    def close_file(self, stream_name):
+        batch_file = self.__files.pop(stream_name, None)
+        if batch_file is None:
+            return
+        with phase_metrics.measure(phase_metrics.WRITE):
+            batch_file.close()
+        LOGGER.info("Wrote %s records of %s to %s", batch_file.rows, stream_name, batch_file.path)
+        self.write({
+            "type": "BATCH",
+            "stream": stream_name,
+            "encoding": batch_file.encoding,
+            "manifest": ["file://" + batch_file.path],
+        })
+
+    def close_files(self):
+        """
+        Closes and announces the files of all the streams, then writes the held state.
+        """
+        with self.__lock:
+            for stream_name in list(self.__files):
+                self.close_file(stream_name)
+            if self.__held_state is not None:
+                state, callbacks = self.__held_state, self.__held_callbacks
+                self.__held_state, self.__held_callbacks, self.__held_since = None, [], None
+                super().write_state(state)
+                for callback in callbacks:
+                    callback()
+            self.flush()
+
+    def finish(self):
+        self.close_files()
@@ -0,0 +1,48 @@
+"""
+This module defines the adaptive size of the batches of lookups packed in one GraphQL request
+and of the pages of transcripts.
+"""
+
+import threading
+
+# Batches are shrunk when a response is larger than this size in bytes
+DEFAULT_MAX_RESPONSE_BYTES = 4 * 1024 * 1024
+
+
+class AdaptiveBatchSize:
+    """
+    Number of items fetched per request, adjusted like the rate of the rate limiter: it grows by `step` after
+    each response smaller than `max_bytes` and faster than `max_seconds`, and is halved after a larger or
+    slower response or a failed request.
+
+    :param initial: Size of the first batch
+    :param minimum: The size never drops below it
+    :param maximum: The size never grows above it
+    :param max_bytes: Target maximum size of a response in bytes
+    :param max_seconds: Target maximum duration of a request, not checked by default
+    :param step: Number of items added after each response under the targets
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, initial, minimum=1, maximum=50, max_bytes=DEFAULT_MAX_RESPONSE_BYTES, max_seconds=None, step=1):
+        self.minimum = int(minimum)
+        self.maximum = int(maximum)
+        self.max_bytes = int(max_bytes)
+        self.max_seconds = max_seconds
+        self.step = int(step)
+        self.size = max(self.minimum, min(self.maximum, int(initial)))
+        self.__lock = threading.Lock()
+
+    def decrease(self):
+        with self.__lock:
+            self.size = max(self.minimum, self.size // 2)
+
+    def update(self, response_bytes=None, seconds=None):
+        """
+        Called after a successful request with the size of its response and its duration, when they are known.
+        """
+        if ((response_bytes is not None and response_bytes > self.max_bytes)
+                or (seconds is not None and self.max_seconds is not None and seconds > self.max_seconds)):
+            self.decrease()
+        else:
+            with self.__lock:
+                self.size = min(self.maximum, self.size + self.step)
@@ -0,0 +1,104 @@
+"""
+This module caches the catalog built by discovery, so a run without `--catalog` loads one JSON file
+instead of importing the streams and rebuilding the schemas and their metadata. The cache is only used
+when its directory is set, with the `catalog_cache_dir` setting.
+
+The cache file is keyed by a hash of the schema files and of the modules the catalog is built from,
+so it is rebuilt whenever one of them changes, eg. after upgrading the tap.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import singer
+
+LOGGER = singer.get_logger()
+
+# Changes the key of every cache file, to be increased when the content of the cache changes
+CATALOG_CACHE_VERSION = 1
+CATALOG_CACHE_PREFIX = "catalog-"
+# Modules defining the streams and their metadata, hashed with the schema files
+CATALOG_SOURCES = ("discover.py", "schema.py", "streams.py")
+SCHEMAS_DIR = "schemas"
+
+
+def get_default_cache_dir():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "tap-fireflies")
+
+
+def get_catalog_key():
+    """
+    Returns the hash of the cache version, the schema files and the modules building the catalog.
+    """
+    package_dir = os.path.dirname(os.path.realpath(__file__))
+    schemas_dir = os.path.join(package_dir, SCHEMAS_DIR)
+    paths = [os.path.join(package_dir, source) for source in CATALOG_SOURCES]
+    paths += sorted(os.path.join(schemas_dir, name) for name in os.listdir(schemas_dir) if name.endswith(".json"))
+
+    digest = hashlib.sha256(str(CATALOG_CACHE_VERSION).encode("utf-8"))
+    for path in paths:
+        digest.update(os.path.relpath(path, package_dir).encode("utf-8") + b"\0")
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+
+def get_cache_path(cache_dir, key):
+    return os.path.join(cache_dir, "{}{}.json".format(CATALOG_CACHE_PREFIX, key))
+
+
+def load_catalog_dict(cache_path):
+    try:
+        with open(cache_path) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as err:
+        LOGGER.warning("Ignoring the catalog cache %s: %s", cache_path, err)
+        return None
+
+
+def save_catalog_dict(cache_path, catalog_dict):
+    """
+    Writes the catalog atomically and removes the cache files of other versions of the schemas.
+    """
+    cache_dir = os.path.dirname(cache_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=cache_dir, prefix=CATALOG_CACHE_PREFIX, suffix=".tmp")
+        with os.fdopen(file_descriptor, "w") as file:
+            json.dump(catalog_dict, file)
+        os.replace(temp_path, cache_path)
+        for name in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, name)
+            if name.startswith(CATALOG_CACHE_PREFIX) and name.endswith(".json") and path != cache_path:
+                os.remove(path)
+    except OSError as err:
+        LOGGER.warning("Could not write the catalog cache %s: %s", cache_path, err)
+
+
+def get_catalog_dict(cache_dir=None):
+    """
+    Returns the discovered catalog as a dict, from the cache when the schemas did not change.
+
+    :param cache_dir: Directory of the cache, or True for `~/.cache/tap-fireflies`. The discovery
+        always runs without it, the default.
+    """
+    if not cache_dir:
+        cache_path = None
+    else:
+        cache_path = get_cache_path(get_default_cache_dir() if cache_dir is True else cache_dir, get_catalog_key())
+        catalog_dict = load_catalog_dict(cache_path)
+        if catalog_dict is not None:
+            return catalog_dict
+
+    # Imports the streams, their client and the schemas only when the catalog is built
+    from tap_fireflies.discover import discover  # pylint: disable=import-outside-toplevel
+
+    catalog_dict = discover().to_dict()
+    if cache_path is not None:
+        save_catalog_dict(cache_path, catalog_dict)
+    return catalog_dict
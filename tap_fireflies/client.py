@@ -1,16 +1,38 @@
+import functools
+import hashlib
+import io
+import logging
+import re
 import backoff
 import requests
 import time
 import singer
 
-from requests.exceptions import ConnectionError, Timeout
-from singer import metrics, utils
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ChunkedEncodingError, ConnectionError, Timeout
+from singer import metrics
 from simplejson.scanner import JSONDecodeError
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+from tap_fireflies import phase_metrics
+from tap_fireflies.batching import AdaptiveBatchSize
+from tap_fireflies.query import BATCH_ALIAS, BATCH_VARIABLE
+from tap_fireflies.rate_limit import RateLimiter, parse_retry_after
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 LOGGER = singer.get_logger()
 
+FIREFLIES_API_URL = "https://api.fireflies.ai/graphql"
 FIREFLIES_LIMIT_PER_MINUTE = 60
 REQUEST_TIMEOUT = 300
+# Number of lookups of the first request of `iter_batches`
+BATCH_SIZE = 10
+FIREFLIES_MAX_BATCH_SIZE = 50
+# Name of the operation of a GraphQL query, eg. `Transcripts` in `query Transcripts($limit: Int) {`
+OPERATION_NAME_PATTERN = re.compile(r"^\s*(?:query|mutation)\s+(\w+)")
 
 # Credit: refer to tap-intercom: https://github.com/singer-io/tap-intercom/blob/master/tap_intercom/client.py
 
@@ -157,33 +179,227 @@ def raise_for_error(response):
     
     formatted_function = get_exception_for_error_code(fireflies_error_status=fireflies_error_status,
                                                       fireflies_error_code=fireflies_error_code)
-    
+    # A plain HTTP 429, eg. from a proxy, without the `too_many_requests` code
+    if response.status_code == 429 and not issubclass(formatted_function, Server429Error):
+        formatted_function = FirefliesRateLimitError
+
     raise formatted_function(message) from None
 
 
+def get_error_exception(error):
+    """Returns the mapped exception of one error of a GraphQL response, eg. the error of an alias."""
+    fireflies_error_code = error.get("code")
+    fireflies_error_status = (error.get("extensions") or {}).get("status", 502)
+    exception = get_exception_for_error_code(fireflies_error_status=fireflies_error_status,
+                                             fireflies_error_code=fireflies_error_code)
+    return exception("Fireflies-error_status: {}, Error: {}, Error_Code: {}".format(
+        fireflies_error_status, error.get("message"), fireflies_error_code))
+
+
+def get_retry_after(response):
+    """Returns the number of seconds to wait hinted by a rate limited response, if any."""
+    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+    if retry_after is not None:
+        return retry_after
+
+    try:
+        errors = response.json().get("errors") or [{}]
+    except Exception:
+        return None
+    # Fireflies returns the time when requests are accepted again in the error metadata.
+    extensions = errors[0].get("extensions") or {}
+    return parse_retry_after((extensions.get("metadata") or {}).get("retryAfter"))
+
+
+def prepare_request(access_token, method, kwargs):
+    """
+    Adds the authentication headers to the request arguments and pops the `endpoint` used for metrics.
+    Shared by the blocking and the async clients.
+    """
+    if "headers" not in kwargs:
+        kwargs["headers"] = {}
+
+    kwargs["headers"]["Authorization"] = "Bearer {token}".format(token=access_token)
+
+    if method == "POST":
+        kwargs["headers"]["Content-Type"] = "application/json"
+
+    return kwargs.pop("endpoint", None), kwargs
+
+
+@functools.lru_cache(maxsize=64)
+def get_query_fingerprint(query):
+    """
+    Returns `<operation name>:<hash>`, a short and stable identifier of a GraphQL query for the logs.
+    The queries of a stream are built once and sent with every page, so the fingerprints are cached.
+    """
+    match = OPERATION_NAME_PATTERN.match(query)
+    operation_name = match.group(1) if match else "anonymous"
+    return "{}:{}".format(operation_name, hashlib.sha1(query.encode("utf-8")).hexdigest()[:12])
+
+
+def log_request(method, url, kwargs):
+    """
+    Logs the full request at DEBUG level, the GraphQL queries are several kilobytes long.
+    """
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        LOGGER.debug("URL: %s %s, Params: %s, JSON Body: %s", method, url, kwargs.get("params"), kwargs.get("json"))
+
+
+# pylint: disable=too-many-arguments
+def log_response(method, url, kwargs, response, seconds, stream=False):
+    """
+    Logs one line per request with the query fingerprint, the variables, the status, the size and the latency.
+    Shared by the blocking and the async clients.
+    """
+    if not LOGGER.isEnabledFor(logging.INFO):
+        return
+
+    body = kwargs.get("json") or {}
+    query = body.get("query")
+    # The body of a streamed response is not read yet
+    size = response.headers.get("Content-Length")
+    if size is None and not stream:
+        size = len(response.content)
+    LOGGER.info("%s %s, Query: %s, Variables: %s, Status: %s, Bytes: %s, Latency: %.3fs",
+                method,
+                url,
+                get_query_fingerprint(query) if query else None,
+                body.get("variables"),
+                response.status_code,
+                size if size is not None else "unknown",
+                seconds)
+
+
+def check_response(response, rate_limiter):
+    """
+    Raises the mapped error of a failed response and updates the rate limiter from the response.
+    Shared by the blocking and the async clients.
+    """
+    if response.status_code != 200:
+        try:
+            raise_for_error(response)
+        except FirefliesRateLimitError:
+            rate_limiter.penalize(get_retry_after(response))
+            raise
+        except Exception:
+            # eg. a 503 with a `Retry-After` header
+            rate_limiter.update_from_headers(response.headers)
+            raise
+
+    rate_limiter.update_from_headers(response.headers)
+    rate_limiter.reward()
+
+
+def get_request_timeout(config_request_timeout):
+    # Set request timeout to config param `request_timeout` value.
+    # If value is 0,"0","" or not passed then it set default to 300 seconds.
+    if config_request_timeout and float(config_request_timeout):
+        return float(config_request_timeout)
+    return REQUEST_TIMEOUT
+
+
 def get_default_header(token):
     return {
         "Content-Type": "application/json",
         "Authorization": "Bearer {token}".format(token=token)
     }
 
+def retry_rate_limited(func):
+    """
+    Retries the rate limited requests. The rate limiter holds the retries until the hinted time.
+    """
+    return backoff.on_exception(backoff.constant, FirefliesRateLimitError, max_tries=5, interval=0, jitter=None,
+                                on_backoff=phase_metrics.on_backoff)(func)
+
+def retry_request(func):
+    """
+    Retries the failed requests. Rate limiting: https://docs.fireflies.ai/fundamentals/limits
+    """
+    func = retry_rate_limited(func)
+    func = backoff.on_exception(backoff.expo,
+                                (Server5xxError, ConnectionError, ChunkedEncodingError, FirefliesBadResponseError),
+                                max_tries=4,
+                                factor=3,
+                                on_backoff=phase_metrics.on_backoff)(func)
+    # Backoff for request timeout
+    return backoff.on_exception(backoff.expo, Timeout, max_tries=5, factor=2, on_backoff=phase_metrics.on_backoff)(func)
+
+
+def decode_response(response):
+    # Sometimes a 200 status code is returned with no content, which breaks JSON decoding.
+    try:
+        with phase_metrics.measure(phase_metrics.DECODE):
+            return response.json()
+    except JSONDecodeError as err:
+        raise FirefliesBadResponseError from err
+
+
+def iter_json_items(file_obj, item_path):
+    """
+    Parses a GraphQL response from a file object and yields the items of the array at `item_path`,
+    keeping only one item in memory. Raises FirefliesError if the response has no `data`.
+    """
+    item_prefix = item_path + ".item"
+    errors = []
+    has_data = False
+    builder = None
+    builder_prefix = None
+    depth = 0
+
+    for prefix, event, value in ijson.parse(file_obj, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+
+            if depth == 0:
+                if builder_prefix == item_prefix:
+                    yield builder.value
+                else:
+                    errors.append(builder.value)
+                builder = None
+        elif prefix in (item_prefix, "errors.item") and event in ("start_map", "start_array"):
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+            builder_prefix = prefix
+            depth = 1
+        elif prefix == "data" and event == "start_map":
+            has_data = True
+
+    if not has_data:
+        raise FirefliesError("Fireflies-error: response without data, Errors: {}".format(errors))
+
+
 class FirefliesClient:
-    def __init__(self, access_token, config_request_timeout):
+    # pylint: disable=too-many-arguments
+    def __init__(self, access_token, config_request_timeout, rate_limit_per_minute=None, rate_limit_burst=None,
+                 max_connections=None, rate_limiter=None, base_url=None, response_cache=None):
         """
             endpoint_url: Your GraphQL endpoint. 
             token: token for making requests
+            rate_limit_per_minute: requests per minute allowed by the Fireflies plan
+            rate_limit_burst: number of requests that can be sent at once
+            max_connections: size of the connection pool, should cover the number of threads using the client
+            rate_limiter: an existing rate limiter to share, eg. with an `AsyncFirefliesClient`
+            base_url: the GraphQL endpoint, the Fireflies API by default
+            response_cache: a `ResponseCache` to read the responses from and store them in
         """
-        self.base_url = "https://api.fireflies.ai/graphql"
+        self.base_url = base_url or FIREFLIES_API_URL
         self.__access_token = access_token
         self.__session = requests.Session()
-
-        # Set request timeout to config param `request_timeout` value.
-        # If value is 0,"0","" or not passed then it set default to 300 seconds.
-
-        if config_request_timeout and float(config_request_timeout):
-            self.__request_timeout = float(config_request_timeout)
-        else:
-            self.__request_timeout = REQUEST_TIMEOUT                
+        if max_connections:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=int(max_connections))
+            self.__session.mount("https://", adapter)
+            self.__session.mount("http://", adapter)
+        # The rate limiter is shared by every thread using this client.
+        self.rate_limiter = rate_limiter or RateLimiter(float(rate_limit_per_minute or FIREFLIES_LIMIT_PER_MINUTE),
+                                                        60,
+                                                        float(rate_limit_burst or 1))
+        self.__request_timeout = get_request_timeout(config_request_timeout)
+        self.response_cache = response_cache
 
     def __enter__(self):
         return self
@@ -191,47 +407,172 @@ class FirefliesClient:
     def __exit__(self, exception_type, exception_value, traceback):
         self.__session.close()
 
-    # Rate limiting:
-    # https://docs.fireflies.ai/fundamentals/limits
-    @backoff.on_exception(backoff.expo, Timeout, max_tries=5, factor=2) # Backoff for request timeout
-    @backoff.on_exception(backoff.expo,
-                          (Server5xxError, ConnectionError, FirefliesBadResponseError, FirefliesRateLimitError),
-                          max_tries=4,
-                          factor=3)
-    @utils.ratelimit(1000, 60)    
-    def request(self, method, path=None, url=None, **kwargs):
+    def send(self, method, path=None, url=None, stream=False, **kwargs):
+        """
+        Sends one request and raises the mapped error if it failed.
+        With `stream`, the body is left unread, to be consumed from `response.raw`.
+        """
         if not url and not path:
             url = self.base_url
 
-        LOGGER.info("URL: {} {}, Params: {}, JSON Body: {}".format(method, url, kwargs.get("params"), kwargs.get("json")))
-
-        if "headers" not in kwargs:
-            kwargs["headers"] = {}
-        
-        kwargs["headers"]["Authorization"] = "Bearer {token}".format(token=self.__access_token)
+        if self.response_cache is not None:
+            # The cached responses do not count against the rate limit
+            response_key = self.response_cache.get_key(url, self.__access_token, kwargs.get("json"))
+            response = self.response_cache.get(url, response_key)
+            if response is not None:
+                return response
 
-        if method == "POST":
-            kwargs["headers"]["Content-Type"] = "application/json"
+        self.rate_limiter.acquire()
 
-        if 'endpoint' in kwargs:
-            endpoint = kwargs['endpoint']
-            del kwargs['endpoint']
-        else:
-            endpoint = None
+        log_request(method, url, kwargs)
 
-        with metrics.http_request_timer(endpoint) as timer:
-            response = self.__session.request(method, url, timeout=self.__request_timeout, **kwargs) # Pass request timeout
-            timer.tags[metrics.Tag.http_status_code] = response.status_code                
+        endpoint, kwargs = prepare_request(self.__access_token, method, kwargs)
 
-        if response.status_code != 200:
-            raise_for_error(response)
+        start = time.perf_counter()
+        with metrics.http_request_timer(endpoint) as timer, phase_metrics.measure(phase_metrics.REQUEST):
+            response = self.__session.request(method, url, timeout=self.__request_timeout, stream=stream, **kwargs) # Pass request timeout
+            timer.tags[metrics.Tag.http_status_code] = response.status_code
+        log_response(method, url, kwargs, response, time.perf_counter() - start, stream=stream)
 
-        # Sometimes a 200 status code is returned with no content, which breaks JSON decoding.
         try:
-            return response.json()
-        except JSONDecodeError as err:
-            raise FirefliesBadResponseError from err
-    
+            check_response(response, self.rate_limiter)
+        finally:
+            # Error bodies are read by `raise_for_error`, release the connection.
+            if stream and response.status_code != 200:
+                response.close()
+
+        if self.response_cache is not None:
+            # The body is read to be stored, a streamed response is then parsed from memory
+            self.response_cache.put(response_key, response)
+            if stream:
+                response.raw = io.BytesIO(response.content)
+        return response
+
+    @retry_request
+    def request(self, method, path=None, url=None, **kwargs):
+        response = self.send(method, path=path, url=url, **kwargs)
+
+        return decode_response(response)
+
+    @retry_rate_limited
+    def fetch(self, method, path=None, url=None, **kwargs):
+        """
+        Sends one request and returns the decoded response and its size in bytes. Unlike `request`, only
+        the rate limited requests are retried, for callers adapting the next request to the failures,
+        eg. asking for a smaller page after a timeout.
+        """
+        response = self.send(method, path=path, url=url, **kwargs)
+        return decode_response(response), len(response.content)
+
+    @retry_request
+    def open_stream(self, method, path=None, url=None, **kwargs):
+        return self.send(method, path=path, url=url, stream=True, **kwargs)
+
+    @retry_rate_limited
+    def open_stream_once(self, method, path=None, url=None, **kwargs):
+        return self.send(method, path=path, url=url, stream=True, **kwargs)
+
+    def stream_items(self, method, item_path, path=None, retry=True, **kwargs):
+        """
+        Sends the request and returns an iterator of the items of the array at `item_path` (eg. `data.transcripts`),
+        parsed one at a time while the response body is read from the socket, so only one item is in memory.
+        The iterator returns the size of the response in bytes, and raises FirefliesBadResponseError when the
+        connection fails before the end of the body: the request is not sent again, see `Transcripts.get_pages`.
+        Without `retry`, only the rate limited requests are retried, like `fetch`.
+        """
+        if ijson is None:
+            raise ImportError("Streaming JSON parsing requires ijson, install it with: pip install 'tap-fireflies[stream]'")
+
+        open_stream = self.open_stream if retry else self.open_stream_once
+        return self.iter_stream_items(open_stream(method, path=path, **kwargs), item_path)
+
+    @staticmethod
+    def iter_stream_items(response, item_path):
+        with response:
+            response.raw.decode_content = True
+            try:
+                items = iter_json_items(response.raw, item_path)
+                while True:
+                    # The body is read from the socket while it is parsed, both count as decode time
+                    with phase_metrics.measure(phase_metrics.DECODE):
+                        item = next(items, StopIteration)
+                    if item is StopIteration:
+                        break
+                    yield item
+            except (ijson.JSONError, ChunkedEncodingError, ProtocolError, ReadTimeoutError) as err:
+                # The connection failed or was closed before the end of the body
+                raise FirefliesBadResponseError from err
+            return response.raw.tell()
+
+    def fetch_batch(self, batch_query, ids, **kwargs):
+        """
+        Sends one `build_batch_query` query looking up the given ids, and returns the size of the response
+        and a list of (id, item, error) tuples. A lookup which failed has the mapped exception of its error.
+        Raises the mapped error if the whole request failed.
+        """
+        variables = {BATCH_VARIABLE.format(index): item_id for index, item_id in enumerate(ids)}
+        response = self.send("POST", json={"query": batch_query, "variables": variables}, **kwargs)
+        response_json = decode_response(response)
+
+        errors = {}
+        for error in response_json.get("errors") or []:
+            path = error.get("path") or [None]
+            errors.setdefault(path[0], error)
+
+        data = response_json.get("data")
+        if data is None:
+            error = errors.get(None) or next(iter(errors.values()), None)
+            if error is None:
+                raise FirefliesBadResponseError("Fireflies-error: response without data")
+            raise get_error_exception(error)
+
+        results = []
+        for index, item_id in enumerate(ids):
+            alias = BATCH_ALIAS.format(index)
+            item = data.get(alias)
+            error = errors.get(alias) if item is None else None
+            results.append((item_id, item, get_error_exception(error) if error else None))
+        return len(response.content), results
+
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-arguments
+    def iter_batches(self, ids, build_batch_query, batch_size=None, max_batch_size=None, sizer=None, **kwargs):
+        """
+        Yields (id, item, error) tuples for the given ids, looked up `batch_size` at a time with the queries
+        of `build_batch_query(size)`. The batch size is adapted to the size of the responses and shrunk
+        when a request fails, see `AdaptiveBatchSize`. A batch of one id is retried like `request`.
+        With a response cache, the batch size is not adapted, so the queries are the same on every run.
+
+        :param sizer: An `AdaptiveBatchSize` kept across the calls, instead of `batch_size` and `max_batch_size`
+        """
+        sizer = sizer or AdaptiveBatchSize(batch_size or BATCH_SIZE, maximum=max_batch_size or FIREFLIES_MAX_BATCH_SIZE)
+        if self.response_cache is not None:
+            sizer = AdaptiveBatchSize(sizer.size, minimum=sizer.size, maximum=sizer.size)
+        fetch_batch = retry_rate_limited(self.fetch_batch)
+        fetch_single = retry_request(self.fetch_batch)
+        queries = {}
+        ids = list(ids)
+        position = 0
+        while position < len(ids):
+            batch = ids[position:position + sizer.size]
+            if len(batch) not in queries:
+                queries[len(batch)] = build_batch_query(len(batch))
+
+            if len(batch) == 1:
+                response_bytes, results = fetch_single(queries[1], batch, **kwargs)
+            else:
+                try:
+                    response_bytes, results = fetch_batch(queries[len(batch)], batch, **kwargs)
+                except (Server5xxError, ConnectionError, ChunkedEncodingError, Timeout, FirefliesBadResponseError,
+                        FirefliesRequestTimeoutError) as err:
+                    LOGGER.warning("Batch of %s lookups failed (%s), retrying smaller batches", len(batch), err)
+                    sizer.decrease()
+                    continue
+
+            sizer.update(response_bytes)
+            position += len(batch)
+            yield from results
+
     def get(self, path, **kwargs):
         return self.request('GET', path=path, **kwargs)
 
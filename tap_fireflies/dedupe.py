@@ -0,0 +1,52 @@
+"""
+This module defines the dedupe of the transcripts returned by the `toDate` pagination.
+"""
+
+
+class BoundaryDedupe:
+    """
+    Remembers the ids of the records seen at or above the current `toDate` boundary.
+
+    The transcripts are paged from the newest to the oldest by moving `toDate` to the oldest `date`
+    of the previous page. As `toDate` is inclusive, a record can only be returned again when its `date`
+    is the boundary itself, so the ids of newer records are evicted each time the boundary moves down.
+    The memory used is bounded by a page of records plus the records sharing the boundary `date`.
+
+    :param ids: Ids of records already seen at the `boundary` date, eg. from a checkpoint
+    :param boundary: The `date` of the `ids`, in epoch milliseconds
+    """
+    def __init__(self, ids=(), boundary=None):
+        self.boundary = boundary
+        # id -> `date` of the records seen at or above the boundary
+        self.__dates = dict.fromkeys(ids, boundary)
+
+    def __contains__(self, record_id):
+        return record_id in self.__dates
+
+    def __len__(self):
+        return len(self.__dates)
+
+    def add(self, record_id, record_date):
+        """
+        Remembers a record, returns False when it was already seen.
+        """
+        if record_id in self.__dates:
+            return False
+        self.__dates[record_id] = record_date
+        return True
+
+    def advance(self, boundary):
+        """
+        Moves the boundary down to `boundary` and forgets the records newer than it.
+        """
+        if boundary is None or (self.boundary is not None and boundary > self.boundary):
+            return
+        self.boundary = boundary
+        self.__dates = {record_id: record_date for record_id, record_date in self.__dates.items()
+                        if record_date is not None and record_date <= boundary}
+
+    def get_boundary_ids(self):
+        """
+        Returns the ids of the records seen at the boundary `date`, which are stored in the checkpoint.
+        """
+        return {record_id for record_id, record_date in self.__dates.items() if record_date == self.boundary}
@@ -0,0 +1,192 @@
+"""
+This module defines an on-disk cache of the responses of the Fireflies API, to run a sync again,
+eg. after a change of the schemas or the transform, without downloading the transcripts again.
+
+The responses are keyed by the endpoint, the token, the GraphQL query and its variables, and stored
+compressed in a SQLite file. Only the successful responses without GraphQL errors are stored.
+
+The variables include the size of the pages and of the batches of lookups, so the client and the streams
+do not adapt these sizes when the cache is used, and send the same requests on every run. The responses
+are read whole to be stored, so they are not parsed while they are downloaded (`stream_json`).
+"""
+
+import hashlib
+import io
+import sqlite3
+import threading
+import time
+import zlib
+
+import requests
+import simplejson
+import singer
+
+from tap_fireflies.client import FirefliesError, get_query_fingerprint
+
+LOGGER = singer.get_logger()
+
+# The responses are read from the cache, or sent and stored on a miss
+READ_THROUGH = "read_through"
+# The requests are always sent and their responses stored, eg. to refresh the cache
+RECORD = "record"
+# The responses are only read from the cache, a miss raises `FirefliesCacheMissError`
+REPLAY = "replay"
+CACHE_MODES = (READ_THROUGH, RECORD, REPLAY)
+
+# The least recently used responses are evicted above this size in bytes, compressed
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+COMPRESS_LEVEL = 6
+# Seconds to wait for the commit of another connection to the same file
+WRITE_LOCK_TIMEOUT = 60
+
+
+class FirefliesCacheMissError(FirefliesError):
+    pass
+
+
+def build_response(url, content):
+    """
+    Returns a `requests.Response` of a cached body, which can be decoded or read from `raw` like a streamed one.
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.encoding = "utf-8"
+    response.headers["Content-Type"] = "application/json"
+    response.headers["Content-Length"] = str(len(content))
+    response._content = content  # pylint: disable=protected-access
+    response.raw = io.BytesIO(content)
+    return response
+
+
+class ResponseCache:
+    """
+    SQLite store of the compressed bodies of the successful responses, keyed by `get_key`.
+
+    :param path: Path of the SQLite database, created if it does not exist
+    :param mode: `read_through`, `record` or `replay`, see `CACHE_MODES`
+    :param max_bytes: Maximum compressed size of the stored responses
+    :param ttl: Seconds after which a stored response is expired, never by default
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, path, mode=READ_THROUGH, max_bytes=DEFAULT_MAX_BYTES, ttl=None):
+        if mode not in CACHE_MODES:
+            raise ValueError("Unknown http_cache_mode: {}, expected one of {}".format(mode, CACHE_MODES))
+        self.path = path
+        self.mode = mode
+        self.max_bytes = int(max_bytes)
+        self.ttl = float(ttl) if ttl else None
+        self.hits = 0
+        self.misses = 0
+        # Used by all the threads of the client, eg. with `backfill_workers` or `stream_workers`
+        self.__connection = sqlite3.connect(path, timeout=WRITE_LOCK_TIMEOUT, check_same_thread=False)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                response_key TEXT PRIMARY KEY,
+                content BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )""")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self.__connection.commit()
+        self.__total_bytes = self.__connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self.__lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    @staticmethod
+    def get_key(url, access_token, body):
+        """
+        Returns the key of a request: the fingerprint of its query and a hash of the endpoint,
+        the token, the whole query and its variables.
+        """
+        body = body or {}
+        query = body.get("query") or ""
+        digest = hashlib.sha256()
+        for part in (url, access_token, query, simplejson.dumps(body.get("variables"), sort_keys=True, default=str)):
+            digest.update(str(part).encode("utf-8") + b"\0")
+        return "{}:{}".format(get_query_fingerprint(query), digest.hexdigest())
+
+    def get(self, url, response_key):
+        """
+        Returns the stored response of a request, or None on a miss or in `record` mode.
+        Raises `FirefliesCacheMissError` on a miss in `replay` mode.
+        """
+        if self.mode == RECORD:
+            return None
+
+        now = time.time()
+        with self.__lock:
+            row = self.__connection.execute("SELECT content, created_at FROM responses WHERE response_key = ?",
+                                            (response_key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self.delete(response_key)
+                row = None
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.__connection.execute("UPDATE responses SET last_used = ? WHERE response_key = ?",
+                                          (now, response_key))
+                self.__connection.commit()
+
+        if row is None:
+            if self.mode == REPLAY:
+                raise FirefliesCacheMissError("No cached response for {} in replay mode".format(response_key))
+            return None
+        LOGGER.debug("Cached response: %s", response_key)
+        return build_response(url, zlib.decompress(row[0]))
+
+    def put(self, response_key, response):
+        """
+        Stores the body of a successful response, unless it holds GraphQL errors, eg. the failed lookups of a batch.
+        """
+        content = response.content
+        try:
+            body = simplejson.loads(content)
+        except ValueError:
+            return
+        if not isinstance(body, dict) or body.get("errors"):
+            return
+        compressed = zlib.compress(content, COMPRESS_LEVEL)
+        now = time.time()
+        with self.__lock:
+            self.delete(response_key)
+            self.__connection.execute("INSERT INTO responses VALUES (?, ?, ?, ?, ?)",
+                                      (response_key, compressed, len(compressed), now, now))
+            self.__total_bytes += len(compressed)
+            if self.__total_bytes > self.max_bytes:
+                self.evict()
+            self.__connection.commit()
+
+    def delete(self, response_key):
+        row = self.__connection.execute("SELECT size FROM responses WHERE response_key = ?", (response_key,)).fetchone()
+        if row is not None:
+            self.__connection.execute("DELETE FROM responses WHERE response_key = ?", (response_key,))
+            self.__total_bytes -= row[0]
+
+    def evict(self):
+        """
+        Deletes the least recently used responses until the store fits in `max_bytes`.
+        """
+        # Other processes may share the file
+        self.__total_bytes = self.__connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        evicted = 0
+        rows = self.__connection.execute("SELECT response_key, size FROM responses ORDER BY last_used").fetchall()
+        for response_key, size in rows:
+            if self.__total_bytes <= self.max_bytes:
+                break
+            self.__connection.execute("DELETE FROM responses WHERE response_key = ?", (response_key,))
+            self.__total_bytes -= size
+            evicted += 1
+        LOGGER.info("Evicted %s responses from the response cache %s", evicted, self.path)
+
+    def close(self):
+        LOGGER.info("Response cache %s: %s hits, %s misses", self.path, self.hits, self.misses)
+        self.__connection.close()
@@ -0,0 +1,136 @@
+"""
+This module measures the time spent in each phase of the hot path of a sync (request, rate limit wait,
+backoff, JSON decode, transform, serialization and stdout write) and counts the events of each phase.
+
+The totals are shared by all the threads of the process. They are logged as Singer metric messages
+at the end of the sync, and can be written to a Prometheus text file or a JSON file.
+"""
+
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import singer
+
+from singer import metrics
+
+LOGGER = singer.get_logger()
+
+# Phases of the hot path, in the order they happen for a record
+REQUEST = "request"
+RATE_LIMIT_WAIT = "rate_limit_wait"
+BACKOFF = "backoff"
+DECODE = "decode"
+TRANSFORM = "transform"
+SERIALIZE = "serialize"
+WRITE = "write"
+PHASES = (REQUEST, RATE_LIMIT_WAIT, BACKOFF, DECODE, TRANSFORM, SERIALIZE, WRITE)
+
+# Name of the Singer metrics and prefix of the Prometheus metrics
+PHASE_DURATION = "phase_duration"
+PHASE_COUNT = "phase_count"
+PROMETHEUS_PREFIX = "tap_fireflies_"
+
+
+class PhaseMetrics:
+    """
+    Thread-safe totals of the seconds spent and the number of events of each phase.
+    """
+    def __init__(self):
+        self.__seconds = defaultdict(float)
+        self.__counts = defaultdict(int)
+        self.__lock = threading.Lock()
+
+    def add(self, phase, seconds, count=1):
+        with self.__lock:
+            self.__seconds[phase] += seconds
+            self.__counts[phase] += count
+
+    @contextmanager
+    def measure(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start)
+
+    def reset(self):
+        with self.__lock:
+            self.__seconds.clear()
+            self.__counts.clear()
+
+    def snapshot(self):
+        """
+        Returns a dict of phase to its `seconds` and `count`, for every phase.
+        """
+        with self.__lock:
+            return {phase: {"seconds": self.__seconds.get(phase, 0.0), "count": self.__counts.get(phase, 0)}
+                    for phase in sorted(set(PHASES) | set(self.__seconds), key=_phase_order)}
+
+    def log_metrics(self, tags=None):
+        """
+        Logs a `phase_duration` timer and a `phase_count` counter metric per phase.
+        """
+        for phase, totals in self.snapshot().items():
+            phase_tags = dict(tags or {}, phase=phase)
+            metrics.log(LOGGER, metrics.Point("timer", PHASE_DURATION, round(totals["seconds"], 6), phase_tags))
+            metrics.log(LOGGER, metrics.Point("counter", PHASE_COUNT, totals["count"], phase_tags))
+
+    def to_prometheus(self):
+        lines = []
+        snapshot = self.snapshot()
+        for name, key, metric_type, help_text in (
+                (PHASE_DURATION + "_seconds_total", "seconds", "counter", "Seconds spent in each phase of the sync"),
+                (PHASE_COUNT + "_total", "count", "counter", "Number of events of each phase of the sync")):
+            name = PROMETHEUS_PREFIX + name
+            lines.append("# HELP {} {}".format(name, help_text))
+            lines.append("# TYPE {} {}".format(name, metric_type))
+            for phase, totals in snapshot.items():
+                lines.append('{}{{phase="{}"}} {}'.format(name, phase, totals[key]))
+        return "\n".join(lines) + "\n"
+
+    def to_json(self):
+        return json.dumps({"phases": self.snapshot()}, indent=2)
+
+    def write_file(self, path, file_format=None):
+        """
+        Writes the totals to `path`, as Prometheus text when the format is `prometheus`
+        or the file ends with `.prom`, as JSON otherwise.
+        """
+        if file_format is None:
+            file_format = "prometheus" if path.endswith(".prom") else "json"
+        if file_format not in ("prometheus", "json"):
+            raise ValueError("Unknown metrics_format: {}, expected `prometheus` or `json`".format(file_format))
+
+        content = self.to_prometheus() if file_format == "prometheus" else self.to_json()
+        with open(path, "w") as file:
+            file.write(content)
+        LOGGER.info("Wrote the phase metrics to %s", path)
+
+
+def _phase_order(phase):
+    return (PHASES.index(phase) if phase in PHASES else len(PHASES), phase)
+
+
+# Totals of the process, used by the client, the rate limiter, the streams and the writer
+PHASE_METRICS = PhaseMetrics()
+
+
+def measure(phase):
+    """
+    Context manager adding the time spent in its block to `phase`.
+    """
+    return PHASE_METRICS.measure(phase)
+
+
+def add(phase, seconds, count=1):
+    PHASE_METRICS.add(phase, seconds, count)
+
+
+def on_backoff(details):
+    """
+    `backoff` handler counting the retries and the time waited before them.
+    """
+    PHASE_METRICS.add(BACKOFF, details.get("wait") or 0.0)
@@ -0,0 +1,146 @@
+"""
+This module builds the GraphQL selection sets sent to Fireflies from the stream
+schemas and the catalog metadata, so deselected fields are never requested.
+"""
+
+from singer import metadata
+
+INDENT = "    "
+
+
+def is_field_selected(stream_metadata, breadcrumb):
+    """
+    Mirrors `singer.Transformer.filter_data_by_metadata`: a field is dropped only if it
+    is explicitly deselected or unsupported, automatic fields are always kept.
+    """
+    if not stream_metadata:
+        return True
+
+    inclusion = metadata.get(stream_metadata, breadcrumb, 'inclusion')
+    if inclusion == 'automatic':
+        return True
+
+    selected = metadata.get(stream_metadata, breadcrumb, 'selected')
+    return selected is not False and inclusion != 'unsupported'
+
+
+def _get_types(schema):
+    types = schema.get("type", [])
+    if not isinstance(types, list):
+        types = [types]
+    return types
+
+
+def _get_object_schema(schema):
+    """
+    Returns the schema holding `properties` for object and array-of-object fields,
+    or None for scalar fields (and arrays of scalars).
+    """
+    types = _get_types(schema)
+    if "array" in types:
+        return _get_object_schema(schema.get("items", {}))
+    if "object" in types and schema.get("properties"):
+        return schema
+    return None
+
+
+def build_selection_set(schema, stream_metadata=None, parent=(), depth=1, only_automatic=False):
+    """
+    Returns the GraphQL selection set lines for the `properties` of the given schema.
+
+    :param schema: A JSON schema dict of an object
+    :param stream_metadata: Metadata map (`metadata.to_map`) used to prune deselected fields
+    :param parent: Breadcrumb of the schema within the stream schema
+    :param depth: Indentation level of the generated lines
+    :param only_automatic: If true, only the fields with `automatic` inclusion are kept
+    :return: list of lines
+    """
+    lines = []
+    for field_name, field_schema in schema.get("properties", {}).items():
+        breadcrumb = parent + ('properties', field_name)
+        if only_automatic:
+            if metadata.get(stream_metadata or {}, breadcrumb, 'inclusion') != 'automatic':
+                continue
+        elif not is_field_selected(stream_metadata, breadcrumb):
+            continue
+
+        object_schema = _get_object_schema(field_schema)
+        if object_schema is None:
+            lines.append(INDENT * depth + field_name)
+            continue
+
+        child_parent = breadcrumb + ('items',) if "array" in _get_types(field_schema) else breadcrumb
+        child_lines = build_selection_set(object_schema, stream_metadata, child_parent, depth + 1)
+        # An object without any selected sub-field cannot be queried in GraphQL.
+        if child_lines:
+            lines.append(INDENT * depth + field_name + " {")
+            lines.extend(child_lines)
+            lines.append(INDENT * depth + "}")
+
+    return lines
+
+
+def build_query(operation_name, root_field, schema, stream_metadata=None,
+                variable_definitions=None, arguments=None, only_automatic=False):
+    """
+    Builds a GraphQL query fetching the selected fields of `schema` under `root_field`.
+
+        build_query("Users", "users", schema, mdata)
+
+    :param operation_name: Name of the GraphQL operation, eg. `Transcripts`
+    :param root_field: Name of the root query field, eg. `transcripts`
+    :param schema: The stream JSON schema
+    :param stream_metadata: Metadata map used to prune deselected fields
+    :param variable_definitions: Dict of variable name to GraphQL type, eg. {"limit": "Int"}
+    :param arguments: List of root field argument names bound to variables of the same name
+    :param only_automatic: If true, only the fields with `automatic` inclusion are requested
+    :return: GraphQL query string
+    """
+    header = "query {}".format(operation_name)
+    if variable_definitions:
+        header += "({})".format(", ".join(
+            "${}: {}".format(name, graphql_type) for name, graphql_type in variable_definitions.items()))
+
+    root = root_field
+    if arguments:
+        root += "({})".format(", ".join("{0}: ${0}".format(name) for name in arguments))
+
+    selection = build_selection_set(schema, stream_metadata, depth=2, only_automatic=only_automatic)
+
+    lines = [header + " {", INDENT + root + " {"]
+    lines.extend(selection)
+    lines.extend([INDENT + "}", "}"])
+    return "\n".join(lines)
+
+
+# Alias of the n-th lookup of a batch query and name of its variable
+BATCH_ALIAS = "item{}"
+BATCH_VARIABLE = "id{}"
+
+
+# pylint: disable=too-many-arguments
+def build_batch_query(operation_name, root_field, schema, stream_metadata=None, size=1,
+                      argument="id", argument_type="String!"):
+    """
+    Builds a GraphQL query packing `size` lookups of `root_field` by `argument` with aliases:
+
+        query Transcripts($id0: String!, $id1: String!) {
+            item0: transcript(id: $id0) {
+                ...
+            }
+            item1: transcript(id: $id1) {
+        ...
+
+    :param size: Number of lookups, bound to the variables `id0` to `id<size - 1>`
+    :return: GraphQL query string
+    """
+    variables = [BATCH_VARIABLE.format(index) for index in range(size)]
+    lines = ["query {}({}) {{".format(operation_name,
+                                      ", ".join("${}: {}".format(variable, argument_type) for variable in variables))]
+    selection = build_selection_set(schema, stream_metadata, depth=2)
+    for index, variable in enumerate(variables):
+        lines.append(INDENT + "{}: {}({}: ${}) {{".format(BATCH_ALIAS.format(index), root_field, argument, variable))
+        lines.extend(selection)
+        lines.append(INDENT + "}")
+    lines.append("}")
+    return "\n".join(lines)
@@ -0,0 +1,152 @@
+"""
+This module defines the rate limiter shared by all the requests of a Fireflies client.
+Rate limiting: https://docs.fireflies.ai/fundamentals/limits
+"""
+
+import asyncio
+import email.utils
+import threading
+import time
+
+import singer
+
+from tap_fireflies import phase_metrics
+
+LOGGER = singer.get_logger()
+
+# Share of the configured rate lost on a rate limit error, and regained after each successful request
+RATE_DECREASE_FACTOR = 0.5
+RATE_INCREASE_STEP = 0.05
+# The rate never drops below this share of the configured rate
+MIN_RATE_FACTOR = 0.1
+
+
+def parse_retry_after(value, now=None):
+    """
+    Converts a retry hint to a number of seconds to wait. The hint can be a number of seconds,
+    an epoch timestamp in seconds or milliseconds, or an HTTP date.
+    """
+    if value is None or value == "":
+        return None
+
+    now = now or time.time()
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - now)
+        except (TypeError, ValueError):
+            return None
+
+    if number > 1e12:  # epoch milliseconds
+        return max(0.0, number / 1000.0 - now)
+    if number > 1e9:  # epoch seconds
+        return max(0.0, number - now)
+    return max(0.0, number)
+
+
+class RateLimiter:
+    """
+    Token bucket allowing `limit` requests per `period` seconds, with bursts of up to `burst` requests.
+
+    It is thread-safe and asyncio-safe: the lock is only held to reserve a token, the wait itself
+    happens outside of it with `time.sleep` (`acquire`) or `asyncio.sleep` (`acquire_async`).
+    When Fireflies rejects a request or hints to slow down, the rate is lowered and every
+    request, including the ones already waiting, is held until the hinted time.
+    """
+    def __init__(self, limit, period=60, burst=1):
+        self.max_rate = float(limit) / float(period)
+        self.min_rate = self.max_rate * MIN_RATE_FACTOR
+        self.period = float(period)
+        self.capacity = float(burst)
+        self.rate = self.max_rate
+        self.__tokens = self.capacity
+        self.__updated_at = time.monotonic()
+        self.__blocked_until = 0.0
+        self.__lock = threading.Lock()
+
+    def __refill(self, now):
+        # `updated_at` is in the future while the requests are blocked
+        if now > self.__updated_at:
+            self.__tokens = min(self.capacity, self.__tokens + (now - self.__updated_at) * self.rate)
+            self.__updated_at = now
+
+    def reserve(self):
+        """
+        Takes a token and returns the number of seconds to wait before sending the request.
+        The token count can go negative, so concurrent callers queue up one after the other.
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__refill(now)
+            self.__tokens -= 1
+            wait = max(0.0, self.__updated_at - now)
+            if self.__tokens < 0:
+                wait += -self.__tokens / self.rate
+            return max(wait, self.__blocked_until - now)
+
+    def get_blocked_wait(self):
+        with self.__lock:
+            return max(0.0, self.__blocked_until - time.monotonic())
+
+    def acquire(self):
+        wait = self.reserve()
+        waited = 0.0
+        while wait > 0:
+            time.sleep(wait)
+            waited += wait
+            # A rate limit error may have been received by another request while sleeping
+            wait = self.get_blocked_wait()
+        if waited:
+            phase_metrics.add(phase_metrics.RATE_LIMIT_WAIT, waited)
+
+    async def acquire_async(self):
+        wait = self.reserve()
+        waited = 0.0
+        while wait > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+            wait = self.get_blocked_wait()
+        if waited:
+            phase_metrics.add(phase_metrics.RATE_LIMIT_WAIT, waited)
+
+    def block(self, seconds):
+        """
+        Holds all the requests for the given number of seconds.
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__refill(now)
+            self.__blocked_until = max(self.__blocked_until, now + seconds)
+            # Tokens do not accumulate while blocked
+            self.__tokens = min(self.__tokens, 0.0)
+            self.__updated_at = max(now, self.__blocked_until)
+
+    def penalize(self, retry_after=None):
+        """
+        Called on a rate limit error: lowers the rate and holds all the requests until `retry_after`
+        seconds, or for a full rate limit period when there is no hint.
+        """
+        with self.__lock:
+            self.rate = max(self.min_rate, self.rate * RATE_DECREASE_FACTOR)
+        wait = self.period if retry_after is None else retry_after
+        LOGGER.warning("Rate limit reached, holding requests for %.1f seconds at %.3f requests/second", wait, self.rate)
+        self.block(wait)
+
+    def reward(self):
+        """
+        Called on a successful request: moves the rate back up towards the configured rate.
+        """
+        if self.rate < self.max_rate:
+            with self.__lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * RATE_INCREASE_STEP)
+
+    def update_from_headers(self, headers):
+        """
+        Holds the requests when the rate limit headers of a response say the quota is used up.
+        """
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+        if retry_after is None and headers.get("X-RateLimit-Remaining") == "0":
+            retry_after = parse_retry_after(headers.get("X-RateLimit-Reset"))
+        if retry_after:
+            self.block(retry_after)
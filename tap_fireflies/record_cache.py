@@ -0,0 +1,127 @@
+"""
+This module defines a local index of the content hash of the last emitted version of each record,
+used to skip the records which did not change since they were last written, eg. the transcripts
+at the bookmark boundary which are returned again by every sync.
+"""
+
+import sqlite3
+import threading
+import time
+
+import singer
+
+LOGGER = singer.get_logger()
+
+# Least recently seen records are evicted above this number of entries
+DEFAULT_MAX_ENTRIES = 1000000
+# Seconds to wait for the commit of another connection to the same file
+WRITE_LOCK_TIMEOUT = 60
+# Matches the records of the namespace, or all of them when the prefix is empty
+STREAM_PREFIX_FILTER = "substr(stream, 1, length(?1)) = ?1"
+
+
+class RecordHashCache:
+    """
+    SQLite index of (stream, record key) to the hash of the record last emitted.
+
+    The hashes of the emitted records are kept in memory per stream and written in one transaction by
+    `commit`, which each stream calls after writing its own STATE message, so a record is only remembered
+    once it is written and the state covering it is emitted, and the write lock of the file is only held
+    while committing. The index is bounded
+    to `max_entries`, the records not seen for the longest time are evicted first.
+
+    :param path: Path of the SQLite database, created if it does not exist
+    :param max_entries: Maximum number of records in the index
+    :param rebuild: Forget all the records, they are all emitted again and indexed from scratch
+    :param namespace: Prefix of the stream names, eg. the label of a workspace, so several indexes can share
+        the same file. The `max_entries` and `rebuild` then only apply to the records of the namespace.
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES, rebuild=False, namespace=None):
+        self.path = path
+        self.max_entries = int(max_entries)
+        self.stream_prefix = "{}/".format(namespace) if namespace else ""
+        # Used by the thread of the transcripts stream, which may not be the main thread with `stream_workers`.
+        # The indexes of concurrent workspaces have their own connection, waiting for each other's commits.
+        self.__connection = sqlite3.connect(path, timeout=WRITE_LOCK_TIMEOUT, check_same_thread=False)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__connection.execute("""
+            CREATE TABLE IF NOT EXISTS record_hashes (
+                stream TEXT NOT NULL,
+                record_key TEXT NOT NULL,
+                record_hash TEXT NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (stream, record_key)
+            )""")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS record_hashes_last_seen ON record_hashes (last_seen)")
+        if rebuild:
+            LOGGER.info("Rebuilding the record cache %s", path)
+            self.__connection.execute("DELETE FROM record_hashes WHERE " + STREAM_PREFIX_FILTER, (self.stream_prefix,))
+        self.__connection.commit()
+        self.skipped = 0
+        # Stream to record key to (hash, last seen) of the updates since the last commit of the stream
+        self.__pending = {}
+        # `commit` can be called by the thread writing a STATE message of another stream, see `BatchWriter`
+        self.__lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def is_changed(self, stream_name, record_key, record_hash):
+        """
+        Returns False when `record_hash` is the hash of the last emitted version of the record, which is then
+        marked as seen with the next `commit` of its stream, so the records seen by every sync are not evicted.
+        """
+        stream = self.stream_prefix + stream_name
+        with self.__lock:
+            pending = self.__pending.get(stream, {})
+            if record_key in pending:
+                previous_hash = pending[record_key][0]
+            else:
+                row = self.__connection.execute("SELECT record_hash FROM record_hashes WHERE stream = ? AND record_key = ?",
+                                                (stream, record_key)).fetchone()
+                previous_hash = row[0] if row is not None else None
+            if previous_hash == record_hash:
+                self.skipped += 1
+                self.__pending.setdefault(stream, {})[record_key] = (record_hash, time.time())
+                return False
+            return True
+
+    def update(self, stream_name, record_key, record_hash):
+        """
+        Remembers the hash of an emitted record, until the next `commit` of its stream.
+        """
+        with self.__lock:
+            self.__pending.setdefault(self.stream_prefix + stream_name, {})[record_key] = (record_hash, time.time())
+
+    def commit(self, stream_name=None):
+        """
+        Writes the pending updates of a stream, or of all the streams when `stream_name` is None.
+        """
+        with self.__lock:
+            if stream_name is None:
+                pending, self.__pending = self.__pending, {}
+            else:
+                stream = self.stream_prefix + stream_name
+                pending = {stream: self.__pending.pop(stream)} if stream in self.__pending else {}
+            self.__connection.executemany("INSERT OR REPLACE INTO record_hashes VALUES (?, ?, ?, ?)",
+                                          [(stream, record_key) + value
+                                           for stream, updates in pending.items()
+                                           for record_key, value in updates.items()])
+            excess = self.__connection.execute("SELECT COUNT(*) FROM record_hashes WHERE " + STREAM_PREFIX_FILTER,
+                                               (self.stream_prefix,)).fetchone()[0] - self.max_entries
+            if excess > 0:
+                self.__connection.execute("""
+                    DELETE FROM record_hashes WHERE rowid IN (
+                        SELECT rowid FROM record_hashes WHERE {} ORDER BY last_seen LIMIT ?
+                    )""".format(STREAM_PREFIX_FILTER), (self.stream_prefix, excess))
+            self.__connection.commit()
+
+    def close(self):
+        """
+        Closes the database, discarding the updates which were not committed.
+        """
+        self.__connection.close()
@@ -4,19 +4,77 @@ Credit: https://github.com/singer-io/tap-intercom/blob/master/tap_intercom/strea
 """
 
 import datetime
+import functools
 import hashlib
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
 from typing import Iterator
 
+import simplejson
 import singer
-from singer import Transformer, metrics, UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING
-from singer.transform import transform, unix_milliseconds_to_datetime
+from singer import Transformer, metadata, metrics, UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING
+from singer.transform import unix_milliseconds_to_datetime
 
-from tap_fireflies.client import (FirefliesClient, FirefliesError)
+from requests.exceptions import ChunkedEncodingError, ConnectionError, Timeout  # pylint: disable=redefined-builtin
+
+from tap_fireflies import phase_metrics
+from tap_fireflies.batching import AdaptiveBatchSize
+from tap_fireflies.client import (BATCH_SIZE, FIREFLIES_MAX_BATCH_SIZE, FirefliesBadResponseError, FirefliesClient,
+                                  FirefliesError, FirefliesObjectNotFoundError, FirefliesRequestTimeoutError,
+                                  Server5xxError, get_request_timeout)
+from tap_fireflies.dedupe import BoundaryDedupe
+from tap_fireflies.query import build_batch_query, build_query
+from tap_fireflies.record_cache import RecordHashCache
+from tap_fireflies.transform import compile_transformer
+from tap_fireflies.writer import RecordWriter
 
 LOGGER = singer.get_logger()
 
 MAX_PAGE_SIZE = 50
 FIREFLIES_MAX_NUM_OF_RECORDS = 50
+# The page size shrinks when a page takes more than this share of the `request_timeout`, or is larger than
+# PAGE_MAX_BYTES, and is halved when a page fails, see `Transcripts.get_page_size`.
+PAGE_TARGET_TIMEOUT_FRACTION = 0.25
+PAGE_MAX_BYTES = 16 * 1024 * 1024
+PAGE_SIZE_STEP = 5
+PAGE_MIN_SIZE = 1
+# Failures of a page which are retried with a smaller page, instead of retrying the same page
+PAGE_SIZE_ERRORS = (Timeout, ConnectionError, ChunkedEncodingError, FirefliesRequestTimeoutError, Server5xxError,
+                    FirefliesBadResponseError)
+# Number of times a streamed page is read when its connection fails in the middle of the body
+PAGE_READ_MAX_TRIES = 4
+# Key of the pagination checkpoint in the stream bookmark
+CHECKPOINT_KEY = "checkpoint"
+# Key of the ids of the parents at the bookmark of a child stream, whose child records were synced
+BOUNDARY_IDS_KEY = "boundary_ids"
+# Size of the date windows fetched concurrently when `backfill_workers` is more than 1
+BACKFILL_WINDOW_DAYS = 30
+# Number of pages of a window fetched ahead by a backfill worker, before they are synced
+BACKFILL_QUEUE_PAGES = 2
+# Seconds between the checks of a backfill worker waiting for its pages to be synced that the sync is not stopped
+BACKFILL_QUEUE_POLL_SECONDS = 0.1
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+ONE_MILLISECOND = datetime.timedelta(milliseconds=1)
+# Key of the transcripts whose summary was still processing in the stream bookmark
+PENDING_SUMMARIES_KEY = "pending_summaries"
+# Transcripts are re-fetched until their summary is done, or for this many days after their `date`
+SUMMARY_REFETCH_MAX_AGE_DAYS = 7
+# Number of pending transcripts re-fetched between two STATE messages
+SUMMARY_REFETCH_BATCH_SIZE = 50
+SUMMARY_PENDING_STATUSES = ("processing",)
+# Keys of the bookmark of the full table streams writing only their changed records, see `FullTableStream.sync`
+RECORD_HASHES_KEY = "record_hashes"
+VERSION_KEY = "version"
+FULL_SYNC_KEY = "full_sync_at"
+# Hex digits of the record hashes kept in the state
+RECORD_HASH_LENGTH = 16
+# All the records are written again with a new table version after this many hours
+FULL_REFRESH_HOURS = 24
 
 class BaseStream:
     """
@@ -36,11 +94,25 @@ class BaseStream:
     params = {}
     data_key = 'data'
     schema_key = None
+    # Name of the parent stream, for child streams that are synced through their parent
+    parent = None
+    # Name of the child stream synced through `sync_substreams`
+    child = None
 
-    def __init__(self, client: FirefliesClient, catalog, selected_streams):
+    # pylint: disable=too-many-arguments
+    def __init__(self, client: FirefliesClient, catalog, selected_streams, config=None, writer: RecordWriter = None,
+                 record_cache: RecordHashCache = None):
         self.client = client
         self.catalog = catalog
         self.selected_streams = selected_streams
+        self.config = config or {}
+        self.writer = writer or RecordWriter()
+        # Skips the records emitted unchanged by a previous sync, when `record_cache_path` is set
+        self.record_cache = record_cache
+        # Set by `get_records` when a page of records is fetched
+        self.time_extracted = None
+        self._child_stream = None
+        self._record_transformer = None
 
     def get_records(self, bookmark_datetime: datetime = None, stream_metadata=None) -> list:
         """
@@ -57,6 +129,40 @@ class BaseStream:
         raise NotImplementedError("Child classes of BaseStream require "
                                   "`get_records` implementation")
 
+    def transform_record(self, record, stream_schema, stream_metadata):
+        """
+        Transforms a record like `singer.transform`, with the schema and the metadata
+        of the stream compiled once on the first call.
+        """
+        if self._record_transformer is None:
+            self._record_transformer = compile_transformer(stream_schema,
+                                                           stream_metadata,
+                                                           integer_datetime_fmt=UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING)
+        start = time.perf_counter()
+        transformed_record = self._record_transformer(record)
+        phase_metrics.add(phase_metrics.TRANSFORM, time.perf_counter() - start)
+        return transformed_record
+
+    def get_stream_schema(self) -> dict:
+        """
+        Returns the schema of the stream from the catalog, used to build the GraphQL query.
+        """
+        return self.catalog.get_stream(self.tap_stream_id).schema.to_dict()
+
+    def build_query(self, operation_name, stream_metadata=None, variable_definitions=None):
+        """
+        Builds the GraphQL query of the stream, requesting only the selected fields.
+        If the stream is only synced for its child, only the automatic fields are requested.
+        """
+        arguments = list(variable_definitions) if variable_definitions else None
+        return build_query(operation_name,
+                           self.schema_key,
+                           self.get_stream_schema(),
+                           stream_metadata,
+                           variable_definitions=variable_definitions,
+                           arguments=arguments,
+                           only_automatic=self.tap_stream_id not in self.selected_streams)
+
     def generate_record_hash(self, original_record, fields_to_hash):
         """
             Function to generate the hash of selected fields to use it as a Primary Key
@@ -73,22 +179,93 @@ class BaseStream:
         original_record['_sdc_record_hash'] = hashed_string
         return original_record
 
+    def write_changed_record(self, record):
+        """
+        Writes a transformed record and returns True, unless it was emitted with the same content before,
+        according to the record cache. Its hash is remembered once it is written, and committed by the
+        next STATE message of the stream. The hash covers the whole transformed record, so selecting
+        more fields emits the records again.
+        """
+        if self.record_cache is None:
+            self.writer.write_record(self.tap_stream_id, record, time_extracted=self.time_extracted)
+            return True
+
+        record_key = simplejson.dumps([record.get(key) for key in self.key_properties], default=str)
+        record_hash = self.get_content_hash(record)
+        if not self.record_cache.is_changed(self.tap_stream_id, record_key, record_hash):
+            return False
+        self.writer.write_record(self.tap_stream_id, record, time_extracted=self.time_extracted)
+        self.record_cache.update(self.tap_stream_id, record_key, record_hash)
+        return True
+
+    @staticmethod
+    def get_content_hash(record):
+        return hashlib.sha256(
+            simplejson.dumps(record, sort_keys=True, default=str, use_decimal=True).encode('utf-8')).hexdigest()
+
     @staticmethod
     def epoch_milliseconds_to_dt_str(timestamp: float) -> str:
         # Convert epoch milliseconds to datetime object in UTC format
         new_dttm = unix_milliseconds_to_datetime(timestamp)
         return new_dttm
 
+    @staticmethod
+    def epoch_milliseconds_to_datetime(timestamp: float) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(float(timestamp) / 1000.0, datetime.timezone.utc)
+
     @staticmethod
     def dt_to_epoch_seconds(dt_object: datetime) -> float:
         return datetime.datetime.timestamp(dt_object)
 
-    def sync_substream(self, parent_id, stream_schema, stream_metadata, parent_replication_key, state):
+    @staticmethod
+    def dt_to_epoch_milliseconds(dt_object: datetime.datetime) -> int:
+        """
+        Returns the first epoch millisecond at or after `dt_object`, so that comparing integer
+        epoch milliseconds to it gives the same result as comparing their datetimes.
+        """
+        return -((EPOCH - dt_object) // ONE_MILLISECOND)
+
+    @staticmethod
+    def max_datetime_with_epoch_milliseconds(dt_object: datetime.datetime, timestamp_ms) -> datetime.datetime:
+        """
+        Returns the latest of a datetime and an epoch milliseconds timestamp, which can be None.
+        """
+        if timestamp_ms is None:
+            return dt_object
+        return max(dt_object, EPOCH + datetime.timedelta(milliseconds=timestamp_ms))
+
+    def write_state(self, state):
+        """
+        Writes a STATE message, the updates of the record cache by the stream are committed once it is written.
+        """
+        on_written = None
+        if self.record_cache is not None:
+            on_written = functools.partial(self.record_cache.commit, self.tap_stream_id)
+        self.writer.write_state(state, on_written=on_written)
+
+    def get_child_stream(self):
         """
-            Sync sub-stream data based on parent id and update the state to parent's replication value.
-            For Fireflies, we do not need to sync sub-stream. But we do need that for Aircall. 
+        Returns the child stream object, created once per parent stream object.
         """
-        raise NotImplementedError("In case that you need to sync substream, please refer to: https://github.com/singer-io/tap-intercom/blob/2d5e983bc437769ffaefb2dbd95f1ab596b47b2d/tap_intercom/streams.py#L91")
+        if self._child_stream is None:
+            self._child_stream = STREAMS[self.child](self.client, self.catalog, self.selected_streams, self.config, self.writer,
+                                                     self.record_cache)
+        return self._child_stream
+
+    # pylint: disable=too-many-arguments
+    def sync_substreams(self, parents, stream_schema, stream_metadata, state, counter=None):
+        """
+            Sync sub-stream data of a list of (parent id, parent replication value), fetched in batches by the
+            child stream. Child records carry the parent's replication value, which the parent later writes
+            as the bookmark of the child stream.
+        """
+        child_stream = self.get_child_stream()
+        for child_record in child_stream.get_records(parents=parents, stream_metadata=stream_metadata):
+            transformed_record = child_stream.transform_record(child_record, stream_schema, stream_metadata)
+            self.writer.write_record(child_stream.tap_stream_id, transformed_record, time_extracted=child_stream.time_extracted)
+            if counter:
+                counter.increment()
+        return state
 
 class IncrementalStream(BaseStream):
     """
@@ -114,20 +291,52 @@ class IncrementalStream(BaseStream):
     def skip_records(self, record):
         return False
 
-    def write_bookmark(self, state, bookmark_value):
+    def track_record(self, record):
+        """
+        Called with each record of the stream synced by `sync`, before it is transformed.
+        """
+
+    def get_bookmark_datetime(self, state, stream_name, config):
+        bookmark = singer.get_bookmark(state, stream_name, self.replication_key, config['start_date'])
+        return singer.utils.strptime_to_utc(bookmark)
+
+    def write_bookmark(self, state, bookmark_value, stream_name=None):
         return singer.write_bookmark(state,
-                                     self.tap_stream_id,
+                                     stream_name or self.tap_stream_id,
                                      self.replication_key,
                                      bookmark_value)
 
     def write_intermediate_bookmark(self, state, last_processed, bookmark_value):
+        """
+        Writes a checkpoint and the state after every page of records. The replication key bookmark
+        only moves once the whole sync is done, the checkpoint lets `get_records` resume a crashed sync.
+
+        :param last_processed: The checkpoint of `get_records`
+        :param bookmark_value: Dict of stream name to its max replication value synced so far
+        """
         if self.to_write_intermediate_bookmark:
-            # Write bookmark and state after every page of records
+            checkpoint = dict(last_processed)
+            checkpoint["max_dates"] = {stream_name: singer.utils.strftime(value)
+                                       for stream_name, value in bookmark_value.items()}
             state = singer.write_bookmark(state,
                                           self.tap_stream_id,
-                                          self.replication_key,
-                                          singer.utils.strftime(bookmark_value))
-            singer.write_state(state)
+                                          CHECKPOINT_KEY,
+                                          checkpoint)
+            self.write_state(state)
+
+    def get_checkpoint(self, state, sync_start_date, stream_names):
+        """
+        Returns the checkpoint of a previous sync that did not finish,
+        if it was started from the same date for the same streams.
+        """
+        self.set_last_processed(state)
+        if self.last_processed and (
+                self.last_processed.get("from_date") != singer.utils.strftime(sync_start_date)
+                or set(self.last_processed.get("max_dates", {})) != set(stream_names)):
+            LOGGER.info("Stream: {}, discarding checkpoint of a sync started from {}".format(
+                self.tap_stream_id, self.last_processed.get("from_date")))
+            self.last_processed = None
+        return self.last_processed
 
     # Disabled `unused-argument` as it causing pylint error.
     # Method which call this `sync` method is passing unused argument.So, removing argument would not work.
@@ -149,52 +358,121 @@ class IncrementalStream(BaseStream):
         """
 
         # Get current stream bookmark (Credit: it's modified from tap-intercom.)
-        current_bookmark = singer.get_bookmark(state, self.tap_stream_id, self.replication_key, config['start_date'])
-        current_bookmark_utc = singer.utils.strptime_to_utc(current_bookmark)
-        sync_start_date = current_bookmark_utc
-        self.set_last_processed(state)
+        current_bookmark_utc = self.get_bookmark_datetime(state, self.tap_stream_id, config)
+        is_parent_selected = self.tap_stream_id in self.selected_streams
+        is_child_selected = self.child in self.selected_streams
+
+        # The parent is synced from the older bookmark of itself and its selected child
+        if is_child_selected:
+            child_bookmark_utc = self.get_bookmark_datetime(state, self.child, config)
+            child_catalog_entry = self.catalog.get_stream(self.child)
+            child_schema = child_catalog_entry.schema.to_dict()
+            child_metadata = metadata.to_map(child_catalog_entry.metadata)
+            sync_start_date = min(current_bookmark_utc, child_bookmark_utc) if is_parent_selected else child_bookmark_utc
+        else:
+            sync_start_date = current_bookmark_utc
+        synced_stream_names = [stream_name for stream_name, is_selected in
+                               [(self.tap_stream_id, is_parent_selected), (self.child, is_child_selected)] if is_selected]
+        checkpoint = self.get_checkpoint(state, sync_start_date, synced_stream_names)
         self.set_last_sync_started_at(state)
 
         LOGGER.info("Stream: {}, initial max_bookmark_value: {}".format(self.tap_stream_id, sync_start_date))
-        max_datetime = sync_start_date
+        max_datetime = current_bookmark_utc
+        child_max_datetime = child_bookmark_utc if is_child_selected else None
+        # The records are filtered and their max tracked on their epoch milliseconds `date`, it is only
+        # converted to a datetime when a bookmark is written
+        current_bookmark_ms = self.dt_to_epoch_milliseconds(current_bookmark_utc)
+        child_bookmark_ms = self.dt_to_epoch_milliseconds(child_bookmark_utc) if is_child_selected else None
+        max_record_ms = None
+        child_max_record_ms = None
+        # The parents at the child bookmark are returned again by every sync, their child records are only synced
+        # again when the parent changed, see `write_changed_record`
+        child_boundary_ids = set()
+        # (id, date) of the parents of the current page whose child records are fetched once the page is read
+        child_parents = []
+        if is_child_selected:
+            child_boundary_ids = set(singer.get_bookmark(state, self.child, BOUNDARY_IDS_KEY) or [])
+        synced_boundary_ms = child_bookmark_ms
+        synced_boundary_ids = set(child_boundary_ids)
+        if checkpoint:
+            # Records newer than the checkpoint were synced by the previous run
+            max_dates = checkpoint["max_dates"]
+            LOGGER.info("Stream: {}, resuming from checkpoint toDate: {}".format(self.tap_stream_id, checkpoint.get("to_date")))
+            if is_parent_selected:
+                max_datetime = max(max_datetime, singer.utils.strptime_to_utc(max_dates[self.tap_stream_id]))
+            if is_child_selected:
+                child_max_datetime = max(child_max_datetime, singer.utils.strptime_to_utc(max_dates[self.child]))
         # We are not using singer's record counter as the counter reset after 60 seconds
         record_counter = 0
         all_counter = 0
 
-        with metrics.record_counter(self.tap_stream_id) as counter:
+        child_counter_context = metrics.record_counter(self.child) if is_child_selected else nullcontext()
+        with metrics.record_counter(self.tap_stream_id) as counter, child_counter_context as child_counter:
             for record in self.get_records(sync_start_date, stream_metadata=stream_metadata):
                 all_counter += 1
 
-                record_datetime = singer.utils.strptime_to_utc(
-                    self.epoch_milliseconds_to_dt_str(
-                        record[self.replication_key])
-                )
-
-                if record_datetime >= current_bookmark_utc:
-                    record_counter += 1
-                    transformed_record = transform(record,
-                                                   stream_schema,
-                                                   integer_datetime_fmt=UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING,
-                                                   metadata=stream_metadata)
-                    # Write record if a parent is selected
-                    singer.write_record(self.tap_stream_id, transformed_record, time_extracted=singer.utils.now())
-                    counter.increment()
-                    max_datetime = max(record_datetime, max_datetime)
-
-                if record_counter == MAX_PAGE_SIZE:
-                    # For fireflies, we haven't enabled intermediate bookmark.
-                    self.write_intermediate_bookmark(state, record.get("id"), max_datetime)
-                    # Reset counter
-                    record_counter = 0
+                # `get_records` moves `last_processed` once all records of a page are yielded
+                if self.last_processed is not checkpoint:
+                    # The child records of the page are written before its checkpoint
+                    if child_parents:
+                        self.sync_substreams(child_parents, child_schema, child_metadata, state, counter=child_counter)
+                        child_parents = []
+                    checkpoint = self.last_processed
+                    max_dates = {self.tap_stream_id: self.max_datetime_with_epoch_milliseconds(max_datetime, max_record_ms)}
+                    if is_child_selected:
+                        max_dates[self.child] = self.max_datetime_with_epoch_milliseconds(child_max_datetime,
+                                                                                          child_max_record_ms)
+                    self.write_intermediate_bookmark(state,
+                                                     checkpoint,
+                                                     {stream_name: max_dates[stream_name] for stream_name in synced_stream_names})
+
+                # Transform may drop the unselected fields of the record, the child only needs its id and date
+                record_id = record.get("id")
+                record_ms = record[self.replication_key]
+                is_parent_changed = True
+
+                # Write record if a parent is selected
+                if is_parent_selected and record_ms >= current_bookmark_ms:
+                    self.track_record(record)
+                    transformed_record = self.transform_record(record, stream_schema, stream_metadata)
+                    is_parent_changed = self.write_changed_record(transformed_record)
+                    if is_parent_changed:
+                        record_counter += 1
+                        counter.increment()
+                    if max_record_ms is None or record_ms > max_record_ms:
+                        max_record_ms = record_ms
+
+                if is_child_selected and record_ms >= child_bookmark_ms:
+                    if is_parent_changed or record_ms != child_bookmark_ms or record_id not in child_boundary_ids:
+                        child_parents.append((record_id, record_ms))
+                    if record_ms > synced_boundary_ms:
+                        synced_boundary_ms = record_ms
+                        synced_boundary_ids = set()
+                    if record_ms == synced_boundary_ms:
+                        synced_boundary_ids.add(record_id)
+                    if child_max_record_ms is None or record_ms > child_max_record_ms:
+                        child_max_record_ms = record_ms
 
                 if all_counter % 1000 == 0:
                     LOGGER.info("Still Syncing: {}, total_records written so far: {}. total seen {}".format(self.tap_stream_id, record_counter, all_counter))
 
-            bookmark_date = singer.utils.strftime(max_datetime)
+            if child_parents:
+                self.sync_substreams(child_parents, child_schema, child_metadata, state, counter=child_counter)
             LOGGER.info("FINISHED Syncing: {}, total_records: {}.".format(self.tap_stream_id, record_counter))
 
         LOGGER.info("Stream: {}, writing final bookmark".format(self.tap_stream_id))
-        self.write_bookmark(state, bookmark_date)
+        if is_parent_selected:
+            max_datetime = self.max_datetime_with_epoch_milliseconds(max_datetime, max_record_ms)
+            self.write_bookmark(state, singer.utils.strftime(max_datetime))
+        if is_child_selected:
+            child_max_datetime = self.max_datetime_with_epoch_milliseconds(child_max_datetime, child_max_record_ms)
+            self.write_bookmark(state, singer.utils.strftime(child_max_datetime), stream_name=self.child)
+            # Unknown when the bookmark comes from the checkpoint of a previous run
+            if self.dt_to_epoch_milliseconds(child_max_datetime) != synced_boundary_ms:
+                synced_boundary_ids = set()
+            singer.write_bookmark(state, self.child, BOUNDARY_IDS_KEY, sorted(synced_boundary_ids))
+        if self.to_write_intermediate_bookmark:
+            singer.clear_bookmark(state, self.tap_stream_id, CHECKPOINT_KEY)
         return state
 
 
@@ -207,8 +485,17 @@ class FullTableStream(BaseStream):
     :param client: The API client used extract records from the external source
     """
     replication_method = 'FULL_TABLE'
-    # Boolean flag to do sync with activate version for Company and Contact Attributes streams
+    # Boolean flag to write the records with a table version, activated by ACTIVATE_VERSION messages
     sync_with_version = False
+    # Boolean flag to only write the new and changed records, from the hashes of the records kept in the state
+    changed_records_only = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.sync_with_version and not self.writer.writes_versions:
+            LOGGER.warning("Stream: %s, the table versions are not written with several workspaces or batch files, "
+                           "the deleted records are not removed from the target", self.tap_stream_id)
+            self.sync_with_version = False
 
     # Disabled `unused-argument` as it causing pylint error.
     # Method which call this `sync` method is passing unused argument. So, removing argument would not work.
@@ -222,25 +509,91 @@ class FullTableStream(BaseStream):
         """
         The sync logic for an full table stream.
 
+        With `changed_records_only`, only the records whose hash differs from the one in the state are written,
+        except on a full sync, where all of them are written. A full sync happens on the first sync, every
+        `full_refresh_hours` and, with `sync_with_version`, when records were deleted. With `sync_with_version`,
+        a full sync writes the records with a new table version followed by an ACTIVATE_VERSION message, so the
+        target deletes the records which are gone, and the changed records of the other syncs are written with
+        the version of the last full sync. The versions are not written with several workspaces or batch files,
+        see `WorkspaceWriter` and `BatchWriter`.
+
         :param state: A dictionary representing singer state
         :param stream_schema: A dictionary containing the stream schema
         :param stream_metadata: A dictionnary containing stream metadata
         :param config: A dictionary containing tap config data
         :return: State data in the form of a dictionary
         """
+        records = (self.transform_record(record, stream_schema, stream_metadata)
+                   for record in self.get_records(stream_metadata=stream_metadata))
+        version = singer.get_bookmark(state, self.tap_stream_id, VERSION_KEY)
+        previous_hashes = singer.get_bookmark(state, self.tap_stream_id, RECORD_HASHES_KEY)
+        record_hashes = None
+
+        if self.changed_records_only:
+            # The deleted records are only known once all the records are read
+            records = list(records)
+            record_hashes = {self.get_record_state_key(record): self.get_content_hash(record)[:RECORD_HASH_LENGTH]
+                             for record in records}
+        is_full_sync = self.is_full_sync(state, config, version, previous_hashes, record_hashes)
+
+        if is_full_sync and self.sync_with_version:
+            # The first version is activated right away, the target then shows the records while they are written
+            is_first_version = version is None
+            version = int(time.time() * 1000)
+            if is_first_version:
+                self.writer.write_version(self.tap_stream_id, version)
+
+        # `counter.value` is reset every time the counter metric is logged
+        record_counter = 0
         with metrics.record_counter(self.tap_stream_id) as counter:
-            for record in self.get_records():
-                transformed_record = transform(record,
-                                                stream_schema,
-                                                integer_datetime_fmt=UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING,
-                                                metadata=stream_metadata)
-                singer.write_record(self.tap_stream_id, transformed_record, time_extracted=singer.utils.now())
+            for record in records:
+                if not is_full_sync:
+                    record_key = self.get_record_state_key(record)
+                    if previous_hashes.get(record_key) == record_hashes[record_key]:
+                        continue
+                self.writer.write_record(self.tap_stream_id,
+                                         record,
+                                         time_extracted=self.time_extracted,
+                                         version=version if self.sync_with_version else None)
                 counter.increment()
+                record_counter += 1
 
-            LOGGER.info("FINISHED Syncing: {}, total_records: {}.".format(self.tap_stream_id, counter.value))
+            LOGGER.info("FINISHED Syncing: {}, total_records: {}.".format(self.tap_stream_id, record_counter))
 
+        if is_full_sync and self.sync_with_version:
+            self.writer.write_version(self.tap_stream_id, version)
+            state = singer.write_bookmark(state, self.tap_stream_id, VERSION_KEY, version)
+        if is_full_sync and self.changed_records_only:
+            state = singer.write_bookmark(state, self.tap_stream_id, FULL_SYNC_KEY, singer.utils.strftime(singer.utils.now()))
+        if record_hashes is not None:
+            state = singer.write_bookmark(state, self.tap_stream_id, RECORD_HASHES_KEY, record_hashes)
         return state
 
+    def get_record_state_key(self, record):
+        return "/".join(str(record.get(key)) for key in self.key_properties)
+
+    # pylint: disable=too-many-arguments
+    def is_full_sync(self, state, config, version, previous_hashes, record_hashes):
+        """
+        Returns True when all the records must be written, see `sync`.
+        """
+        if not self.changed_records_only or previous_hashes is None or (self.sync_with_version and version is None):
+            return True
+
+        deleted = len(set(previous_hashes) - set(record_hashes))
+        # Without a new table version, writing all the records again would not delete them from the target
+        if deleted and self.sync_with_version:
+            LOGGER.info("Stream: %s, %s records were deleted, writing all the records", self.tap_stream_id, deleted)
+            return True
+
+        full_sync_at = singer.get_bookmark(state, self.tap_stream_id, FULL_SYNC_KEY)
+        refresh_hours = float(config.get("full_refresh_hours") or FULL_REFRESH_HOURS)
+        if full_sync_at is None or \
+                singer.utils.now() - singer.utils.strptime_to_utc(full_sync_at) >= datetime.timedelta(hours=refresh_hours):
+            LOGGER.info("Stream: %s, last full sync at %s, writing all the records", self.tap_stream_id, full_sync_at)
+            return True
+        return False
+
 
 class Users(FullTableStream):
     """
@@ -248,33 +601,19 @@ class Users(FullTableStream):
     """
     tap_stream_id = "users"
     key_properties = ["user_id"]
+    sync_with_version = True
+    changed_records_only = True
     endpoint = "users"
     schema_key = "users"
 
-    def get_records(self, bookmark_datetime=None) -> Iterator[list]:
-        graphql_query = """
-            query Users {
-                users {
-                    user_id
-                    email
-                    name
-                    num_transcripts
-                    recent_meeting
-                    minutes_consumed
-                    is_admin
-                    integrations
-                    user_groups {
-                        name
-                        handle
-                    }
-                }
-            }
-        """
+    def get_records(self, bookmark_datetime=None, stream_metadata=None) -> Iterator[list]:
+        graphql_query = self.build_query("Users", stream_metadata)
         input_query = {
             "query": graphql_query
         }
 
         response = self.client.post(path=None, endpoint=self.endpoint, json=input_query)
+        self.time_extracted = singer.utils.now()
         if not response.get(self.data_key):
             LOGGER.critical("response is empty for {} stream".format(self.tap_stream_id))
             raise FirefliesError
@@ -291,147 +630,484 @@ class Transcripts(IncrementalStream):
     schema_key = "transcripts"
     replication_key = "date"
     valid_replication_keys = ["date"]
+    child = "transcript_sentences"
+    to_write_intermediate_bookmark = True
 
-    def get_records(self, bookmark_datetime: datetime.datetime = None, stream_metadata=None) -> Iterator[list]:
-        paging = True
-        LOGGER.info("Syncing: {}".format(self.tap_stream_id))
-        visited_id = set()
-
-        graphql_query = """
-            query Transcripts(
-            $fromDate: DateTime
-            $toDate: DateTime
-            $limit: Int
-            $skip: Int
-            ) {
-            transcripts(
-                fromDate: $fromDate
-                toDate: $toDate
-                limit: $limit
-                skip: $skip
-            ) {
-                id
-                analytics {
-                sentiments {
-                    negative_pct
-                    neutral_pct
-                    positive_pct
-                }
-                categories {
-                    questions
-                    date_times
-                    metrics
-                    tasks
-                }
-                speakers {
-                    speaker_id
-                    name
-                    duration
-                    word_count
-                    longest_monologue
-                    monologues_count
-                    filler_words
-                    questions
-                    duration_pct
-                    words_per_minute
-                }
-                }
-                sentences {
-                index
-                speaker_id
-                text
-                start_time
-                end_time
-                }
-                title
-                speakers {
-                id
-                name
-                }
-                organizer_email
-                meeting_link
-                meeting_info {
-                fred_joined
-                silent_meeting
-                summary_status
-                }
-                participants
-                date
-                duration
-                meeting_attendees {
-                displayName
-                email
-                phoneNumber
-                name
-                location
-                }
-                summary {
-                keywords
-                action_items
-                outline
-                shorthand_bullet
-                overview
-                bullet_gist
-                gist
-                short_summary
-                short_overview
-                meeting_type
-                }
-            }
-            } 
+    pending_summaries = None
+    _page_size = None
+
+    def set_last_processed(self, state):
+        self.last_processed = singer.get_bookmark(state, self.tap_stream_id, CHECKPOINT_KEY)
+
+    # pylint: disable=too-many-arguments
+    def sync(self, state, stream_schema, stream_metadata, config, transformer):
+        """
+        Re-fetches the transcripts whose summary was still processing in the previous syncs, then syncs the
+        new transcripts. The pending transcripts are kept in the bookmark, so they are in every STATE message.
+        """
+        if self.tap_stream_id in self.selected_streams:
+            self.pending_summaries = singer.get_bookmark(state, self.tap_stream_id, PENDING_SUMMARIES_KEY) or {}
+            singer.write_bookmark(state, self.tap_stream_id, PENDING_SUMMARIES_KEY, self.pending_summaries)
+            self.sync_pending_summaries(state, stream_schema, stream_metadata)
+        return super().sync(state, stream_schema, stream_metadata, config, transformer)
+
+    def track_record(self, record):
+        """
+        Queues the transcripts whose summary is still processing, and removes the ones which are done.
+        The transcripts without `meeting_info.summary_status`, eg. when it is not selected, are not queued.
         """
+        if self.pending_summaries is None:
+            return
+        summary_status = (record.get("meeting_info") or {}).get("summary_status")
+        if summary_status in SUMMARY_PENDING_STATUSES:
+            self.pending_summaries[record["id"]] = record.get(self.replication_key)
+        else:
+            self.pending_summaries.pop(record.get("id"), None)
+
+    def get_transcripts_by_ids(self, transcript_ids, stream_metadata=None) -> Iterator[tuple]:
+        """
+        Yields (id, transcript, error) tuples for the given ids, looked up with aliased `transcript` queries.
+        The transcript is None when its lookup failed with `error`.
+        """
+        schema = self.get_stream_schema()
+
+        def build_transcripts_query(size):
+            return build_batch_query("Transcripts", "transcript", schema, stream_metadata, size=size)
+
+        for transcript_id, record, error in self.client.iter_batches(transcript_ids,
+                                                                     build_transcripts_query,
+                                                                     batch_size=self.config.get("lookup_batch_size"),
+                                                                     endpoint="transcript"):
+            self.time_extracted = singer.utils.now()
+            yield transcript_id, record, error
+
+    def sync_pending_summaries(self, state, stream_schema, stream_metadata):
+        """
+        Re-fetches the queued transcripts in batches and emits them again, writing the state after each batch.
+        Transcripts older than `summary_refetch_max_age_days` are dropped from the queue without being fetched.
+        """
+        max_age_days = float(self.config.get("summary_refetch_max_age_days") or SUMMARY_REFETCH_MAX_AGE_DAYS)
+        min_date_ms = (datetime.datetime.now(datetime.timezone.utc)
+                       - datetime.timedelta(days=max_age_days)).timestamp() * 1000
+        for transcript_id, transcript_date in list(self.pending_summaries.items()):
+            if transcript_date is None or transcript_date < min_date_ms:
+                LOGGER.info("Stream: %s, summary of %s still not done, no longer re-fetched", self.tap_stream_id, transcript_id)
+                del self.pending_summaries[transcript_id]
+
+        if not self.pending_summaries:
+            return
+
+        LOGGER.info("Stream: %s, re-fetching %s transcripts whose summary was processing",
+                    self.tap_stream_id, len(self.pending_summaries))
+        batch_size = int(self.config.get("summary_refetch_batch_size") or SUMMARY_REFETCH_BATCH_SIZE)
+        transcript_ids = list(self.pending_summaries)
+        with metrics.record_counter(self.tap_stream_id) as counter:
+            for batch_start in range(0, len(transcript_ids), batch_size):
+                for transcript_id, record, error in self.get_transcripts_by_ids(
+                        transcript_ids[batch_start:batch_start + batch_size], stream_metadata):
+                    if isinstance(error, FirefliesObjectNotFoundError) or (record is None and error is None):
+                        del self.pending_summaries[transcript_id]
+                        continue
+                    if error is not None:
+                        LOGGER.warning("Stream: %s, could not re-fetch %s: %s", self.tap_stream_id, transcript_id, error)
+                        continue
+
+                    self.track_record(record)
+                    transformed_record = self.transform_record(record, stream_schema, stream_metadata)
+                    if self.write_changed_record(transformed_record):
+                        counter.increment()
+
+                self.write_state(state)
+
+    def get_page_size(self) -> AdaptiveBatchSize:
+        """
+        Returns the size of the pages, shared by the backfill workers. It starts at `page_size` and adapts
+        to the duration and the size of the pages, within the maximum of the API. With a response cache,
+        it does not adapt, so the `limit` of the requests, which is part of their cache key, is always the same.
+        """
+        if self._page_size is None:
+            request_timeout = get_request_timeout(self.config.get("request_timeout"))
+            self._page_size = AdaptiveBatchSize(self.config.get("page_size") or FIREFLIES_MAX_NUM_OF_RECORDS,
+                                                minimum=PAGE_MIN_SIZE,
+                                                maximum=FIREFLIES_MAX_NUM_OF_RECORDS,
+                                                max_bytes=self.config.get("page_max_bytes") or PAGE_MAX_BYTES,
+                                                max_seconds=request_timeout * PAGE_TARGET_TIMEOUT_FRACTION,
+                                                step=PAGE_SIZE_STEP)
+            if self.client.response_cache is not None:
+                size = self._page_size.size
+                self._page_size = AdaptiveBatchSize(size, minimum=size, maximum=size)
+        return self._page_size
+
+    def get_page_records(self, graphql_input, retry=True) -> tuple:
+        """
+        Returns the transcripts of one page and the time they were extracted. With `stream_json`, they are an
+        iterator parsing them one at a time while the response is read, instead of decoding the whole page at once,
+        so only one transcript of the page is in memory. The responses of a response cache are read whole to be
+        stored, they are decoded at once.
+        Without `retry`, failed requests are not retried, see `FirefliesClient.fetch`.
+        """
+        page_size = self.get_page_size()
+        # The pages can be requested by the backfill workers, `time_extracted` is only set by `get_records`
+        time_extracted = singer.utils.now()
+        start = time.perf_counter()
+        if self.config.get("stream_json") and self.client.response_cache is None:
+            items = self.client.stream_items("POST",
+                                             "{}.{}".format(self.data_key, self.schema_key),
+                                             path=None,
+                                             retry=retry,
+                                             endpoint=self.endpoint,
+                                             json=graphql_input)
+            # The body is read while the transcripts are synced, the page size adapts to the time of its headers
+            return self.iter_streamed_page(items, page_size, time.perf_counter() - start), time_extracted
+
+        if retry:
+            response = self.client.post(path=None, endpoint=self.endpoint, json=graphql_input)
+            page_size.update(seconds=time.perf_counter() - start)
+        else:
+            response, response_bytes = self.client.fetch("POST", path=None, endpoint=self.endpoint, json=graphql_input)
+            page_size.update(response_bytes, time.perf_counter() - start)
+        if not response.get(self.data_key):
+            LOGGER.critical("response is empty for {} stream".format(self.tap_stream_id))
+            raise FirefliesError
+
+        return response.get(self.data_key).get(self.schema_key, []), time_extracted
+
+    def request_page(self, graphql_input) -> tuple:
+        """
+        Requests a page of `graphql_input["variables"]["limit"]` transcripts, see `get_page_records`, halving
+        the page size and requesting a smaller page when a page fails. Pages of the minimum size are retried as usual.
+        """
+        page_size = self.get_page_size()
+        while True:
+            graphql_input["variables"]["limit"] = page_size.size
+            if page_size.size <= page_size.minimum:
+                return self.get_page_records(graphql_input)
+            try:
+                return self.get_page_records(graphql_input, retry=False)
+            except PAGE_SIZE_ERRORS as err:
+                page_size.decrease()
+                LOGGER.warning("Stream: %s, page of %s transcripts failed (%s), retrying with %s transcripts",
+                               self.tap_stream_id, graphql_input["variables"]["limit"], err, page_size.size)
+
+    @staticmethod
+    def iter_streamed_page(items, page_size, seconds) -> Iterator[dict]:
+        """
+        Yields the transcripts of a streamed page, then adapts the page size to the size of the response.
+        """
+        response_bytes = yield from items
+        page_size.update(response_bytes, seconds)
+
+    def iter_page_with_retries(self, graphql_input, records, visited_ids, page_stats) -> Iterator[dict]:
+        """
+        Yields the not yet visited transcripts of a page, see `iter_page`. When the connection fails in the
+        middle of a streamed page, the same page is requested again and the transcripts already yielded are
+        skipped by `visited_ids`, which only moves once the whole page is read.
+        """
+        for attempt in range(1, PAGE_READ_MAX_TRIES + 1):
+            try:
+                yield from self.iter_page(records, visited_ids, page_stats)
+                return
+            except FirefliesBadResponseError as err:
+                if attempt == PAGE_READ_MAX_TRIES:
+                    raise
+                LOGGER.warning("Stream: %s, page failed after %s transcripts (%s), requesting it again",
+                               self.tap_stream_id, page_stats["num_of_records"], err)
+            # The next pages are smaller, this one is requested with the same `limit` to get the same transcripts
+            self.get_page_size().decrease()
+            # The page is counted again, the new transcripts are already counted
+            page_stats.update(num_of_records=0, min_date=None)
+            records, _ = self.get_page_records(graphql_input)
+
+    @staticmethod
+    def iter_page(records, visited_ids, page_stats) -> Iterator[dict]:
+        """
+        Yields the not yet visited transcripts of a page and counts its records and oldest `date` in `page_stats`.
+        """
+        for record in records:
+            page_stats["num_of_records"] += 1
+            record_date = record.get("date")
+            if page_stats["min_date"] is None or record_date < page_stats["min_date"]:
+                page_stats["min_date"] = record_date
+
+            # Skip transcript that has been 'visited'
+            if not visited_ids.add(record.get("id"), record_date):
+                continue
+            page_stats["num_of_new_records"] += 1
+            yield record
+
+    def get_pages(self, graphql_query, from_datetime, to_datetime, visited_ids=None) -> Iterator[tuple]:
+        """
+        Pages through the transcripts of [from_datetime, to_datetime] from the newest to the oldest,
+        by moving `toDate` to the oldest `date` of the previous page and skipping the transcripts of
+        that `date` which were already returned, so a page always starts after the previous one,
+        even when more transcripts than a page share the same `date`.
+        Yields the time each page was extracted and an iterator of its not yet visited transcripts,
+        which must be consumed before the next page is requested, see `iter_page_with_retries`.
+        """
+        paging = True
+        visited_ids = visited_ids or BoundaryDedupe()
 
         graphql_variables = {
-            "fromDate": bookmark_datetime.isoformat(),
-            "toDate": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "fromDate": from_datetime.isoformat(),
+            "toDate": to_datetime.isoformat(),
             "limit": FIREFLIES_MAX_NUM_OF_RECORDS,
-            "skip": 0
+            # The ids of a checkpoint are the transcripts already synced at its `toDate`
+            "skip": len(visited_ids)
         }
 
         while paging:
-            LOGGER.info("In the process of paging. Current fromDate: {}, toDate: {}".format(graphql_variables["fromDate"], graphql_variables["toDate"]))
+            LOGGER.debug("In the process of paging. Current fromDate: %s, toDate: %s", graphql_variables["fromDate"], graphql_variables["toDate"])
             graphql_input = {
                 "query": graphql_query,
-                "variables": graphql_variables
+                "variables": dict(graphql_variables)
             }
-            
-            response = self.client.post(path=None, endpoint=self.endpoint, json=graphql_input)
-            if not response.get(self.data_key):
-                LOGGER.critical("response is empty for {} stream".format(self.tap_stream_id))
-                raise FirefliesError
-            
-            records = response.get(self.data_key).get(self.schema_key, [])
-            num_of_records = len(records)
-            has_new_record = False
-            next_toDate_in_unix_ts = None
-            next_toDate_in_iso_string = None
 
-            for record in records:
-                transcript_id = record.get("id")
-                summary_status = record.get("meeting_info", {}).get("summary_status")
-                if next_toDate_in_unix_ts:
-                    next_toDate_in_unix_ts = min(next_toDate_in_unix_ts, record.get("date"))
-                else:
-                    next_toDate_in_unix_ts = record.get("date")
-                # Skip transcript that has been 'visited'
-                if transcript_id in visited_id:
-                    continue
-                yield record
-                has_new_record = True
-                visited_id.add(transcript_id)
-            
+            page_stats = {"num_of_records": 0, "num_of_new_records": 0, "min_date": None}
+            records, time_extracted = self.request_page(graphql_input)
+            page_limit = graphql_input["variables"]["limit"]
+            yield time_extracted, self.iter_page_with_retries(graphql_input, records, visited_ids, page_stats)
+
+            next_toDate_in_unix_ts = page_stats["min_date"]
+            visited_ids.advance(next_toDate_in_unix_ts)
+            next_toDate_in_iso_string = None
             if next_toDate_in_unix_ts:
                 next_toDate_in_iso_dt = datetime.datetime.fromtimestamp(float(next_toDate_in_unix_ts) / 1000.0, datetime.timezone.utc)
                 next_toDate_in_iso_string = next_toDate_in_iso_dt.isoformat()
                 graphql_variables.update({
-                    "toDate": next_toDate_in_iso_string
+                    "toDate": next_toDate_in_iso_string,
+                    # `toDate` is inclusive, the transcripts seen at that `date` come first in the next page
+                    "skip": len(visited_ids.get_boundary_ids())
                     })
-            
+
+            if page_stats["num_of_records"] and not page_stats["num_of_new_records"]:
+                # Only when the order of the transcripts sharing a `date` changes between two pages
+                LOGGER.warning("Stream: %s, page without new transcripts at toDate %s, stopping",
+                               self.tap_stream_id, graphql_variables["toDate"])
+
             # Need a way to stop paging
-            if num_of_records < FIREFLIES_MAX_NUM_OF_RECORDS or not has_new_record or not next_toDate_in_iso_string:
+            if page_stats["num_of_records"] < page_limit or not page_stats["num_of_new_records"] or not next_toDate_in_iso_string:
                 paging = False
 
+    @staticmethod
+    def get_date_windows(from_datetime, to_datetime, window_days):
+        """
+        Splits [from_datetime, to_datetime] into windows of `window_days`, from the newest to the oldest.
+        """
+        windows = []
+        window_to = to_datetime
+        while window_to > from_datetime:
+            window_from = max(from_datetime, window_to - datetime.timedelta(days=window_days))
+            windows.append((window_from, window_to))
+            window_to = window_from
+        return windows
+
+    @staticmethod
+    def put_window_page(pages: queue.Queue, item, stopped: threading.Event) -> bool:
+        """
+        Puts `item` in the `pages` queue of a window, waiting for room unless the sync is stopped.
+        Returns False when it is stopped.
+        """
+        while not stopped.is_set():
+            try:
+                pages.put(item, timeout=BACKFILL_QUEUE_POLL_SECONDS)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def get_window_records(self, graphql_query, from_datetime, to_datetime, pages: queue.Queue,
+                           stopped: threading.Event):
+        """
+        Fetches the pages of transcripts of one window into its `pages` queue, used by the backfill workers.
+        The queue holds at most `BACKFILL_QUEUE_PAGES` pages, the worker waits for them to be synced before fetching
+        the next ones. The window ends with None, or with the error that stopped it.
+        """
+        try:
+            for time_extracted, page in self.get_pages(graphql_query, from_datetime, to_datetime):
+                if not self.put_window_page(pages, (time_extracted, list(page)), stopped):
+                    return
+        except Exception as err:  # pylint: disable=broad-except
+            self.put_window_page(pages, err, stopped)
+            return
+        self.put_window_page(pages, None, stopped)
+
+    def get_pages_in_parallel(self, graphql_query, windows, workers) -> Iterator[tuple]:
+        """
+        Fetches the windows on a pool of `workers` threads, sharing the client and its rate limiter.
+        Windows are yielded in order (newest first), at most `workers` windows are fetched ahead, each of them
+        holding at most `BACKFILL_QUEUE_PAGES` pages until they are synced.
+        """
+        LOGGER.info("Backfilling {} with {} windows on {} workers".format(self.tap_stream_id, len(windows), workers))
+        stopped = threading.Event()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            window_queues = deque()
+            remaining_windows = iter(windows)
+
+            def submit(window_from, window_to):
+                pages = queue.Queue(maxsize=BACKFILL_QUEUE_PAGES)
+                executor.submit(self.get_window_records, graphql_query, window_from, window_to, pages, stopped)
+                window_queues.append(pages)
+
+            try:
+                for window in islice(remaining_windows, workers):
+                    submit(*window)
+
+                while window_queues:
+                    pages = window_queues[0]
+                    item = pages.get()
+                    if item is None:
+                        window_queues.popleft()
+                        next_window = next(remaining_windows, None)
+                        if next_window:
+                            submit(*next_window)
+                    elif isinstance(item, Exception):
+                        raise item
+                    else:
+                        yield item
+            finally:
+                # The workers waiting for room in their queue stop, eg. when a page failed or the sync is closed
+                stopped.set()
+
+    def get_records(self, bookmark_datetime: datetime.datetime = None, stream_metadata=None) -> Iterator[list]:
+        LOGGER.info("Syncing: {}".format(self.tap_stream_id))
+
+        graphql_query = self.build_query("Transcripts",
+                                         stream_metadata,
+                                         variable_definitions={
+                                             "fromDate": "DateTime",
+                                             "toDate": "DateTime",
+                                             "limit": "Int",
+                                             "skip": "Int"
+                                         })
+
+        # Resume a sync that did not finish from its checkpoint, see `IncrementalStream.get_checkpoint`
+        if self.last_processed:
+            to_datetime = singer.utils.strptime_to_utc(self.last_processed["to_date"])
+            cursor_ms = self.last_processed.get("to_date_ms")
+            boundary_ids = self.last_processed.get("visited_ids", [])
+        else:
+            # A fixed `end_date` sends the same requests on every run, eg. to replay them from the `http_cache_path`
+            if self.config.get("end_date"):
+                to_datetime = singer.utils.strptime_to_utc(self.config["end_date"])
+            else:
+                to_datetime = datetime.datetime.now(datetime.timezone.utc)
+            cursor_ms = None
+            boundary_ids = []
+
+        workers = int(self.config.get("backfill_workers") or 1)
+        window_days = float(self.config.get("backfill_window_days") or BACKFILL_WINDOW_DAYS)
+        windows = self.get_date_windows(bookmark_datetime, to_datetime, window_days)
+
+        if workers > 1 and len(windows) > 1:
+            pages = self.get_pages_in_parallel(graphql_query, windows, workers)
+        else:
+            pages = self.get_pages(graphql_query,
+                                   bookmark_datetime,
+                                   to_datetime,
+                                   visited_ids=BoundaryDedupe(boundary_ids, cursor_ms))
+
+        # Transcripts at the edge of two windows are returned by both of them
+        visited_ids = BoundaryDedupe(boundary_ids, cursor_ms)
+        for time_extracted, page in pages:
+            self.time_extracted = time_extracted
+            # Pages are sorted from the newest to the oldest `date`, so the sync can restart from the
+            # oldest `date` of the page, skipping the transcripts of that `date` which were synced.
+            page_min_ms = None
+            for record in page:
+                record_date = record.get("date")
+                if page_min_ms is None or record_date < page_min_ms:
+                    page_min_ms = record_date
+
+                if not visited_ids.add(record.get("id"), record_date):
+                    continue
+                yield record
+
+            if page_min_ms is None:
+                continue
+
+            visited_ids.advance(page_min_ms)
+            self.last_processed = {
+                "from_date": singer.utils.strftime(bookmark_datetime),
+                "to_date": singer.utils.strftime(self.epoch_milliseconds_to_datetime(visited_ids.boundary)),
+                "to_date_ms": visited_ids.boundary,
+                "visited_ids": sorted(visited_ids.get_boundary_ids())
+            }
+
+class TranscriptSentences(IncrementalStream):
+    """
+    Retrieves the sentences of the transcripts using Fireflies GraphQL queries, several transcripts per request.
+    Synced through the `transcripts` stream, only for new or changed transcripts, once per page of transcripts.
+    """
+    tap_stream_id = "transcript_sentences"
+    key_properties = ["transcript_id", "index"]
+    endpoint = "transcript"
+    schema_key = "transcript"
+    replication_key = "date"
+    valid_replication_keys = ["date"]
+    parent = "transcripts"
+    # Fields copied from the parent transcript, they are not part of the `sentences` selection.
+    parent_fields = ["transcript_id", "date"]
+    _batch_size = None
+
+    def build_batch_query(self, size, stream_metadata=None):
+        """
+        Builds a query of the sentences of `size` transcripts, see `build_batch_query`, selecting the
+        selected fields of the sentences.
+        """
+        schema = self.get_stream_schema()
+        transcript_schema = {
+            "properties": {
+                "sentences": {
+                    "type": ["null", "array"],
+                    "items": {
+                        "type": ["null", "object"],
+                        "properties": {
+                            field_name: field_schema for field_name, field_schema in schema["properties"].items()
+                            if field_name not in self.parent_fields
+                        },
+                    },
+                },
+            },
+        }
+        # The fields of the sentences are nested in `sentences` in the query
+        transcript_metadata = {("properties", "sentences", "items") + breadcrumb: entry
+                               for breadcrumb, entry in (stream_metadata or {}).items() if breadcrumb}
+        return build_batch_query("TranscriptSentences", "transcript", transcript_schema, transcript_metadata, size=size)
+
+    def get_batch_size(self) -> AdaptiveBatchSize:
+        """
+        Returns the number of transcripts whose sentences are fetched per request, kept across the pages of the
+        parent. It starts at `lookup_batch_size` and adapts to the size of the responses, see `iter_batches`.
+        """
+        if self._batch_size is None:
+            self._batch_size = AdaptiveBatchSize(self.config.get("lookup_batch_size") or BATCH_SIZE,
+                                                 maximum=FIREFLIES_MAX_BATCH_SIZE)
+        return self._batch_size
+
+    def get_records(self, bookmark_datetime=None, stream_metadata=None, parents=None) -> Iterator[list]:
+        """
+        Yields the sentences of the given (transcript id, transcript date), looked up in batches with aliased
+        `transcript` queries. The transcripts deleted since they were listed have no sentences.
+        """
+        parent_dates = dict(parents or [])
+        for transcript_id, transcript, error in self.client.iter_batches(
+                list(parent_dates),
+                functools.partial(self.build_batch_query, stream_metadata=stream_metadata),
+                sizer=self.get_batch_size(),
+                endpoint=self.endpoint):
+            self.time_extracted = singer.utils.now()
+            if isinstance(error, FirefliesObjectNotFoundError):
+                continue
+            if error is not None:
+                raise error
+
+            for sentence in (transcript or {}).get("sentences") or []:
+                sentence["transcript_id"] = transcript_id
+                sentence["date"] = parent_dates[transcript_id]
+                yield sentence
+
 STREAMS = {
     "users": Users,
     "transcripts": Transcripts,
+    "transcript_sentences": TranscriptSentences,
 }
\ No newline at end of file
@@ -1,10 +1,20 @@
 
+import copy
+from concurrent.futures import ThreadPoolExecutor
+
 import singer
 from singer import Transformer, metadata
 
 
+from tap_fireflies import phase_metrics
+from tap_fireflies.batch_writer import (DEFAULT_BATCH_MAX_BYTES, DEFAULT_BATCH_MAX_ROWS, DEFAULT_BATCH_MAX_SECONDS,
+                                        BatchWriter)
 from tap_fireflies.client import FirefliesClient
+from tap_fireflies.http_cache import DEFAULT_MAX_BYTES as DEFAULT_HTTP_CACHE_MAX_BYTES, READ_THROUGH, ResponseCache
+from tap_fireflies.record_cache import DEFAULT_MAX_ENTRIES, RecordHashCache
 from tap_fireflies.streams import STREAMS
+from tap_fireflies.writer import (DEFAULT_BUFFER_SIZE, RecordWriter, SharedState, StreamStateWriter,
+                                  WorkspacesState, WorkspaceWriter)
 
 LOGGER = singer.get_logger()
 
@@ -42,21 +52,134 @@ def translate_state(state):
 
 def get_streams_to_sync(catalog, selected_streams, selected_stream_names):
     """
-        Get streams to sync
+        Get streams to sync. Child streams are synced through their parent,
+        so the parent is synced instead of a selected child.
     """
     streams_to_sync = []
+    stream_ids_to_sync = []
 
     for stream in selected_streams:
-        streams_to_sync.append(stream)
         stream_obj = STREAMS.get(stream.tap_stream_id)
+        parent_stream = stream_obj.parent
+        if parent_stream and parent_stream not in selected_stream_names:
+            stream = catalog.get_stream(parent_stream)
+        elif parent_stream:
+            continue
+
+        if stream.tap_stream_id not in stream_ids_to_sync:
+            streams_to_sync.append(stream)
+            stream_ids_to_sync.append(stream.tap_stream_id)
 
     return streams_to_sync
 
-def sync(config, state, catalog):
-    """ Sync data from tap source """
+# pylint: disable=too-many-arguments
+def sync_stream(stream, stream_obj, selected_stream_names, state, config, writer, transformer):
+    """
+    Syncs one stream, and its child if it is selected, and returns the state.
+    """
+    tap_stream_id = stream.tap_stream_id
+    catalog = stream_obj.catalog
+    stream_schema = stream.schema.to_dict()
+    stream_metadata = metadata.to_map(stream.metadata)
+
+    LOGGER.info('Starting sync for stream: %s', tap_stream_id)
+
+    state = singer.set_currently_syncing(state, tap_stream_id)
+    writer.write_state(state)
+
+    if tap_stream_id in selected_stream_names:
+        writer.write_schema(
+            tap_stream_id,
+            stream_schema,
+            stream_obj.key_properties,
+            stream.replication_key
+        )
+
+    if stream_obj.child in selected_stream_names:
+        child_stream = catalog.get_stream(stream_obj.child)
+        writer.write_schema(
+            child_stream.tap_stream_id,
+            child_stream.schema.to_dict(),
+            STREAMS[child_stream.tap_stream_id].key_properties,
+            child_stream.replication_key
+        )
+
+    state = stream_obj.sync(state, stream_schema, stream_metadata, config, transformer)
+    stream_obj.write_state(state)
+    return state
+
+# pylint: disable=too-many-arguments,too-many-locals
+def sync_streams_in_parallel(streams_to_sync, workers, client, catalog, selected_stream_names,
+                             state, config, writer, record_cache, transformer):
+    """
+    Syncs the streams on a pool of `workers` threads sharing the client, its rate limiter and the writer.
+    Each stream updates its own copy of the state, and its STATE messages merge its bookmarks into the
+    shared state, see `StreamStateWriter`, so a STATE message only holds bookmarks of records already written.
+    """
+    LOGGER.info('Syncing %s streams on %s workers', len(streams_to_sync), workers)
+    shared_state = SharedState(state)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for stream in streams_to_sync:
+            stream_obj_class = STREAMS[stream.tap_stream_id]
+            stream_writer = StreamStateWriter(writer,
+                                              shared_state,
+                                              [stream.tap_stream_id, stream_obj_class.child])
+            stream_obj = stream_obj_class(client, catalog, selected_stream_names, config, stream_writer, record_cache)
+            futures.append(executor.submit(sync_stream, stream, stream_obj, selected_stream_names,
+                                           copy.deepcopy(state), config, stream_writer, transformer))
+        for future in futures:
+            future.result()
+    return shared_state.value
+
+def get_workspaces(config):
+    """
+    Returns the (label, access_token) of each workspace when `access_token` is a list of
+    `{"label": ..., "access_token": ...}` entries, None when it is a single token.
+    """
+    access_token = config.get('access_token')
+    if not isinstance(access_token, list):
+        return None
+
+    workspaces = []
+    for entry in access_token:
+        if not isinstance(entry, dict) or not entry.get('label') or not entry.get('access_token'):
+            raise ValueError("Each entry of access_token must have a label and an access_token")
+        workspaces.append((str(entry['label']), entry['access_token']))
+    labels = [label for label, _ in workspaces]
+    if len(set(labels)) != len(labels):
+        raise ValueError("The labels of the access_token entries must be unique: {}".format(labels))
+    return workspaces
+
+def get_record_cache(config, namespace=None):
+    if not config.get('record_cache_path'):
+        return None
+    return RecordHashCache(config['record_cache_path'],
+                           max_entries=config.get('record_cache_max_entries') or DEFAULT_MAX_ENTRIES,
+                           rebuild=config.get('record_cache_rebuild'),
+                           namespace=namespace)
 
+def get_response_cache(config):
+    if not config.get('http_cache_path'):
+        return None
+    return ResponseCache(config['http_cache_path'],
+                         mode=config.get('http_cache_mode') or READ_THROUGH,
+                         max_bytes=config.get('http_cache_max_bytes') or DEFAULT_HTTP_CACHE_MAX_BYTES,
+                         ttl=config.get('http_cache_ttl'))
+
+# pylint: disable=too-many-arguments
+def sync_workspace(config, state, catalog, writer, record_cache=None, response_cache=None):
+    """
+    Syncs the selected streams with the `access_token` of the config and returns the state.
+    """
     access_token = config.get('access_token')
-    client = FirefliesClient(access_token, config.get('request_timeout')) # pass request_timeout parameter from config
+    client = FirefliesClient(access_token,
+                             config.get('request_timeout'), # pass request_timeout parameter from config
+                             rate_limit_per_minute=config.get('rate_limit_per_minute'),
+                             rate_limit_burst=config.get('rate_limit_burst'),
+                             max_connections=config.get('max_connections'),
+                             base_url=config.get('base_url'),
+                             response_cache=response_cache)
 
     # Translate state to the new format with replication key in the state
     state = translate_state(state)
@@ -66,27 +189,107 @@ def sync(config, state, catalog):
     for stream in selected_streams:
         selected_stream_names.append(stream.tap_stream_id)
 
+    streams_to_sync = get_streams_to_sync(catalog, selected_streams, selected_stream_names)
+    stream_workers = min(int(config.get('stream_workers') or 1), len(streams_to_sync))
     with Transformer() as transformer:
-        for stream in get_streams_to_sync(catalog, selected_streams, selected_stream_names):
-            tap_stream_id = stream.tap_stream_id
-            stream_obj = STREAMS[tap_stream_id](client, catalog, selected_stream_names)
-            stream_schema = stream.schema.to_dict()
-            stream_metadata = metadata.to_map(stream.metadata)
+        if stream_workers > 1:
+            state = sync_streams_in_parallel(streams_to_sync, stream_workers, client, catalog, selected_stream_names,
+                                             state, config, writer, record_cache, transformer)
+        else:
+            for stream in streams_to_sync:
+                stream_obj = STREAMS[stream.tap_stream_id](client, catalog, selected_stream_names, config, writer, record_cache)
+                state = sync_stream(stream, stream_obj, selected_stream_names, state, config, writer, transformer)
+
+    state = singer.set_currently_syncing(state, None)
+    writer.write_state(state)
+    # The held STATE messages commit the record cache, before it is closed
+    writer.finish()
+    if record_cache is not None:
+        LOGGER.info('Skipped %s unchanged records', record_cache.skipped)
+    return state
 
-            LOGGER.info('Starting sync for stream: %s', tap_stream_id)
+def sync_labelled_workspace(label, config, workspaces_state, catalog, writer):
+    """
+    Syncs one of the workspaces, with its own client, rate limiter and record cache namespace.
+    """
+    LOGGER.info('Starting sync for workspace: %s', label)
+    record_cache = get_record_cache(config, namespace=label)
+    response_cache = get_response_cache(config)
+    try:
+        sync_workspace(config,
+                       workspaces_state.get(label),
+                       catalog,
+                       WorkspaceWriter(writer, workspaces_state, label),
+                       record_cache,
+                       response_cache)
+    finally:
+        if record_cache is not None:
+            record_cache.close()
+        if response_cache is not None:
+            response_cache.close()
+    LOGGER.info('Finished sync for workspace: %s', label)
 
-            state = singer.set_currently_syncing(state, tap_stream_id)
-            singer.write_state(state)
+# pylint: disable=too-many-arguments
+def sync_workspaces_in_parallel(workspaces, config, state, catalog, writer):
+    """
+    Syncs the workspaces on a pool of `workspace_workers` threads, all of them by default. The records are
+    tagged with the label of their workspace and the state of each workspace is kept under its label, see
+    `WorkspacesState`. A failed workspace does not stop the others, its error is raised once they are done.
+    """
+    workers = min(int(config.get('workspace_workers') or len(workspaces)), len(workspaces))
+    LOGGER.info('Syncing %s workspaces on %s workers', len(workspaces), workers)
+    workspaces_state = WorkspacesState(state)
+    errors = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [(label, executor.submit(sync_labelled_workspace,
+                                           label,
+                                           dict(config, access_token=access_token),
+                                           workspaces_state,
+                                           catalog,
+                                           writer))
+                   for label, access_token in workspaces]
+        for label, future in futures:
+            try:
+                future.result()
+            except Exception as err:  # pylint: disable=broad-except
+                LOGGER.error('Sync of workspace %s failed: %s', label, err)
+                errors.append(err)
+    if errors:
+        raise errors[0]
+    return workspaces_state.value
 
-            singer.write_schema(
-                tap_stream_id,
-                stream_schema,
-                stream_obj.key_properties,
-                stream.replication_key
-            )
+def sync(config, state, catalog):
+    """ Sync data from tap source """
 
-            state = stream_obj.sync(state, stream_schema, stream_metadata, config, transformer)
-            singer.write_state(state)
+    phase_metrics.PHASE_METRICS.reset()
 
-    state = singer.set_currently_syncing(state, None)
-    singer.write_state(state)
\ No newline at end of file
+    # All the messages go through one buffered writer, flushed with every STATE message
+    if config.get('batch_output_dir'):
+        writer = BatchWriter(config['batch_output_dir'],
+                             batch_format=config.get('batch_format') or 'jsonl',
+                             max_bytes=config.get('batch_max_bytes') or DEFAULT_BATCH_MAX_BYTES,
+                             max_rows=config.get('batch_max_rows') or DEFAULT_BATCH_MAX_ROWS,
+                             max_seconds=config.get('batch_max_seconds', DEFAULT_BATCH_MAX_SECONDS),
+                             buffer_size=config.get('output_buffer_size') or DEFAULT_BUFFER_SIZE,
+                             fast_json=config.get('fast_json'))
+    else:
+        writer = RecordWriter(buffer_size=config.get('output_buffer_size') or DEFAULT_BUFFER_SIZE,
+                              fast_json=config.get('fast_json'))
+
+    workspaces = get_workspaces(config)
+    if workspaces is not None:
+        sync_workspaces_in_parallel(workspaces, config, state, catalog, writer)
+    else:
+        record_cache = get_record_cache(config)
+        response_cache = get_response_cache(config)
+        try:
+            sync_workspace(config, state, catalog, writer, record_cache, response_cache)
+        finally:
+            if record_cache is not None:
+                record_cache.close()
+            if response_cache is not None:
+                response_cache.close()
+
+    phase_metrics.PHASE_METRICS.log_metrics()
+    if config.get('metrics_file'):
+        phase_metrics.PHASE_METRICS.write_file(config['metrics_file'], config.get('metrics_format'))
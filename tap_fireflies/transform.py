@@ -0,0 +1,234 @@
+"""
+This module compiles a stream schema and its metadata into a transform function, which gives the same
+output as `singer.transform.transform` without walking the schema and the metadata for every record.
+"""
+
+from singer import UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING
+from singer.transform import (NO_INTEGER_DATETIME_PARSING, UNIX_SECONDS_INTEGER_DATETIME_PARSING,
+                              string_to_datetime, transform, unix_milliseconds_to_datetime,
+                              unix_seconds_to_datetime)
+
+# Returned by the compiled converters when the data does not match the schema
+FAIL = object()
+
+
+class UnsupportedSchema(Exception):
+    """Raised for schema features which are not compiled, `singer.transform` is used instead."""
+
+
+def _get_filter(stream_metadata, breadcrumb):
+    """
+    Returns how `singer.Transformer.filter_data_by_metadata` treats a field:
+    'keep' (automatic, not filtered further), 'drop' or 'filter' (kept and its sub-fields filtered).
+    """
+    field_metadata = stream_metadata.get(breadcrumb, {})
+    if field_metadata.get('inclusion') == 'automatic':
+        return 'keep'
+    if field_metadata.get('selected') is False or field_metadata.get('inclusion') == 'unsupported':
+        return 'drop'
+    return 'filter'
+
+
+def _compile_datetime(integer_datetime_fmt):
+    if integer_datetime_fmt == NO_INTEGER_DATETIME_PARSING:
+        parse_integer = None
+    elif integer_datetime_fmt == UNIX_SECONDS_INTEGER_DATETIME_PARSING:
+        parse_integer = unix_seconds_to_datetime
+    elif integer_datetime_fmt == UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING:
+        parse_integer = unix_milliseconds_to_datetime
+    else:
+        raise UnsupportedSchema("Invalid integer datetime parsing option")
+
+    def convert(data):
+        if data is None or data == "":
+            return FAIL
+        if parse_integer is None:
+            value = string_to_datetime(data)
+        else:
+            try:
+                value = parse_integer(data)
+            except Exception:
+                value = string_to_datetime(data)
+        return FAIL if value is None else value
+
+    return convert
+
+
+def _convert_null(data):
+    if data is None or data == "":
+        return None
+    return FAIL
+
+
+def _convert_string(data):
+    if data is None:
+        return FAIL
+    try:
+        return str(data)
+    except Exception:
+        return FAIL
+
+
+def _convert_integer(data):
+    if isinstance(data, str):
+        data = data.replace(",", "")
+    try:
+        return int(data)
+    except Exception:
+        return FAIL
+
+
+def _convert_number(data):
+    if isinstance(data, str):
+        data = data.replace(",", "")
+    try:
+        return float(data)
+    except Exception:
+        return FAIL
+
+
+def _convert_boolean(data):
+    if isinstance(data, str) and data.lower() == "false":
+        return False
+    try:
+        return bool(data)
+    except Exception:
+        return FAIL
+
+
+def _compile_object(schema, stream_metadata, breadcrumb, integer_datetime_fmt):
+    if schema.get("patternProperties"):
+        raise UnsupportedSchema("patternProperties")
+
+    properties = schema.get("properties", {})
+    if properties == {}:
+        # Don't touch an empty schema
+        return lambda data: data if isinstance(data, dict) else FAIL
+
+    converters = {}
+    for field_name, field_schema in properties.items():
+        field_breadcrumb = breadcrumb + ('properties', field_name)
+        field_metadata = stream_metadata
+        if stream_metadata is not None:
+            field_filter = _get_filter(stream_metadata, field_breadcrumb)
+            if field_filter == 'drop':
+                continue
+            if field_filter == 'keep':
+                field_metadata = None
+        converters[field_name] = _compile(field_schema, field_metadata, field_breadcrumb, integer_datetime_fmt)
+
+    def convert(data):
+        if not isinstance(data, dict):
+            return FAIL
+        result = {}
+        for key, value in data.items():
+            converter = converters.get(key)
+            if converter is None:
+                # Not in the schema, or filtered out by the metadata
+                continue
+            value = converter(value)
+            if value is FAIL:
+                return FAIL
+            result[key] = value
+        return result
+
+    return convert
+
+
+def _compile_array(schema, stream_metadata, breadcrumb, integer_datetime_fmt):
+    item_converter = _compile(schema["items"], stream_metadata, breadcrumb + ('items',), integer_datetime_fmt)
+
+    def convert(data):
+        if not isinstance(data, list):
+            return FAIL
+        result = []
+        for item in data:
+            item = item_converter(item)
+            if item is FAIL:
+                return FAIL
+            result.append(item)
+        return result
+
+    return convert
+
+
+def _compile(schema, stream_metadata, breadcrumb, integer_datetime_fmt):
+    """
+    Compiles a schema node into a converter returning the transformed data, or FAIL.
+    Mirrors `singer.Transformer.transform_recur`: types are tried in order, 'null' last.
+    """
+    if "anyOf" in schema:
+        raise UnsupportedSchema("anyOf")
+
+    if "type" not in schema:
+        # indicates no typing information so don't bother transforming it
+        return lambda data: data
+
+    types = schema["type"]
+    if not isinstance(types, list):
+        types = [types]
+    if "null" in types:
+        types = [typ for typ in types if typ != "null"] + ["null"]
+
+    converters = []
+    for typ in types:
+        if typ == "null":
+            converters.append(_convert_null)
+        elif schema.get("format") == "date-time":
+            converters.append(_compile_datetime(integer_datetime_fmt))
+        elif schema.get("format") == "singer.decimal":
+            raise UnsupportedSchema("singer.decimal")
+        elif typ == "object":
+            converters.append(_compile_object(schema, stream_metadata, breadcrumb, integer_datetime_fmt))
+        elif typ == "array":
+            converters.append(_compile_array(schema, stream_metadata, breadcrumb, integer_datetime_fmt))
+        elif typ == "string":
+            converters.append(_convert_string)
+        elif typ == "integer":
+            converters.append(_convert_integer)
+        elif typ == "number":
+            converters.append(_convert_number)
+        elif typ == "boolean":
+            converters.append(_convert_boolean)
+        else:
+            converters.append(lambda data: FAIL)
+
+    if len(converters) == 1:
+        return converters[0]
+
+    def convert(data):
+        for converter in converters:
+            value = converter(data)
+            if value is not FAIL:
+                return value
+        return FAIL
+
+    return convert
+
+
+def compile_transformer(schema, stream_metadata=None, integer_datetime_fmt=UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING):
+    """
+    Returns a function transforming a record like
+    `singer.transform.transform(record, schema, integer_datetime_fmt, metadata=stream_metadata)`.
+    Records which do not match the schema go through `singer.transform` to raise its error, and
+    schemas or metadata using features which are not compiled always use `singer.transform`.
+    """
+    def singer_transform(record):
+        return transform(record, schema, integer_datetime_fmt=integer_datetime_fmt, metadata=stream_metadata)
+
+    # Metadata of nested fields would also filter data that does not match the schema, not compiled
+    if stream_metadata and any(len(breadcrumb) > 2 for breadcrumb in stream_metadata):
+        return singer_transform
+
+    try:
+        converter = _compile(schema, stream_metadata or None, (), integer_datetime_fmt)
+    except UnsupportedSchema:
+        return singer_transform
+
+    def compiled_transform(record):
+        result = converter(record)
+        if result is FAIL:
+            return singer_transform(record)
+        return result
+
+    return compiled_transform
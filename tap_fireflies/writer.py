@@ -0,0 +1,268 @@
+"""
+This module defines the writer of the Singer messages of the tap. It replaces the `singer.write_*` helpers,
+which encode each message with simplejson and flush stdout after every line.
+"""
+
+import copy
+import datetime
+import sys
+import threading
+import time
+
+import simplejson
+import singer
+
+from singer import utils
+from tap_fireflies import phase_metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LOGGER = singer.get_logger()
+
+# Records are written to stdout once the buffer reaches this size in bytes
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+# Key of the states of the workspaces, and property of their label in the records, see `WorkspaceWriter`
+WORKSPACES_STATE_KEY = "workspaces"
+WORKSPACE_PROPERTY = "workspace"
+
+
+class RecordWriter:
+    """
+    Writes Singer messages to stdout through a buffer. The buffer is flushed when it is full
+    and after every STATE message, so a state is never written before the records it covers.
+    It is thread-safe, the messages of concurrent streams are written whole and in order.
+
+    :param buffer_size: Size in bytes of the buffer
+    :param fast_json: Encode the messages with orjson when it is installed
+    """
+    # Whether the ACTIVATE_VERSION messages are written, see `WorkspaceWriter`
+    writes_versions = True
+
+    def __init__(self, buffer_size=DEFAULT_BUFFER_SIZE, fast_json=False):
+        self.buffer_size = int(buffer_size)
+        self.use_orjson = bool(fast_json) and orjson is not None
+        if fast_json and orjson is None:
+            LOGGER.warning("orjson is not installed, messages are encoded with simplejson")
+        self.__buffer = []
+        self.__buffered_bytes = 0
+        self.__lock = threading.RLock()
+        # `time_extracted` is usually the same for all the records of a page, it is formatted once.
+        # The pair is replaced at once, so concurrent streams never mix it up.
+        self.__time_extracted = (None, None)
+
+    def format_message(self, message_dict):
+        if self.use_orjson:
+            try:
+                return orjson.dumps(message_dict)
+            except TypeError:
+                # eg. Decimal values, which simplejson writes as numbers
+                pass
+        return simplejson.dumps(message_dict, use_decimal=True).encode("utf-8")
+
+    def format_time_extracted(self, time_extracted):
+        cached = self.__time_extracted
+        if time_extracted is not cached[0]:
+            cached = (time_extracted, utils.strftime(time_extracted.astimezone(datetime.timezone.utc)))
+            self.__time_extracted = cached
+        return cached[1]
+
+    def write(self, message_dict):
+        start = time.perf_counter()
+        line = self.format_message(message_dict) + b"\n"
+        phase_metrics.add(phase_metrics.SERIALIZE, time.perf_counter() - start)
+        with self.__lock:
+            self.__buffer.append(line)
+            self.__buffered_bytes += len(line)
+            if self.__buffered_bytes >= self.buffer_size:
+                self.flush()
+
+    def flush(self):
+        with self.__lock:
+            if not self.__buffer:
+                return
+
+            data = b"".join(self.__buffer)
+            self.__buffer = []
+            self.__buffered_bytes = 0
+
+            output = sys.stdout
+            with phase_metrics.measure(phase_metrics.WRITE):
+                if hasattr(output, "buffer"):
+                    # Anything written to the text layer must go out first
+                    output.flush()
+                    output.buffer.write(data)
+                    output.buffer.flush()
+                else:
+                    output.write(data.decode("utf-8"))
+                    output.flush()
+
+    def write_record(self, stream_name, record, time_extracted=None, version=None):
+        """
+        Same message as `singer.write_record`, built without the `RecordMessage` object.
+        """
+        message = {
+            'type': 'RECORD',
+            'stream': stream_name,
+            'record': record,
+        }
+        if version is not None:
+            message['version'] = version
+        if time_extracted:
+            message['time_extracted'] = self.format_time_extracted(time_extracted)
+        self.write(message)
+
+    def write_schema(self, stream_name, schema, key_properties, bookmark_properties=None):
+        if isinstance(key_properties, (str, bytes)):
+            key_properties = [key_properties]
+        self.write(singer.SchemaMessage(stream=stream_name,
+                                        schema=schema,
+                                        key_properties=key_properties,
+                                        bookmark_properties=bookmark_properties).asdict())
+
+    def write_state(self, state, on_written=None):
+        """
+        Writes a STATE message and flushes the output.
+
+        :param on_written: Called once the state is written, eg. to commit the record cache
+        """
+        with self.__lock:
+            self.write(singer.StateMessage(value=state).asdict())
+            self.flush()
+        if on_written is not None:
+            on_written()
+
+    def finish(self):
+        """
+        Writes everything held by the writer, at the end of the sync of a workspace.
+        """
+        self.flush()
+
+    def write_version(self, stream_name, version):
+        self.write(singer.ActivateVersionMessage(stream=stream_name, version=version).asdict())
+
+
+class SharedState:
+    """
+    The state of the streams synced concurrently, each of them updating its own copy of the state.
+
+    :param state: The state at the start of the sync
+    """
+    def __init__(self, state):
+        self.value = copy.deepcopy(state)
+        self.__lock = threading.Lock()
+
+    def write(self, writer, stream_state, stream_names, on_written=None):
+        """
+        Copies the bookmarks of `stream_names` from the state of a stream and writes the merged state.
+        """
+        with self.__lock:
+            stream_bookmarks = stream_state.get("bookmarks", {})
+            for stream_name in stream_names:
+                if stream_name in stream_bookmarks:
+                    self.value.setdefault("bookmarks", {})[stream_name] = copy.deepcopy(stream_bookmarks[stream_name])
+            self.value["currently_syncing"] = stream_state.get("currently_syncing")
+            writer.write_state(self.value, on_written=on_written)
+
+
+class StreamStateWriter:
+    """
+    Writer of a stream synced concurrently with other streams. The messages go to the shared `RecordWriter`,
+    except the STATE messages which are merged into the `SharedState` first.
+
+    :param writer: The `RecordWriter` of the sync
+    :param shared_state: The `SharedState` of the sync
+    :param stream_names: Names of the streams whose bookmarks are written by the stream, eg. its child
+    """
+    def __init__(self, writer, shared_state, stream_names):
+        self.writer = writer
+        self.shared_state = shared_state
+        self.stream_names = [stream_name for stream_name in stream_names if stream_name]
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
+
+    def write_state(self, state, on_written=None):
+        self.shared_state.write(self.writer, state, self.stream_names, on_written=on_written)
+
+
+class WorkspacesState:
+    """
+    The state of the workspaces synced concurrently, the state of each workspace is kept under
+    `workspaces` and its label, eg. `{"workspaces": {"acme": {"bookmarks": {...}}}}`.
+
+    :param state: The state at the start of the sync
+    """
+    def __init__(self, state):
+        self.value = copy.deepcopy(state)
+        self.value.setdefault(WORKSPACES_STATE_KEY, {})
+        self.__written_schemas = set()
+        self.__lock = threading.Lock()
+
+    def get(self, label):
+        """
+        Returns a copy of the state of a workspace, empty for a new workspace.
+        """
+        with self.__lock:
+            return copy.deepcopy(self.value[WORKSPACES_STATE_KEY].get(label, {}))
+
+    def write(self, writer, label, workspace_state, on_written=None):
+        with self.__lock:
+            self.value[WORKSPACES_STATE_KEY][label] = copy.deepcopy(workspace_state)
+            writer.write_state(self.value, on_written=on_written)
+
+    def write_schema(self, writer, stream_name, *args, **kwargs):
+        """
+        Writes the SCHEMA message of a stream once for all the workspaces.
+        """
+        with self.__lock:
+            if stream_name not in self.__written_schemas:
+                writer.write_schema(stream_name, *args, **kwargs)
+                self.__written_schemas.add(stream_name)
+
+
+class WorkspaceWriter:
+    """
+    Writer of a workspace synced concurrently with other workspaces. The records are tagged with the label
+    of the workspace, which is added to the schemas and their key properties, and the STATE messages
+    are merged into the `WorkspacesState` first.
+
+    :param writer: The `RecordWriter` of the sync
+    :param workspaces_state: The `WorkspacesState` of the sync
+    :param label: Label of the workspace
+    """
+    writes_versions = False
+
+    def __init__(self, writer, workspaces_state, label):
+        self.writer = writer
+        self.workspaces_state = workspaces_state
+        self.label = label
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
+
+    def write_record(self, stream_name, record, time_extracted=None, version=None):
+        record[WORKSPACE_PROPERTY] = self.label
+        # The table versions are dropped, see `write_version`
+        self.writer.write_record(stream_name, record, time_extracted=time_extracted)
+
+    def write_schema(self, stream_name, schema, key_properties, bookmark_properties=None):
+        schema = dict(schema, properties=dict(schema.get("properties", {}), **{WORKSPACE_PROPERTY: {"type": ["string"]}}))
+        if isinstance(key_properties, (str, bytes)):
+            key_properties = [key_properties]
+        self.workspaces_state.write_schema(self.writer,
+                                           stream_name,
+                                           schema,
+                                           [WORKSPACE_PROPERTY] + list(key_properties or []),
+                                           bookmark_properties)
+
+    def write_state(self, state, on_written=None):
+        self.workspaces_state.write(self.writer, self.label, state, on_written=on_written)
+
+    def write_version(self, stream_name, version):
+        """
+        Does not write the ACTIVATE_VERSION messages, which apply to the whole stream: the target
+        would delete the records of the other workspaces.
+        """
@@ -0,0 +1,161 @@
+"""
+Helpers of the tests syncing against the local mock of the Fireflies API, see `benchmarks/mock_server.py`.
+"""
+
+import contextlib
+import copy
+import io
+import json
+import os
+import sys
+import threading
+import unittest
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "benchmarks"))
+
+# pylint: disable=wrong-import-position,unused-import
+from singer import metadata
+
+from mock_server import Dataset, MockFirefliesServer
+from tap_fireflies.discover import discover
+from tap_fireflies.streams import PENDING_SUMMARIES_KEY
+from tap_fireflies.sync import sync
+
+
+def get_catalog(stream_names):
+    """
+    Returns the discovered catalog with only the given streams selected.
+    """
+    catalog = discover()
+    for stream in catalog.streams:
+        stream_metadata = metadata.to_map(stream.metadata)
+        stream_metadata[()]["selected"] = stream.tap_stream_id in stream_names
+        stream.metadata = metadata.to_list(stream_metadata)
+    return catalog
+
+
+def get_config(server, **settings):
+    """
+    Returns a config syncing from the mock server, without rate limiting.
+    """
+    config = {
+        "access_token": "token",
+        "start_date": "2020-01-01T00:00:00Z",
+        "base_url": server.url,
+        "rate_limit_per_minute": 1000000,
+        "rate_limit_burst": 1000000,
+    }
+    config.update(settings)
+    return config
+
+
+def run_sync(config, state, stream_names, expected_error=None):
+    """
+    Runs a sync of the given streams and returns the Singer messages written to stdout.
+    With `expected_error`, the sync must fail with it, eg. to resume it from its last state.
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            sync(config, copy.deepcopy(state), get_catalog(stream_names))
+        except Exception as err:  # pylint: disable=broad-except
+            if expected_error is None or not isinstance(err, expected_error):
+                raise
+        else:
+            if expected_error is not None:
+                raise AssertionError("The sync did not raise {}".format(expected_error.__name__))
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+class MockServerTestCase(unittest.TestCase):
+    """
+    Syncs the transcripts of a new `Dataset` of `num_transcripts` in each test, between `start_date` and `end_date`.
+    """
+    num_transcripts = 100
+    start_date = "2020-09-13T12:00:00Z"
+    end_date = "2020-09-13T15:00:00Z"
+    # The mock transcripts are from 2020, their summaries are re-fetched
+    summary_refetch_max_age_days = 100000
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockFirefliesServer(Dataset(num_transcripts=cls.num_transcripts, num_sentences=1)).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        self.server.dataset = Dataset(num_transcripts=self.num_transcripts, num_sentences=1)
+
+    def tearDown(self):
+        self.server.fail = None
+
+    def get_config(self, **settings):
+        return get_config(self.server, start_date=self.start_date, end_date=self.end_date,
+                          summary_refetch_max_age_days=self.summary_refetch_max_age_days, **settings)
+
+    def get_pending_state(self, indexes):
+        """
+        Returns the state of a sync up to `end_date` which queued the summaries of the given transcripts.
+        """
+        return {"bookmarks": {"transcripts": {
+            "date": self.end_date,
+            PENDING_SUMMARIES_KEY: {Dataset.get_id(index): self.server.dataset.dates[index] for index in indexes},
+        }}}
+
+
+class FailRequests:
+    """
+    The `fail` hook of the mock server, answering an error with `status` to the requests whose query
+    contains `query_part`, from the `first`-th one (counted from 1) and for `count` of them.
+    The matching requests are kept in `bodies`, eg. to check their variables.
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, query_part, first=1, count=1, status=400):
+        self.query_part = query_part
+        self.first = first
+        self.count = count
+        self.status = status
+        self.requests = 0
+        self.failed = 0
+        self.bodies = []
+        self.__lock = threading.Lock()
+
+    def __call__(self, body):
+        if self.query_part not in body.get("query", ""):
+            return None
+        with self.__lock:
+            self.requests += 1
+            self.bodies.append(body)
+            if self.first <= self.requests < self.first + self.count:
+                self.failed += 1
+                return self.status
+        return None
+
+
+def get_records(messages, stream_name):
+    return [message["record"] for message in messages
+            if message["type"] == "RECORD" and message["stream"] == stream_name]
+
+
+def get_states(messages):
+    return [message["value"] for message in messages if message["type"] == "STATE"]
+
+
+def get_covered_keys(messages, stream_name, key):
+    """
+    Returns the `key` of the records of a stream written before the last STATE message, which a sync resumed
+    from that state does not write again.
+    """
+    covered_keys = set()
+    keys = []
+    for message in messages:
+        if message["type"] == "RECORD" and message["stream"] == stream_name:
+            keys.append(key(message["record"]))
+        elif message["type"] == "STATE":
+            covered_keys.update(keys)
+            keys = []
+    return covered_keys
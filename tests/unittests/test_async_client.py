@@ -0,0 +1,77 @@
+import asyncio
+import time
+import unittest
+
+from helpers import Dataset, FailRequests, MockFirefliesServer
+
+from tap_fireflies.async_client import AsyncFirefliesClient, httpx
+from tap_fireflies.client import FirefliesClient, FirefliesForbiddenError, FirefliesInvalidArgumentError
+from tap_fireflies.rate_limit import RateLimiter
+
+USERS_QUERY = "query Users { users { user_id name } }"
+TRANSCRIPT_QUERY = "query Transcript($id: String!) { transcript(id: $id) { id title } }"
+
+
+@unittest.skipIf(httpx is None, "the async client requires httpx: pip install '.[async]'")
+class TestAsyncClient(unittest.TestCase):
+    """
+    `AsyncFirefliesClient` has the `post` surface and the errors of `FirefliesClient`.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockFirefliesServer(None, datasets={"token": Dataset(num_transcripts=20, num_sentences=1)},
+                                         latency=0.2).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def tearDown(self):
+        self.server.fail = None
+
+    def post(self, queries, access_token="token", **settings):
+        """
+        Sends the (query, variables) tuples concurrently with one async client, returns the responses or errors.
+        """
+        async def post_all():
+            settings.setdefault("rate_limit_per_minute", 1000000)
+            settings.setdefault("rate_limit_burst", 1000000)
+            async with AsyncFirefliesClient(access_token, None, base_url=self.server.url, **settings) as client:
+                return await asyncio.gather(*[client.post(None, json={"query": query, "variables": variables})
+                                              for query, variables in queries],
+                                            return_exceptions=True)
+        return asyncio.run(post_all())
+
+    def test_same_responses_as_the_blocking_client(self):
+        queries = [(USERS_QUERY, {}), (TRANSCRIPT_QUERY, {"id": Dataset.get_id(3)})]
+        with FirefliesClient("token", None, rate_limit_per_minute=1000000, rate_limit_burst=1000000,
+                             base_url=self.server.url) as client:
+            expected = [client.post(None, json={"query": query, "variables": variables})
+                        for query, variables in queries]
+        self.assertEqual(self.post(queries), expected)
+        self.assertEqual(expected[1]["data"]["transcript"]["id"], Dataset.get_id(3))
+
+    def test_errors_mapped(self):
+        self.assertIsInstance(self.post([(USERS_QUERY, {})], access_token="revoked")[0], FirefliesForbiddenError)
+        self.server.fail = FailRequests("users", status=400)
+        self.assertIsInstance(self.post([(USERS_QUERY, {})])[0], FirefliesInvalidArgumentError)
+
+    def test_server_errors_retried(self):
+        self.server.fail = FailRequests("users", status=500)
+        response = self.post([(USERS_QUERY, {})])[0]
+        self.assertEqual(len(response["data"]["users"]), 20)
+        self.assertEqual(self.server.fail.requests, 2)
+
+    def test_concurrent_requests_overlap(self):
+        # 5 requests of 0.2 seconds on the pooled connections
+        start = time.perf_counter()
+        responses = self.post([(USERS_QUERY, {})] * 5, max_connections=5)
+        self.assertLess(time.perf_counter() - start, 0.6)
+        self.assertEqual([len(response["data"]["users"]) for response in responses], [20] * 5)
+
+    def test_shared_rate_limiter(self):
+        # 4 requests per second: the first one is sent at once, the next ones are held by the event loop
+        start = time.perf_counter()
+        self.post([(USERS_QUERY, {})] * 3, rate_limiter=RateLimiter(4, 1, 1))
+        self.assertGreaterEqual(time.perf_counter() - start, 0.5)
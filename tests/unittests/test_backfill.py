@@ -0,0 +1,59 @@
+import logging
+import time
+
+import singer
+
+from helpers import Dataset, FailRequests, MockServerTestCase, get_catalog
+
+from tap_fireflies.client import FirefliesClient
+from tap_fireflies.streams import BACKFILL_QUEUE_PAGES, Transcripts
+
+TRANSCRIPTS_QUERY = "transcripts("
+WORKERS = 2
+
+
+class TestBackfillWorkers(MockServerTestCase):
+    """
+    With `backfill_workers`, each worker only fetches a few pages of its window ahead of the sync, see
+    `Transcripts.get_pages_in_parallel`.
+    """
+    num_transcripts = 2000
+    end_date = "2020-09-15T00:00:00Z"
+
+    def get_stream(self):
+        config = self.get_config(page_size=3, backfill_workers=WORKERS, backfill_window_days=0.5)
+        return Transcripts(FirefliesClient("token", None, rate_limit_per_minute=1000000, rate_limit_burst=1000000,
+                                           base_url=self.server.url),
+                           get_catalog(["transcripts"]),
+                           ["transcripts"],
+                           config)
+
+    def test_pages_fetched_ahead_bounded(self):
+        requests = FailRequests(TRANSCRIPTS_QUERY, count=0)
+        self.server.fail = requests
+        records = self.get_stream().get_records(singer.utils.strptime_to_utc(self.start_date))
+
+        logging.disable(logging.INFO)
+        try:
+            ids = [next(records)["id"]]
+            time.sleep(0.5)
+            # The first page, and for each worker its queued pages and the page waiting for room in the queue
+            fetched_ahead = requests.requests
+            ids.extend(record["id"] for record in records)
+        finally:
+            logging.disable(logging.NOTSET)
+
+        self.assertLessEqual(fetched_ahead, 1 + WORKERS * (BACKFILL_QUEUE_PAGES + 1))
+        self.assertGreater(requests.requests, 3 * fetched_ahead)
+        self.assertEqual(set(ids), {Dataset.get_id(index) for index in range(self.num_transcripts)})
+
+    def test_workers_stopped_when_the_sync_stops(self):
+        requests = FailRequests(TRANSCRIPTS_QUERY, count=0)
+        self.server.fail = requests
+        records = self.get_stream().get_records(singer.utils.strptime_to_utc(self.start_date))
+
+        next(records)
+        records.close()
+        fetched = requests.requests
+        time.sleep(0.5)
+        self.assertEqual(requests.requests, fetched)
@@ -0,0 +1,107 @@
+import contextlib
+import gzip
+import io
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+from helpers import Dataset, MockFirefliesServer, get_config, get_states, run_sync
+
+from tap_fireflies import batch_writer
+from tap_fireflies.batch_writer import BatchWriter
+from tap_fireflies.streams import CHECKPOINT_KEY
+
+
+def write_checkpoints(writer, num_records):
+    """
+    Writes one record and one STATE message at a time, like the pages of a sync, and returns the messages.
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        for index in range(num_records):
+            writer.write_record("transcripts", {"id": str(index)})
+            writer.write_state({"bookmarks": {"transcripts": {"index": index}}})
+        writer.finish()
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+class TestBatchWriterState(unittest.TestCase):
+
+    def test_state_held_until_a_file_is_full(self):
+        with tempfile.TemporaryDirectory() as batch_dir:
+            writer = BatchWriter(batch_dir, max_rows=10)
+            messages = write_checkpoints(writer, 35)
+
+        states = get_states(messages)
+        # The state held when a file is full, the next one right away as no file is open, and the last one
+        # by `finish`
+        self.assertEqual([state["bookmarks"]["transcripts"]["index"] for state in states], [8, 9, 18, 19, 28, 29, 34])
+        self.assertEqual(messages[-1]["type"], "STATE")
+
+    def test_state_written_after_max_seconds(self):
+        with tempfile.TemporaryDirectory() as batch_dir, \
+                mock.patch.object(batch_writer.time, "monotonic", side_effect=range(0, 1000, 10)):
+            writer = BatchWriter(batch_dir, max_seconds=25)
+            messages = write_checkpoints(writer, 12)
+
+        states = [state["bookmarks"]["transcripts"]["index"] for state in get_states(messages)]
+        # Every 10 seconds a record or a state is written, the held state is written 25 seconds after it
+        # was first held, the files being far from full
+        self.assertTrue(len(states) >= 4, states)
+        self.assertEqual(states[-1], 11)
+        self.assertTrue(all(later - earlier <= 3 for earlier, later in zip(states, states[1:])), states)
+
+    def test_state_written_with_every_checkpoint(self):
+        with tempfile.TemporaryDirectory() as batch_dir:
+            writer = BatchWriter(batch_dir, max_seconds=0)
+            messages = write_checkpoints(writer, 5)
+
+        self.assertEqual([state["bookmarks"]["transcripts"]["index"] for state in get_states(messages)],
+                         [0, 1, 2, 3, 4])
+        self.assertEqual([message["type"] for message in messages[:2]], ["BATCH", "STATE"])
+
+
+class TestBatchWriterSync(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockFirefliesServer(Dataset(num_transcripts=200, num_sentences=1)).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def test_checkpoints_emitted_within_a_bounded_number_of_records(self):
+        with tempfile.TemporaryDirectory() as batch_dir:
+            config = get_config(self.server, batch_output_dir=batch_dir, batch_max_seconds=0, page_size=50)
+            messages = run_sync(config, {}, ["transcripts"])
+
+            checkpoints = [state for state in get_states(messages)
+                           if CHECKPOINT_KEY in state.get("bookmarks", {}).get("transcripts", {})]
+            # A checkpoint after each page but the last one
+            self.assertEqual(len(checkpoints), 3)
+
+            num_records = 0
+            for message in messages:
+                if message["type"] == "BATCH":
+                    with open(message["manifest"][0][len("file://"):], "rb") as file:
+                        num_records += len(gzip.decompress(file.read()).splitlines())
+                elif message["type"] == "STATE":
+                    self.assertTrue(num_records <= 50, num_records)
+                    num_records = 0
+
+    def test_table_versions_not_written(self):
+        with tempfile.TemporaryDirectory() as batch_dir:
+            config = get_config(self.server, batch_output_dir=batch_dir)
+            messages = run_sync(config, {}, ["users"])
+
+            # The rows of the files have no version, an ACTIVATE_VERSION message would delete them
+            self.assertNotIn("ACTIVATE_VERSION", [message["type"] for message in messages])
+            user_ids = set()
+            for message in messages:
+                if message["type"] == "BATCH":
+                    with open(message["manifest"][0][len("file://"):], "rb") as file:
+                        user_ids.update(json.loads(line)["user_id"]
+                                        for line in gzip.decompress(file.read()).splitlines())
+            self.assertEqual(len(user_ids), 20)
@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from tap_fireflies import catalog_cache
+from tap_fireflies.catalog_cache import get_cache_path, get_catalog_dict, get_catalog_key
+
+
+class TestCatalogCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.directory.name, "cache")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_no_cache_by_default(self):
+        with mock.patch.object(catalog_cache, "save_catalog_dict") as save_catalog_dict:
+            catalog_dict = get_catalog_dict()
+        self.assertEqual({stream["tap_stream_id"] for stream in catalog_dict["streams"]},
+                         {"users", "transcripts", "transcript_sentences"})
+        save_catalog_dict.assert_not_called()
+
+    def test_cached_catalog(self):
+        catalog_dict = get_catalog_dict(self.cache_dir)
+        cache_path = get_cache_path(self.cache_dir, get_catalog_key())
+        self.assertEqual(os.listdir(self.cache_dir), [os.path.basename(cache_path)])
+
+        with mock.patch("tap_fireflies.discover.discover") as discover:
+            # The breadcrumbs of the cached catalog are lists
+            self.assertEqual(get_catalog_dict(self.cache_dir), json.loads(json.dumps(catalog_dict)))
+        discover.assert_not_called()
+
+    def test_default_cache_dir(self):
+        with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": self.cache_dir}):
+            get_catalog_dict(True)
+        self.assertTrue(os.path.exists(get_cache_path(os.path.join(self.cache_dir, "tap-fireflies"),
+                                                      get_catalog_key())))
+
+    def test_other_versions_removed(self):
+        os.makedirs(self.cache_dir)
+        stale_path = get_cache_path(self.cache_dir, "0" * 16)
+        with open(stale_path, "w") as file:
+            file.write("{}")
+        get_catalog_dict(self.cache_dir)
+        self.assertEqual(os.listdir(self.cache_dir), [os.path.basename(get_cache_path(self.cache_dir, get_catalog_key()))])
+
+    def test_key_changes_with_the_version(self):
+        key = get_catalog_key()
+        with mock.patch.object(catalog_cache, "CATALOG_CACHE_VERSION", catalog_cache.CATALOG_CACHE_VERSION + 1):
+            self.assertNotEqual(get_catalog_key(), key)
+
+    def test_corrupted_cache_rebuilt(self):
+        os.makedirs(self.cache_dir)
+        cache_path = get_cache_path(self.cache_dir, get_catalog_key())
+        with open(cache_path, "w") as file:
+            file.write("{not json")
+        catalog_dict = get_catalog_dict(self.cache_dir)
+        self.assertTrue(catalog_dict["streams"])
+        with open(cache_path) as file:
+            self.assertTrue(file.read().startswith("{\"streams\""))
@@ -0,0 +1,147 @@
+import os
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+
+import simplejson
+from helpers import Dataset, FailRequests, MockFirefliesServer, get_config, get_records, run_sync
+
+from tap_fireflies import http_cache
+from tap_fireflies.http_cache import (READ_THROUGH, RECORD, REPLAY, FirefliesCacheMissError, ResponseCache,
+                                      build_response)
+
+URL = "https://api.fireflies.ai/graphql"
+
+
+def make_response(body):
+    return build_response(URL, simplejson.dumps(body).encode("utf-8"))
+
+
+def get_key(query, **variables):
+    return ResponseCache.get_key(URL, "token", {"query": query, "variables": variables})
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "responses.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_keys(self):
+        key = get_key("query Users { users { id } }", limit=50)
+        self.assertTrue(key.startswith("Users:"))
+        self.assertEqual(key, get_key("query Users { users { id } }", limit=50))
+        self.assertNotEqual(key, get_key("query Users { users { id } }", limit=25))
+        self.assertNotEqual(key, get_key("query Users { users { id name } }", limit=50))
+        self.assertNotEqual(key, ResponseCache.get_key(URL, "other token", {"query": "query Users { users { id } }",
+                                                                            "variables": {"limit": 50}}))
+
+    def test_read_through(self):
+        key = get_key("query Users { users { id } }")
+        with ResponseCache(self.path) as cache:
+            self.assertIsNone(cache.get(URL, key))
+            cache.put(key, make_response({"data": {"users": [{"id": "1"}]}}))
+            response = cache.get(URL, key)
+            self.assertEqual(response.json(), {"data": {"users": [{"id": "1"}]}})
+            # Read from `raw` like a streamed response
+            self.assertEqual(simplejson.loads(response.raw.read()), {"data": {"users": [{"id": "1"}]}})
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        with ResponseCache(self.path, mode=REPLAY) as cache:
+            self.assertEqual(cache.get(URL, key).json(), {"data": {"users": [{"id": "1"}]}})
+            with self.assertRaises(FirefliesCacheMissError):
+                cache.get(URL, get_key("query Users { users { name } }"))
+
+    def test_record_mode_never_reads(self):
+        key = get_key("query Users { users { id } }")
+        with ResponseCache(self.path, mode=RECORD) as cache:
+            cache.put(key, make_response({"data": {"users": []}}))
+            self.assertIsNone(cache.get(URL, key))
+            cache.put(key, make_response({"data": {"users": [{"id": "2"}]}}))
+
+        with ResponseCache(self.path, mode=READ_THROUGH) as cache:
+            self.assertEqual(cache.get(URL, key).json(), {"data": {"users": [{"id": "2"}]}})
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            ResponseCache(self.path, mode="write_back")
+
+    def test_errors_not_stored(self):
+        with ResponseCache(self.path) as cache:
+            for index, content in enumerate([
+                    simplejson.dumps({"data": {"item0": None}, "errors": [{"message": "Object not found",
+                                                                           "path": ["item0"]}]}),
+                    simplejson.dumps({"errors": [{"message": "Too many requests"}]}),
+                    simplejson.dumps([1, 2]),
+                    '{"data": {"transcripts": [',
+                    ""]):
+                with self.subTest(content=content):
+                    key = get_key("query Users {{ users {{ id{} }} }}".format(index))
+                    cache.put(key, build_response(URL, content.encode("utf-8")))
+                    self.assertIsNone(cache.get(URL, key))
+
+    def test_ttl(self):
+        key = get_key("query Users { users { id } }")
+        with mock.patch.object(http_cache.time, "time", return_value=1000.0) as now, \
+                ResponseCache(self.path, ttl=60) as cache:
+            cache.put(key, make_response({"data": {"users": []}}))
+            now.return_value = 1059.0
+            self.assertIsNotNone(cache.get(URL, key))
+            now.return_value = 1061.0
+            self.assertIsNone(cache.get(URL, key))
+            now.return_value = 1000.0
+            self.assertIsNone(cache.get(URL, key))
+
+    def test_least_recently_used_evicted(self):
+        keys = [get_key("query Users {{ users {{ id{} }} }}".format(index)) for index in range(4)]
+        # Random bodies of about the same compressed size, 3 of them fit in the cache
+        bodies = [{"data": {"users": [os.urandom(512).hex()]}} for _ in keys]
+        size = len(zlib.compress(make_response(bodies[0]).content, http_cache.COMPRESS_LEVEL))
+        with mock.patch.object(http_cache.time, "time", side_effect=range(1000)), \
+                ResponseCache(self.path, max_bytes=3.5 * size) as cache:
+            for key, body in zip(keys[:3], bodies):
+                cache.put(key, make_response(body))
+            # The first response is used, the second one is now the least recently used
+            self.assertIsNotNone(cache.get(URL, keys[0]))
+            cache.put(keys[3], make_response(bodies[3]))
+
+            self.assertIsNotNone(cache.get(URL, keys[0]))
+            self.assertIsNone(cache.get(URL, keys[1]))
+            self.assertIsNotNone(cache.get(URL, keys[2]))
+            self.assertIsNotNone(cache.get(URL, keys[3]))
+
+
+class TestResponseCacheSync(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockFirefliesServer(Dataset(num_transcripts=120, num_sentences=2)).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def tearDown(self):
+        self.server.fail = None
+
+    def test_record_then_replay(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            config = get_config(self.server, end_date="2020-09-14T00:00:00Z", page_size=20,
+                                http_cache_path=os.path.join(cache_dir, "responses.db"))
+            stream_names = ["users", "transcripts", "transcript_sentences"]
+            # A failed page is not stored, and the page size does not shrink so the replayed requests are the same
+            self.server.fail = FailRequests("transcripts(", first=2, status=500)
+            messages = run_sync(dict(config, http_cache_mode=RECORD), {}, stream_names)
+
+            requests = FailRequests("", count=0)
+            self.server.fail = requests
+            replayed_messages = run_sync(dict(config, http_cache_mode=REPLAY), {}, stream_names)
+            self.assertEqual(requests.requests, 0)
+
+        for stream_name in stream_names:
+            self.assertTrue(get_records(messages, stream_name))
+            self.assertEqual(get_records(replayed_messages, stream_name), get_records(messages, stream_name))
@@ -0,0 +1,51 @@
+from helpers import Dataset, FailRequests, MockServerTestCase, get_records, run_sync
+
+from tap_fireflies.client import FirefliesInvalidArgumentError
+from tap_fireflies.streams import PENDING_SUMMARIES_KEY
+
+LOOKUPS_QUERY = "transcript(id"
+
+
+class TestLookupBatches(MockServerTestCase):
+    """
+    The transcripts are looked up by id with aliased `transcript` queries, see `FirefliesClient.iter_batches`.
+    """
+
+    def test_lookups_packed_in_batches(self):
+        lookups = FailRequests(LOOKUPS_QUERY, count=0)
+        self.server.fail = lookups
+        messages = run_sync(self.get_config(lookup_batch_size=10, summary_refetch_batch_size=100),
+                            self.get_pending_state(range(60)), ["transcripts"])
+
+        self.assertEqual([record["id"] for record in get_records(messages, "transcripts")],
+                         [Dataset.get_id(index) for index in range(60)])
+        # The batches grow after each response
+        self.assertEqual([len(body["variables"]) for body in lookups.bodies], [10, 11, 12, 13, 14])
+
+    def test_failed_lookups_in_a_batch(self):
+        # The unknown ids are null with an `object_not_found` error, the other lookups of the batch are kept
+        state = self.get_pending_state(range(10))
+        state["bookmarks"]["transcripts"][PENDING_SUMMARIES_KEY].update(
+            {"transcript-9999999{}".format(index): self.server.dataset.dates[0] for index in range(3)})
+        lookups = FailRequests(LOOKUPS_QUERY, count=0)
+        self.server.fail = lookups
+
+        messages = run_sync(self.get_config(lookup_batch_size=20), state, ["transcripts"])
+        self.assertEqual({record["id"] for record in get_records(messages, "transcripts")},
+                         {Dataset.get_id(index) for index in range(10)})
+        self.assertEqual(lookups.requests, 1)
+
+    def test_failed_batch_split(self):
+        lookups = FailRequests(LOOKUPS_QUERY, first=1, count=2, status=500)
+        self.server.fail = lookups
+        messages = run_sync(self.get_config(lookup_batch_size=20), self.get_pending_state(range(30)), ["transcripts"])
+
+        self.assertEqual([record["id"] for record in get_records(messages, "transcripts")],
+                         [Dataset.get_id(index) for index in range(30)])
+        self.assertEqual([len(body["variables"]) for body in lookups.bodies][:4], [20, 10, 5, 6])
+
+    def test_batch_errors_not_retried(self):
+        self.server.fail = FailRequests(LOOKUPS_QUERY, status=400)
+        run_sync(self.get_config(lookup_batch_size=20), self.get_pending_state(range(30)), ["transcripts"],
+                 expected_error=FirefliesInvalidArgumentError)
+        self.assertEqual(self.server.fail.requests, 1)
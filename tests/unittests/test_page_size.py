@@ -0,0 +1,38 @@
+from helpers import Dataset, FailRequests, MockServerTestCase, get_records, run_sync
+
+from tap_fireflies.client import FirefliesInvalidArgumentError
+
+TRANSCRIPTS_QUERY = "transcripts("
+
+
+class TestPageSize(MockServerTestCase):
+    """
+    A page of transcripts which failed is requested again with half its size, see `Transcripts.request_page`.
+    """
+
+    def get_limits(self, pages):
+        return [body["variables"]["limit"] for body in pages.bodies]
+
+    def test_page_shrunk_on_server_errors(self):
+        for settings in [{}, {"stream_json": True}]:
+            with self.subTest(**settings):
+                pages = FailRequests(TRANSCRIPTS_QUERY, first=2, count=2, status=500)
+                self.server.fail = pages
+                messages = run_sync(self.get_config(page_size=40, **settings), {}, ["transcripts"])
+
+                ids = [record["id"] for record in get_records(messages, "transcripts")]
+                self.assertEqual(sorted(ids), sorted(Dataset.get_id(index) for index in range(self.num_transcripts)))
+                # Then grows again after each page
+                self.assertEqual(self.get_limits(pages)[:5], [40, 45, 22, 11, 16])
+
+    def test_page_size_kept_without_errors(self):
+        pages = FailRequests(TRANSCRIPTS_QUERY, count=0)
+        self.server.fail = pages
+        run_sync(self.get_config(page_size=20), {}, ["transcripts"])
+        self.assertEqual(self.get_limits(pages), [20, 25, 30, 35])
+
+    def test_page_not_shrunk_on_client_errors(self):
+        pages = FailRequests(TRANSCRIPTS_QUERY, first=2, status=400)
+        self.server.fail = pages
+        run_sync(self.get_config(page_size=40), {}, ["transcripts"], expected_error=FirefliesInvalidArgumentError)
+        self.assertEqual(self.get_limits(pages), [40, 45])
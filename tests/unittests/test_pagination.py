@@ -0,0 +1,95 @@
+import unittest
+
+from helpers import (Dataset, FailRequests, MockFirefliesServer, get_config, get_covered_keys, get_records,
+                     get_states, run_sync)
+
+from tap_fireflies.client import FirefliesInvalidArgumentError
+from tap_fireflies.streams import CHECKPOINT_KEY
+
+# 3 dates of 120 transcripts and a newest date of 40 transcripts, more than a page share each date
+NUM_TRANSCRIPTS = 400
+TIES = 120
+TRANSCRIPTS_QUERY = "transcripts("
+# Around the dates of the mock transcripts, so the backfill windows are few
+START_DATE = "2020-09-13T12:00:00Z"
+END_DATE = "2020-09-13T13:00:00Z"
+
+
+def get_covered_ids(messages):
+    return get_covered_keys(messages, "transcripts", lambda record: record["id"])
+
+
+class TestTiesPagination(unittest.TestCase):
+    """
+    Transcripts sharing the same `date` across several pages are all synced once, see `Transcripts.get_pages`.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = Dataset(num_transcripts=NUM_TRANSCRIPTS, num_sentences=1, date_distribution="ties", ties=TIES)
+        cls.server = MockFirefliesServer(cls.dataset).start()
+        cls.all_ids = {Dataset.get_id(index) for index in range(NUM_TRANSCRIPTS)}
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def tearDown(self):
+        self.server.fail = None
+
+    def get_config(self, **settings):
+        return get_config(self.server, start_date=START_DATE, end_date=END_DATE, **settings)
+
+    def assert_synced_once(self, messages, expected_ids):
+        ids = [record["id"] for record in get_records(messages, "transcripts")]
+        self.assertEqual(len(ids), len(set(ids)), "duplicated transcripts")
+        self.assertEqual(set(ids), expected_ids)
+
+    def test_ties_larger_than_a_page(self):
+        for settings in [{},
+                         {"page_size": 7},
+                         {"stream_json": True},
+                         {"backfill_workers": 3, "backfill_window_days": 0.0005},
+                         {"backfill_workers": 3, "backfill_window_days": 0.0005, "stream_json": True, "page_size": 20}]:
+            with self.subTest(**settings):
+                messages = run_sync(self.get_config(**settings), {}, ["transcripts"])
+                self.assert_synced_once(messages, self.all_ids)
+
+    def test_skip_across_pages_of_changing_size(self):
+        # The pages grow from 3 transcripts, and the 4th and 5th requests fail and are sent again with smaller
+        # pages, so `skip` moves across pages of different sizes within the same `date`
+        for status in [None, 500]:
+            with self.subTest(status=status):
+                self.server.fail = FailRequests(TRANSCRIPTS_QUERY, first=4, count=2 if status else 0, status=status)
+                messages = run_sync(self.get_config(page_size=3), {}, ["transcripts"])
+                self.assert_synced_once(messages, self.all_ids)
+                self.assertEqual(self.server.fail.failed, 2 if status else 0)
+
+    def test_resume_from_a_checkpoint_within_a_date(self):
+        # The 4th page fails: the last checkpoint is after the 2nd page, 60 transcripts into the second date
+        self.server.fail = FailRequests(TRANSCRIPTS_QUERY, first=4, count=1, status=400)
+        messages = run_sync(self.get_config(page_size=50), {}, ["transcripts"],
+                            expected_error=FirefliesInvalidArgumentError)
+
+        state = get_states(messages)[-1]
+        checkpoint = state["bookmarks"]["transcripts"][CHECKPOINT_KEY]
+        self.assertEqual(checkpoint["to_date_ms"], self.dataset.dates[-1] - 60000)
+        self.assertEqual(len(checkpoint["visited_ids"]), 60)
+        covered_ids = get_covered_ids(messages)
+        self.assertTrue(set(checkpoint["visited_ids"]) <= covered_ids)
+
+        self.server.fail = None
+        resumed_messages = run_sync(self.get_config(page_size=50), state, ["transcripts"])
+        self.assert_synced_once(resumed_messages, self.all_ids - covered_ids)
+        self.assertNotIn(CHECKPOINT_KEY, get_states(resumed_messages)[-1]["bookmarks"]["transcripts"])
+
+    def test_resume_with_another_page_size(self):
+        self.server.fail = FailRequests(TRANSCRIPTS_QUERY, first=5, count=1, status=400)
+        messages = run_sync(self.get_config(page_size=30), {}, ["transcripts"],
+                            expected_error=FirefliesInvalidArgumentError)
+        state = get_states(messages)[-1]
+        self.assertTrue(state["bookmarks"]["transcripts"][CHECKPOINT_KEY]["visited_ids"])
+
+        self.server.fail = None
+        resumed_messages = run_sync(self.get_config(page_size=45), state, ["transcripts"])
+        self.assert_synced_once(resumed_messages, self.all_ids - get_covered_ids(messages))
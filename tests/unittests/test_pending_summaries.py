@@ -0,0 +1,67 @@
+from helpers import Dataset, FailRequests, MockServerTestCase, get_records, get_states, run_sync
+
+from tap_fireflies.streams import PENDING_SUMMARIES_KEY
+
+LOOKUPS_QUERY = "transcript(id"
+
+
+class TestPendingSummaries(MockServerTestCase):
+    """
+    The transcripts whose summary is processing are re-fetched by the next syncs until it is done, see
+    `Transcripts.sync_pending_summaries`.
+    """
+
+    def test_processing_summaries_queued_then_refetched(self):
+        for index in [3, 40, 90]:
+            self.server.dataset.set_summary_status(index, "processing")
+        messages = run_sync(self.get_config(), {}, ["transcripts"])
+        state = get_states(messages)[-1]
+        self.assertEqual(state["bookmarks"]["transcripts"][PENDING_SUMMARIES_KEY],
+                         {Dataset.get_id(index): self.server.dataset.dates[index] for index in [3, 40, 90]})
+
+        # Only the newest transcript is at the bookmark and returned again by the pages
+        self.server.dataset.set_summary_status(40, "processed")
+        messages = run_sync(self.get_config(), state, ["transcripts"])
+        records = {record["id"]: record for record in get_records(messages, "transcripts")}
+        self.assertEqual(set(records), {Dataset.get_id(index) for index in [3, 40, 90, self.num_transcripts - 1]})
+        self.assertEqual(records[Dataset.get_id(40)]["meeting_info"]["summary_status"], "processed")
+        self.assertEqual(get_states(messages)[-1]["bookmarks"]["transcripts"][PENDING_SUMMARIES_KEY],
+                         {Dataset.get_id(index): self.server.dataset.dates[index] for index in [3, 90]})
+
+    def test_pending_summaries_in_every_state(self):
+        self.server.dataset.set_summary_status(self.num_transcripts - 1, "processing")
+        messages = run_sync(self.get_config(page_size=10), {}, ["transcripts"])
+        states = get_states(messages)
+        self.assertTrue(len(states) > 5)
+        for state in states[1:]:
+            self.assertEqual(list(state["bookmarks"]["transcripts"][PENDING_SUMMARIES_KEY]),
+                             [Dataset.get_id(self.num_transcripts - 1)])
+
+    def test_old_and_deleted_transcripts_dropped(self):
+        state = self.get_pending_state([5, 6])
+        state["bookmarks"]["transcripts"][PENDING_SUMMARIES_KEY]["transcript-99999999"] = self.server.dataset.dates[7]
+        lookups = FailRequests(LOOKUPS_QUERY, count=0)
+        self.server.fail = lookups
+
+        messages = run_sync(self.get_config(), state, ["transcripts"])
+        self.assertEqual({record["id"] for record in get_records(messages, "transcripts")},
+                         {Dataset.get_id(5), Dataset.get_id(6)})
+        self.assertEqual(get_states(messages)[-1]["bookmarks"]["transcripts"][PENDING_SUMMARIES_KEY], {})
+        self.assertEqual(lookups.requests, 1)
+
+        # Older than `summary_refetch_max_age_days`, without any request
+        lookups = FailRequests(LOOKUPS_QUERY, count=0)
+        self.server.fail = lookups
+        messages = run_sync(dict(self.get_config(), summary_refetch_max_age_days=1), self.get_pending_state([5, 6]),
+                            ["transcripts"])
+        self.assertEqual(get_records(messages, "transcripts"), [])
+        self.assertEqual(get_states(messages)[-1]["bookmarks"]["transcripts"][PENDING_SUMMARIES_KEY], {})
+        self.assertEqual(lookups.requests, 0)
+
+    def test_state_after_each_refetch_batch(self):
+        messages = run_sync(self.get_config(summary_refetch_batch_size=10), self.get_pending_state(range(35)),
+                            ["transcripts"])
+        pending_counts = [len(state["bookmarks"]["transcripts"][PENDING_SUMMARIES_KEY])
+                          for state in get_states(messages)]
+        self.assertEqual([count for index, count in enumerate(pending_counts)
+                          if index == 0 or count != pending_counts[index - 1]], [35, 25, 15, 5, 0])
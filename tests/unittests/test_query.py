@@ -0,0 +1,135 @@
+import unittest
+
+from singer import metadata
+
+from tap_fireflies.query import build_batch_query, build_query, build_selection_set, is_field_selected
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": ["null", "string"]},
+        "date": {"type": ["null", "integer"]},
+        "title": {"type": ["null", "string"]},
+        "participants": {"type": ["null", "array"], "items": {"type": ["null", "string"]}},
+        "speakers": {
+            "type": ["null", "array"],
+            "items": {
+                "type": ["null", "object"],
+                "properties": {"id": {"type": ["null", "string"]}, "name": {"type": ["null", "string"]}},
+            },
+        },
+        "meeting_info": {
+            "type": ["null", "object"],
+            "properties": {"summary_status": {"type": ["null", "string"]}},
+        },
+        "extra": {"type": ["null", "object"]},
+    },
+}
+
+
+def get_metadata(**breadcrumbs):
+    """
+    Returns a metadata map with `id` and `date` automatic and the given metadata of the other breadcrumbs.
+    """
+    stream_metadata = {
+        (): {"selected": True},
+        ("properties", "id"): {"inclusion": "automatic"},
+        ("properties", "date"): {"inclusion": "automatic"},
+    }
+    for breadcrumb, entry in breadcrumbs.items():
+        stream_metadata[tuple(breadcrumb.split("."))] = entry
+    return stream_metadata
+
+
+class TestSelectionSet(unittest.TestCase):
+
+    def test_all_fields_without_metadata(self):
+        self.assertEqual(build_selection_set(SCHEMA), [
+            "    id",
+            "    date",
+            "    title",
+            "    participants",
+            "    speakers {",
+            "        id",
+            "        name",
+            "    }",
+            "    meeting_info {",
+            "        summary_status",
+            "    }",
+            "    extra",
+        ])
+
+    def test_deselected_and_unsupported_fields_pruned(self):
+        stream_metadata = get_metadata(**{
+            "properties.title": {"selected": False},
+            "properties.participants": {"inclusion": "unsupported"},
+            "properties.speakers.items.properties.name": {"selected": False},
+            "properties.extra": {"selected": False},
+        })
+        self.assertEqual(build_selection_set(SCHEMA, stream_metadata), [
+            "    id",
+            "    date",
+            "    speakers {",
+            "        id",
+            "    }",
+            "    meeting_info {",
+            "        summary_status",
+            "    }",
+        ])
+
+    def test_automatic_fields_kept(self):
+        stream_metadata = get_metadata(**{"properties.id": {"inclusion": "automatic", "selected": False}})
+        self.assertTrue(is_field_selected(stream_metadata, ("properties", "id")))
+        self.assertIn("    id", build_selection_set(SCHEMA, stream_metadata))
+
+    def test_object_without_selected_fields_dropped(self):
+        stream_metadata = get_metadata(**{
+            "properties.meeting_info.properties.summary_status": {"selected": False},
+            "properties.speakers.items.properties.id": {"selected": False},
+            "properties.speakers.items.properties.name": {"selected": False},
+        })
+        lines = build_selection_set(SCHEMA, stream_metadata)
+        self.assertNotIn("    meeting_info {", lines)
+        self.assertNotIn("    speakers {", lines)
+        self.assertIn("    title", lines)
+
+    def test_only_automatic(self):
+        self.assertEqual(build_selection_set(SCHEMA, get_metadata(), only_automatic=True), ["    id", "    date"])
+        self.assertEqual(build_selection_set(SCHEMA, None, only_automatic=True), [])
+
+
+class TestQueries(unittest.TestCase):
+
+    def test_query(self):
+        stream_metadata = get_metadata(**{"properties.title": {"selected": False}})
+        query = build_query("Transcripts", "transcripts", SCHEMA, stream_metadata,
+                            variable_definitions={"limit": "Int", "skip": "Int"}, arguments=["limit", "skip"],
+                            only_automatic=True)
+        self.assertEqual(query, "\n".join([
+            "query Transcripts($limit: Int, $skip: Int) {",
+            "    transcripts(limit: $limit, skip: $skip) {",
+            "        id",
+            "        date",
+            "    }",
+            "}",
+        ]))
+
+    def test_query_from_catalog_metadata(self):
+        stream_metadata = metadata.to_map(metadata.get_standard_metadata(schema=SCHEMA, key_properties=["id"]))
+        query = build_query("Transcripts", "transcripts", SCHEMA, stream_metadata)
+        self.assertIn("        title", query.splitlines())
+
+    def test_batch_query(self):
+        schema = {"type": "object", "properties": {"id": {"type": "string"}, "title": {"type": "string"}}}
+        self.assertEqual(build_batch_query("Transcripts", "transcript", schema, size=2), "\n".join([
+            "query Transcripts($id0: String!, $id1: String!) {",
+            "    item0: transcript(id: $id0) {",
+            "        id",
+            "        title",
+            "    }",
+            "    item1: transcript(id: $id1) {",
+            "        id",
+            "        title",
+            "    }",
+            "}",
+        ]))
@@ -0,0 +1,107 @@
+import email.utils
+import unittest
+
+import requests
+import simplejson
+
+from tap_fireflies.client import FirefliesRateLimitError, Server5xxError, check_response
+from tap_fireflies.rate_limit import RateLimiter, parse_retry_after
+
+NOW = 1700000000.0
+
+
+def make_response(status_code, body=None, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = simplejson.dumps(body or {}).encode("utf-8")  # pylint: disable=protected-access
+    response.headers.update(headers or {})
+    return response
+
+
+class TestParseRetryAfter(unittest.TestCase):
+
+    def test_hints(self):
+        for value, expected in [(None, None), ("", None), ("abc", None), ("0", 0.0), ("2.5", 2.5), (3, 3.0),
+                                ("-1", 0.0), (str(NOW + 10), 10.0), (str((NOW + 10) * 1000), 10.0),
+                                (str(NOW - 10), 0.0), (email.utils.formatdate(NOW + 30, usegmt=True), 30.0)]:
+            with self.subTest(value=value):
+                self.assertEqual(parse_retry_after(value, now=NOW), expected)
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_burst_then_rate(self):
+        limiter = RateLimiter(60, 60, burst=2)
+        self.assertEqual(limiter.reserve(), 0)
+        self.assertEqual(limiter.reserve(), 0)
+        # One request per second once the burst is used
+        self.assertAlmostEqual(limiter.reserve(), 1, places=2)
+        self.assertAlmostEqual(limiter.reserve(), 2, places=2)
+
+    def test_block(self):
+        limiter = RateLimiter(60, 60, burst=5)
+        limiter.block(10)
+        self.assertAlmostEqual(limiter.get_blocked_wait(), 10, places=2)
+        # The burst is lost, the requests are sent at the rate once the block is over
+        self.assertAlmostEqual(limiter.reserve(), 11, places=2)
+        # A shorter block does not shorten the current one
+        limiter.block(1)
+        self.assertAlmostEqual(limiter.get_blocked_wait(), 10, places=2)
+
+    def test_penalize_and_reward(self):
+        limiter = RateLimiter(60, 60)
+        limiter.penalize(5)
+        self.assertEqual(limiter.rate, 0.5)
+        self.assertAlmostEqual(limiter.get_blocked_wait(), 5, places=2)
+        for _ in range(5):
+            limiter.penalize(0)
+        self.assertEqual(limiter.rate, 0.1)
+        for _ in range(100):
+            limiter.reward()
+        self.assertEqual(limiter.rate, 1)
+
+    def test_penalize_without_hint(self):
+        limiter = RateLimiter(60, 60)
+        limiter.penalize()
+        self.assertAlmostEqual(limiter.get_blocked_wait(), 60, places=2)
+
+    def test_update_from_headers(self):
+        for headers, expected in [({}, 0), ({"Retry-After": "3"}, 3), ({"X-RateLimit-Remaining": "5"}, 0),
+                                  ({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "4"}, 4),
+                                  ({"X-RateLimit-Remaining": "1", "X-RateLimit-Reset": "4"}, 0)]:
+            with self.subTest(headers=headers):
+                limiter = RateLimiter(60, 60)
+                limiter.update_from_headers(headers)
+                self.assertAlmostEqual(limiter.get_blocked_wait(), expected, places=2)
+
+
+class TestCheckResponse(unittest.TestCase):
+
+    def test_rate_limit_errors(self):
+        for response in [make_response(429, headers={"Retry-After": "7"}),
+                         make_response(429, body={"errors": [{"message": "Slow down"}]}, headers={"Retry-After": "7"}),
+                         make_response(429, body={"errors": [{
+                             "message": "Too many requests",
+                             "code": "too_many_requests",
+                             "extensions": {"status": 429, "metadata": {"retryAfter": "7"}},
+                         }]})]:
+            with self.subTest(body=response.content):
+                limiter = RateLimiter(60, 60)
+                with self.assertRaises(FirefliesRateLimitError):
+                    check_response(response, limiter)
+                self.assertEqual(limiter.rate, 0.5)
+                self.assertAlmostEqual(limiter.get_blocked_wait(), 7, places=2)
+
+    def test_server_error_with_retry_after(self):
+        limiter = RateLimiter(60, 60)
+        with self.assertRaises(Server5xxError):
+            check_response(make_response(503, headers={"Retry-After": "4"}), limiter)
+        self.assertEqual(limiter.rate, 1)
+        self.assertAlmostEqual(limiter.get_blocked_wait(), 4, places=2)
+
+    def test_success(self):
+        limiter = RateLimiter(60, 60)
+        limiter.penalize(0)
+        check_response(make_response(200, body={"data": {}}, headers={"X-RateLimit-Remaining": "10"}), limiter)
+        self.assertAlmostEqual(limiter.rate, 0.55)
+        self.assertEqual(limiter.get_blocked_wait(), 0)
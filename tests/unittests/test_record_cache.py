@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from tap_fireflies import record_cache
+from tap_fireflies.record_cache import RecordHashCache
+
+
+class TestRecordHashCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "records.db")
+        # One second per call, so the records are seen one after the other
+        patcher = mock.patch.object(record_cache.time, "time", side_effect=range(1000))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_changed_after_commit(self):
+        with RecordHashCache(self.path) as cache:
+            self.assertTrue(cache.is_changed("transcripts", "a", "1"))
+            cache.update("transcripts", "a", "1")
+            self.assertFalse(cache.is_changed("transcripts", "a", "1"))
+            self.assertTrue(cache.is_changed("transcripts", "a", "2"))
+            cache.commit("transcripts")
+
+        with RecordHashCache(self.path) as cache:
+            self.assertFalse(cache.is_changed("transcripts", "a", "1"))
+            self.assertTrue(cache.is_changed("transcript_sentences", "a", "1"))
+            self.assertEqual(cache.skipped, 1)
+
+    def test_updates_discarded_without_commit(self):
+        with RecordHashCache(self.path) as cache:
+            cache.update("transcripts", "a", "1")
+            cache.update("users", "b", "1")
+            cache.commit("users")
+
+        with RecordHashCache(self.path) as cache:
+            self.assertTrue(cache.is_changed("transcripts", "a", "1"))
+            self.assertFalse(cache.is_changed("users", "b", "1"))
+
+    def test_least_recently_seen_evicted(self):
+        with RecordHashCache(self.path, max_entries=2) as cache:
+            cache.update("transcripts", "a", "1")
+            cache.update("transcripts", "b", "1")
+            cache.commit()
+            # `a` is seen again unchanged, `b` is not
+            self.assertFalse(cache.is_changed("transcripts", "a", "1"))
+            cache.commit()
+            cache.update("transcripts", "c", "1")
+            cache.commit()
+
+            self.assertFalse(cache.is_changed("transcripts", "a", "1"))
+            self.assertTrue(cache.is_changed("transcripts", "b", "1"))
+            self.assertFalse(cache.is_changed("transcripts", "c", "1"))
+
+    def test_namespaces(self):
+        with RecordHashCache(self.path, max_entries=1, namespace="sales") as sales, \
+                RecordHashCache(self.path, max_entries=1, namespace="support") as support:
+            sales.update("transcripts", "a", "1")
+            sales.commit()
+            support.update("transcripts", "a", "2")
+            support.update("transcripts", "b", "2")
+            support.commit()
+
+            self.assertFalse(sales.is_changed("transcripts", "a", "1"))
+            self.assertTrue(support.is_changed("transcripts", "a", "2"))
+            self.assertFalse(support.is_changed("transcripts", "b", "2"))
+
+        with RecordHashCache(self.path, rebuild=True, namespace="support") as support, \
+                RecordHashCache(self.path, namespace="sales") as sales:
+            self.assertTrue(support.is_changed("transcripts", "b", "2"))
+            self.assertFalse(sales.is_changed("transcripts", "a", "1"))
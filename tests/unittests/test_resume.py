@@ -0,0 +1,131 @@
+import tempfile
+import unittest
+
+from helpers import (Dataset, FailRequests, MockFirefliesServer, get_config, get_covered_keys, get_records,
+                     get_states, run_sync)
+
+from tap_fireflies.client import FirefliesInvalidArgumentError
+from tap_fireflies.streams import CHECKPOINT_KEY, PENDING_SUMMARIES_KEY, RECORD_HASHES_KEY
+
+NUM_TRANSCRIPTS = 300
+NUM_SENTENCES = 2
+TRANSCRIPTS_QUERY = "transcripts("
+LOOKUPS_QUERY = "transcript(id"
+START_DATE = "2020-09-13T12:00:00Z"
+END_DATE = "2020-09-13T18:00:00Z"
+
+
+def get_transcript_key(record):
+    return record["id"]
+
+
+def get_sentence_key(record):
+    return record["transcript_id"], record["index"]
+
+
+class TestResume(unittest.TestCase):
+    """
+    A sync which crashed is resumed from its last STATE message: the records written before it are not written
+    again, and none of the others is missed.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockFirefliesServer(Dataset(num_transcripts=NUM_TRANSCRIPTS, num_sentences=NUM_SENTENCES)).start()
+        cls.transcript_ids = {Dataset.get_id(index) for index in range(NUM_TRANSCRIPTS)}
+        cls.sentence_keys = {(transcript_id, index) for transcript_id in cls.transcript_ids
+                             for index in range(NUM_SENTENCES)}
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        self.server.dataset = Dataset(num_transcripts=NUM_TRANSCRIPTS, num_sentences=NUM_SENTENCES)
+
+    def tearDown(self):
+        self.server.fail = None
+
+    def get_config(self, **settings):
+        return get_config(self.server, start_date=START_DATE, end_date=END_DATE, **settings)
+
+    def crash_and_resume(self, config, stream_names, fail, state=None):
+        """
+        Runs a sync failing with `fail`, then resumes it from its last state, and returns the messages of both.
+        """
+        self.server.fail = fail
+        messages = run_sync(config, state or {}, stream_names, expected_error=FirefliesInvalidArgumentError)
+        self.assertEqual(fail.failed, 1)
+
+        self.server.fail = None
+        resumed_messages = run_sync(config, get_states(messages)[-1], stream_names)
+        return messages, resumed_messages
+
+    def assert_resumed(self, messages, resumed_messages, stream_name, key, expected_keys):
+        covered_keys = get_covered_keys(messages, stream_name, key)
+        self.assertTrue(covered_keys, "no {} before the crash".format(stream_name))
+        resumed_keys = [key(record) for record in get_records(resumed_messages, stream_name)]
+        self.assertEqual(len(resumed_keys), len(set(resumed_keys)), "duplicated {}".format(stream_name))
+        self.assertEqual(set(resumed_keys), expected_keys - covered_keys)
+
+    def test_transcripts_checkpoint(self):
+        # The backfill workers fetch the pages of the first 2 windows ahead of the sync, the 8th page fails
+        # once pages of the first window are synced
+        for failed_page, settings in [(4, {"page_size": 50}),
+                                      (4, {"page_size": 50, "stream_json": True}),
+                                      (8, {"page_size": 20, "backfill_workers": 2, "backfill_window_days": 0.05})]:
+            with self.subTest(**settings):
+                messages, resumed_messages = self.crash_and_resume(self.get_config(**settings), ["transcripts"],
+                                                                   FailRequests(TRANSCRIPTS_QUERY, first=failed_page))
+                self.assertIn(CHECKPOINT_KEY, get_states(messages)[-1]["bookmarks"]["transcripts"])
+                self.assert_resumed(messages, resumed_messages, "transcripts", get_transcript_key, self.transcript_ids)
+                self.assertNotIn(CHECKPOINT_KEY, get_states(resumed_messages)[-1]["bookmarks"]["transcripts"])
+
+    def test_transcripts_and_sentences_checkpoint(self):
+        stream_names = ["transcripts", "transcript_sentences"]
+        messages, resumed_messages = self.crash_and_resume(self.get_config(page_size=50), stream_names,
+                                                           FailRequests(TRANSCRIPTS_QUERY, first=4))
+        checkpoint = get_states(messages)[-1]["bookmarks"]["transcripts"][CHECKPOINT_KEY]
+        self.assertEqual(set(checkpoint["max_dates"]), set(stream_names))
+        self.assert_resumed(messages, resumed_messages, "transcripts", get_transcript_key, self.transcript_ids)
+        self.assert_resumed(messages, resumed_messages, "transcript_sentences", get_sentence_key, self.sentence_keys)
+
+        bookmarks = get_states(resumed_messages)[-1]["bookmarks"]
+        self.assertEqual(bookmarks["transcripts"]["date"], bookmarks["transcript_sentences"]["date"])
+
+    def test_checkpoint_with_record_cache(self):
+        # The hashes of the records written after the last STATE message are not kept, so they are written again
+        with tempfile.TemporaryDirectory() as cache_dir:
+            config = self.get_config(page_size=50, record_cache_path="{}/records.db".format(cache_dir))
+            messages, resumed_messages = self.crash_and_resume(config, ["transcripts"],
+                                                               FailRequests(TRANSCRIPTS_QUERY, first=4))
+        self.assert_resumed(messages, resumed_messages, "transcripts", get_transcript_key, self.transcript_ids)
+
+    def test_pending_summaries_checkpoint(self):
+        pending_ids = sorted(self.transcript_ids)[:60]
+        state = {"bookmarks": {"transcripts": {
+            "date": END_DATE,
+            PENDING_SUMMARIES_KEY: {transcript_id: self.server.dataset.dates[Dataset.get_index(transcript_id)]
+                                    for transcript_id in pending_ids},
+        }}}
+        config = self.get_config(summary_refetch_max_age_days=100000, summary_refetch_batch_size=20,
+                                 lookup_batch_size=20)
+        messages, resumed_messages = self.crash_and_resume(config, ["transcripts"],
+                                                           FailRequests(LOOKUPS_QUERY, first=2), state=state)
+
+        # The summaries are done, the transcripts of the first batch are no longer pending
+        pending_summaries = get_states(messages)[-1]["bookmarks"]["transcripts"][PENDING_SUMMARIES_KEY]
+        self.assertEqual(sorted(pending_summaries), pending_ids[20:])
+        self.assert_resumed(messages, resumed_messages, "transcripts", get_transcript_key, set(pending_ids))
+        self.assertEqual(get_states(resumed_messages)[-1]["bookmarks"]["transcripts"][PENDING_SUMMARIES_KEY], {})
+
+    def test_transcripts_after_users(self):
+        stream_names = ["transcripts", "users"]
+        messages, resumed_messages = self.crash_and_resume(self.get_config(page_size=50), stream_names,
+                                                           FailRequests(TRANSCRIPTS_QUERY, first=4))
+        self.assertEqual(len(get_records(messages, "users")), self.server.dataset.num_users)
+        self.assertIn(RECORD_HASHES_KEY, get_states(messages)[-1]["bookmarks"]["users"])
+
+        # The users are synced first, their hashes are in the state and none of them changed
+        self.assertEqual(get_records(resumed_messages, "users"), [])
+        self.assert_resumed(messages, resumed_messages, "transcripts", get_transcript_key, self.transcript_ids)
@@ -0,0 +1,59 @@
+from helpers import Dataset, FailRequests, MockServerTestCase, get_records, get_states, run_sync
+
+from tap_fireflies.streams import CHECKPOINT_KEY
+
+SENTENCES_QUERY = "query TranscriptSentences("
+STREAM_NAMES = ["transcripts", "transcript_sentences"]
+
+
+class TestSentenceBatches(MockServerTestCase):
+    """
+    The sentences of the transcripts of a page are fetched with aliased `transcript` queries, see
+    `TranscriptSentences.get_records`.
+    """
+
+    def assert_sentences(self, messages):
+        sentence_keys = [(record["transcript_id"], record["index"])
+                         for record in get_records(messages, "transcript_sentences")]
+        self.assertEqual(len(sentence_keys), len(set(sentence_keys)))
+        self.assertEqual({transcript_id for transcript_id, _ in sentence_keys},
+                         {Dataset.get_id(index) for index in range(self.num_transcripts)})
+        # The sentences carry the `date` of their transcript
+        transcript_dates = {record["id"]: record["date"] for record in get_records(messages, "transcripts")}
+        for record in get_records(messages, "transcript_sentences"):
+            self.assertEqual(record["date"], transcript_dates[record["transcript_id"]])
+
+    def test_sentences_fetched_in_batches(self):
+        lookups = FailRequests(SENTENCES_QUERY, count=0)
+        self.server.fail = lookups
+        messages = run_sync(self.get_config(page_size=20, lookup_batch_size=10), {}, STREAM_NAMES)
+
+        self.assert_sentences(messages)
+        # One request per batch of transcripts of a page, instead of one per transcript
+        batch_sizes = [len(body["variables"]) for body in lookups.bodies]
+        self.assertLess(len(batch_sizes), self.num_transcripts / 5)
+        self.assertEqual(sum(batch_sizes), self.num_transcripts)
+        self.assertEqual(batch_sizes[:2], [10, 10])
+
+    def test_sentences_written_before_the_next_state(self):
+        messages = run_sync(self.get_config(page_size=20, lookup_batch_size=10), {}, STREAM_NAMES)
+
+        transcript_ids = set()
+        sentence_transcript_ids = set()
+        for message in messages:
+            if message["type"] == "RECORD" and message["stream"] == "transcripts":
+                transcript_ids.add(message["record"]["id"])
+            elif message["type"] == "RECORD":
+                sentence_transcript_ids.add(message["record"]["transcript_id"])
+            elif message["type"] == "STATE":
+                self.assertEqual(sentence_transcript_ids, transcript_ids)
+        self.assertTrue([state for state in get_states(messages)
+                         if CHECKPOINT_KEY in state.get("bookmarks", {}).get("transcripts", {})])
+
+    def test_failed_batch_split(self):
+        lookups = FailRequests(SENTENCES_QUERY, first=1, count=2, status=500)
+        self.server.fail = lookups
+        messages = run_sync(self.get_config(page_size=20, lookup_batch_size=20), {}, STREAM_NAMES)
+
+        self.assert_sentences(messages)
+        self.assertEqual([len(body["variables"]) for body in lookups.bodies][:4], [20, 10, 5, 6])
@@ -0,0 +1,142 @@
+import datetime
+import logging
+import os
+import subprocess
+import sys
+import threading
+import tracemalloc
+import unittest
+
+from helpers import ROOT_DIR, Dataset, MockFirefliesServer, get_catalog, get_config, get_records, get_states, run_sync
+
+from tap_fireflies.client import FirefliesClient
+from tap_fireflies.streams import Transcripts
+
+TRANSCRIPTS_QUERY = "transcripts("
+START_DATE = "2020-09-13T12:00:00Z"
+END_DATE = "2020-09-13T16:00:00Z"
+
+
+class CutResponses:
+    """
+    The `cut` hook of the mock server, closing the connection in the middle of the responses to the requests
+    whose query contains `query_part`, from the `first`-th one (counted from 1) and for `count` of them.
+    """
+    def __init__(self, query_part, first=1, count=1):
+        self.query_part = query_part
+        self.first = first
+        self.count = count
+        self.requests = 0
+        self.cut = 0
+        self.__lock = threading.Lock()
+
+    def __call__(self, body):
+        if self.query_part not in body.get("query", ""):
+            return None
+        with self.__lock:
+            self.requests += 1
+            if self.first <= self.requests < self.first + self.count:
+                self.cut += 1
+                return 0.5
+        return None
+
+
+class TestStreamJsonCutPages(unittest.TestCase):
+    """
+    With `stream_json`, the transcripts of a page are synced while it is read. A page whose connection fails
+    in the middle of its body is requested again, without writing its first transcripts twice.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockFirefliesServer(Dataset(num_transcripts=200, num_sentences=2, date_distribution="ties",
+                                                 ties=7)).start()
+        cls.all_ids = {Dataset.get_id(index) for index in range(200)}
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def tearDown(self):
+        self.server.cut = None
+
+    def test_cut_page_requested_again(self):
+        for first, count in [(1, 1), (2, 1), (3, 3)]:
+            with self.subTest(first=first, count=count):
+                cut = CutResponses(TRANSCRIPTS_QUERY, first=first, count=count)
+                self.server.cut = cut
+                config = get_config(self.server, start_date=START_DATE, end_date=END_DATE, page_size=20,
+                                    stream_json=True)
+                messages = run_sync(config, {}, ["transcripts", "transcript_sentences"])
+
+                self.assertEqual(cut.cut, count)
+                transcript_ids = [record["id"] for record in get_records(messages, "transcripts")]
+                self.assertEqual(len(transcript_ids), len(set(transcript_ids)))
+                self.assertEqual(set(transcript_ids), self.all_ids)
+                sentence_keys = [(record["transcript_id"], record["index"])
+                                 for record in get_records(messages, "transcript_sentences")]
+                self.assertEqual(len(sentence_keys), len(set(sentence_keys)))
+                self.assertEqual(len(sentence_keys), 2 * len(self.all_ids))
+
+                # A checkpoint is only written once a page is read whole
+                for state in get_states(messages):
+                    checkpoint = state.get("bookmarks", {}).get("transcripts", {}).get("checkpoint")
+                    if checkpoint:
+                        self.assertLessEqual(set(checkpoint["visited_ids"]), set(transcript_ids))
+
+
+class TestStreamJsonMemory(unittest.TestCase):
+    """
+    With `stream_json`, only one transcript of a page is in memory at a time.
+    """
+    num_transcripts = 100
+    page_size = 50
+
+    @classmethod
+    def setUpClass(cls):
+        # In another process, so its memory is not traced
+        cls.process = subprocess.Popen([sys.executable, os.path.join(ROOT_DIR, "benchmarks", "mock_server.py"),
+                                        "--transcripts", str(cls.num_transcripts), "--sentences", "200"],
+                                       stdout=subprocess.PIPE, text=True)
+        cls.url = cls.process.stdout.readline().strip()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.process.terminate()
+        cls.process.wait()
+        cls.process.stdout.close()
+
+    def get_memory(self, **settings):
+        """
+        Returns the peak memory traced while the transcripts are synced, and the memory traced at each of them,
+        above the memory before the sync.
+        """
+        config = dict(page_size=self.page_size, end_date="2020-09-14T00:00:00Z", **settings)
+        stream = Transcripts(FirefliesClient("token", None, rate_limit_per_minute=1000000,
+                                             rate_limit_burst=1000000, base_url=self.url),
+                             get_catalog(["transcripts"]),
+                             ["transcripts"],
+                             config)
+        from_datetime = datetime.datetime(2020, 9, 13, tzinfo=datetime.timezone.utc)
+
+        logging.disable(logging.INFO)
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            memory = [tracemalloc.get_traced_memory()[0] - baseline for _ in stream.get_records(from_datetime)]
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+            logging.disable(logging.NOTSET)
+        self.assertEqual(len(memory), self.num_transcripts)
+        return peak, memory
+
+    def test_memory_flat_per_page(self):
+        page_peak, _ = self.get_memory()
+        peak, memory = self.get_memory(stream_json=True)
+        # About one decoded transcript and the read buffers instead of the decoded page of 50 transcripts
+        self.assertLess(peak * 5, page_peak)
+        # The memory does not grow from one page to the next
+        first_page = memory[:self.page_size]
+        for page_start in range(0, self.num_transcripts, self.page_size):
+            self.assertLess(max(memory[page_start:page_start + self.page_size]), 2 * max(first_page))
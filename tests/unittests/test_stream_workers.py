@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from helpers import (Dataset, MockServerTestCase, get_records, get_states, run_sync)
+
+from tap_fireflies.client import FirefliesInvalidArgumentError
+from tap_fireflies.streams import CHECKPOINT_KEY, RECORD_HASHES_KEY
+
+STREAM_NAMES = ["users", "transcripts", "transcript_sentences"]
+
+
+class InterleaveStreams:
+    """
+    The `fail` hook of the mock server holding the users request until the `release`-th transcripts page is
+    requested, so the users are written after the records of the previous page and before its checkpoint.
+    The `fail`-th page fails once the users are written.
+    """
+    def __init__(self, release, fail=None):
+        self.release = release
+        self.fail = fail
+        self.requests = 0
+        self.released = threading.Event()
+        self.__lock = threading.Lock()
+
+    def __call__(self, body):
+        query = body.get("query", "")
+        if query.startswith("query Users"):
+            self.released.wait(10)
+        elif query.startswith("query Transcripts("):
+            with self.__lock:
+                self.requests += 1
+                requests = self.requests
+            if requests == self.release:
+                self.released.set()
+            if requests == self.fail:
+                # The users are written in the meantime
+                time.sleep(0.2)
+                return 400
+        return None
+
+
+def get_covered_transcript_ids(state, dataset):
+    """
+    Returns the ids of the transcripts a sync resumed from `state` does not write again.
+    """
+    bookmark = state.get("bookmarks", {}).get("transcripts", {})
+    if CHECKPOINT_KEY in bookmark:
+        checkpoint = bookmark[CHECKPOINT_KEY]
+        return {Dataset.get_id(index) for index, date in enumerate(dataset.dates)
+                if date > checkpoint["to_date_ms"]} | set(checkpoint["visited_ids"])
+    if "date" in bookmark:
+        return {Dataset.get_id(index) for index in range(len(dataset.dates))}
+    return set()
+
+
+class TestStreamWorkers(MockServerTestCase):
+    """
+    With `stream_workers`, the streams are synced concurrently and their STATE messages are merged.
+    """
+
+    def test_states_only_hold_written_records(self):
+        self.server.fail = InterleaveStreams(release=3)
+        messages = run_sync(self.get_config(page_size=20, stream_workers=2), {}, STREAM_NAMES)
+
+        written = {stream_name: set() for stream_name in STREAM_NAMES}
+        for message in messages:
+            if message["type"] == "RECORD":
+                record = message["record"]
+                written[message["stream"]].add(record.get("transcript_id") or record.get("id")
+                                               or record.get("user_id"))
+            elif message["type"] == "STATE":
+                state = message["value"]
+                users_bookmark = state.get("bookmarks", {}).get("users", {})
+                self.assertLessEqual(set(users_bookmark.get(RECORD_HASHES_KEY, {})), written["users"])
+                covered_ids = get_covered_transcript_ids(state, self.server.dataset)
+                self.assertLessEqual(covered_ids, written["transcripts"])
+                self.assertLessEqual(covered_ids, written["transcript_sentences"])
+
+        # The users were written while the transcripts were synced
+        states = get_states(messages)
+        first_users_state = next(index for index, state in enumerate(states) if "users" in state.get("bookmarks", {}))
+        self.assertIn(CHECKPOINT_KEY, states[first_users_state]["bookmarks"].get("transcripts", {}))
+        self.assertEqual(len(written["users"]), self.server.dataset.num_users)
+        self.assertEqual(len(written["transcripts"]), self.num_transcripts)
+
+    def test_record_cache_committed_per_stream(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_path = os.path.join(cache_dir, "records.db")
+            config = self.get_config(page_size=20, stream_workers=2, record_cache_path=cache_path)
+            self.server.fail = InterleaveStreams(release=3, fail=3)
+            messages = run_sync(config, {}, STREAM_NAMES, expected_error=FirefliesInvalidArgumentError)
+
+            # The STATE messages of the users did not commit the hashes of the transcripts written after the
+            # last checkpoint of the transcripts
+            state = get_states(messages)[-1]
+            self.assertIn(RECORD_HASHES_KEY, state["bookmarks"]["users"])
+            with sqlite3.connect(cache_path) as connection:
+                cached_ids = {record_key[2:-2] for record_key, in connection.execute(
+                    "SELECT record_key FROM record_hashes WHERE stream = 'transcripts'")}
+            covered_ids = get_covered_transcript_ids(state, self.server.dataset)
+            self.assertTrue(covered_ids)
+            self.assertLessEqual(cached_ids, covered_ids)
+
+            self.server.fail = None
+            resumed_messages = run_sync(config, state, STREAM_NAMES)
+
+        # The transcripts written before a STATE message of the users are not covered by it, they are written again
+        self.assertEqual(get_records(resumed_messages, "users"), [])
+        resumed_ids = [record["id"] for record in get_records(resumed_messages, "transcripts")]
+        self.assertEqual(len(resumed_ids), len(set(resumed_ids)))
+        self.assertEqual(set(resumed_ids),
+                         {Dataset.get_id(index) for index in range(self.num_transcripts)} - covered_ids)
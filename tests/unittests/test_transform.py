@@ -0,0 +1,165 @@
+import copy
+import unittest
+
+import simplejson
+from singer import Transformer, UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING, metadata
+from singer.transform import SchemaMismatch
+
+from helpers import Dataset
+
+from tap_fireflies.discover import discover
+from tap_fireflies.transform import compile_transformer
+
+USER = {
+    "user_id": "user-1",
+    "email": "user1@example.com",
+    "name": "User 1",
+    "num_transcripts": 12,
+    "recent_meeting": "transcript-1",
+    "minutes_consumed": 30.5,
+    "is_admin": False,
+    "integrations": ["zoom", "slack"],
+    "user_groups": [{"name": "Sales", "handle": "sales"}],
+}
+
+SENTENCE = {
+    "transcript_id": "transcript-00000001",
+    "date": 1600000000000,
+    "index": 3,
+    "speaker_id": "1",
+    "speaker_name": "Speaker 1",
+    "text": "Hello",
+    "raw_text": "hello",
+    "start_time": 13.5,
+    "end_time": 17.5,
+}
+
+
+def get_stream(stream_name):
+    catalog_entry = discover().get_stream(stream_name)
+    return catalog_entry.schema.to_dict(), metadata.to_map(catalog_entry.metadata)
+
+
+def get_transcript():
+    return Dataset(num_transcripts=2, num_sentences=3).make_transcript(1)
+
+
+class TestCompileTransformer(unittest.TestCase):
+    """
+    The compiled transform must write the same records as `singer.Transformer`, and fail on the same records.
+    """
+
+    def assert_same_transform(self, record, schema, stream_metadata=None):
+        expected_error = None
+        try:
+            with Transformer(integer_datetime_fmt=UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING) as transformer:
+                expected = transformer.transform(copy.deepcopy(record), schema, stream_metadata)
+        except SchemaMismatch as err:
+            expected_error = err
+
+        transform = compile_transformer(schema, stream_metadata, integer_datetime_fmt=UNIX_MILLISECONDS_INTEGER_DATETIME_PARSING)
+        if expected_error is not None:
+            with self.assertRaises(SchemaMismatch):
+                transform(copy.deepcopy(record))
+            return
+
+        # The JSON output tells 1 from 1.0 and True from 1
+        self.assertEqual(simplejson.dumps(transform(copy.deepcopy(record)), sort_keys=True),
+                         simplejson.dumps(expected, sort_keys=True))
+
+    def test_stream_records(self):
+        for stream_name, record in [("users", USER), ("transcripts", get_transcript()), ("transcript_sentences", SENTENCE)]:
+            with self.subTest(stream_name=stream_name):
+                schema, stream_metadata = get_stream(stream_name)
+                self.assert_same_transform(record, schema, stream_metadata)
+                self.assert_same_transform(record, schema)
+
+    def test_null_and_missing_fields(self):
+        for stream_name, record in [("users", USER), ("transcripts", get_transcript()), ("transcript_sentences", SENTENCE)]:
+            schema, stream_metadata = get_stream(stream_name)
+            for field_name in record:
+                with self.subTest(stream_name=stream_name, field_name=field_name):
+                    self.assert_same_transform(dict(record, **{field_name: None}), schema, stream_metadata)
+                    missing = {key: value for key, value in record.items() if key != field_name}
+                    self.assert_same_transform(missing, schema, stream_metadata)
+
+    def test_nested_nulls(self):
+        schema, stream_metadata = get_stream("transcripts")
+        transcript = get_transcript()
+        transcript["sentences"].append(None)
+        transcript["speakers"][0]["name"] = None
+        transcript["meeting_info"] = {"fred_joined": None, "summary_status": None}
+        transcript["summary"]["keywords"] = [None, "keyword"]
+        self.assert_same_transform(transcript, schema, stream_metadata)
+
+    def test_date_time_strings_and_integers(self):
+        schema, stream_metadata = get_stream("transcripts")
+        for date in [1600000000000, 1600000000123, "1600000000000", "2020-09-13T12:26:40.000Z",
+                     "2020-09-13T12:26:40+02:00", "2020-09-13", "", "not a date", 1.5e12, True]:
+            with self.subTest(date=date):
+                self.assert_same_transform(dict(get_transcript(), date=date), schema, stream_metadata)
+
+    def test_integer_valued_floats(self):
+        sentence_schema, sentence_metadata = get_stream("transcript_sentences")
+        user_schema, user_metadata = get_stream("users")
+        for value in [3, 3.0, 3.5, "3", "3.0", "1,000", True, "abc"]:
+            with self.subTest(value=value):
+                # `index` is an integer, `start_time` and `num_transcripts` are numbers
+                self.assert_same_transform(dict(SENTENCE, index=value), sentence_schema, sentence_metadata)
+                self.assert_same_transform(dict(SENTENCE, start_time=value), sentence_schema, sentence_metadata)
+                self.assert_same_transform(dict(USER, num_transcripts=value), user_schema, user_metadata)
+
+    def test_mismatched_types(self):
+        schema, stream_metadata = get_stream("users")
+        for field_name, value in [("user_groups", "sales"), ("integrations", {"zoom": True}),
+                                  ("is_admin", "false"), ("is_admin", "no"), ("user_id", None), ("email", 12)]:
+            with self.subTest(field_name=field_name, value=value):
+                self.assert_same_transform(dict(USER, **{field_name: value}), schema, stream_metadata)
+
+    def test_extra_properties(self):
+        schema, stream_metadata = get_stream("transcripts")
+        transcript = get_transcript()
+        transcript["unknown"] = {"nested": [1, 2]}
+        transcript["speakers"][0]["unknown"] = "value"
+        transcript["meeting_info"]["unknown"] = None
+        self.assert_same_transform(transcript, schema, stream_metadata)
+
+    def test_unselected_fields(self):
+        schema, stream_metadata = get_stream("transcripts")
+        for breadcrumb in [("properties", "title"), ("properties", "summary"), ("properties", "sentences"),
+                           ("properties", "id"), ("properties", "date")]:
+            with self.subTest(breadcrumb=breadcrumb):
+                unselected_metadata = copy.deepcopy(stream_metadata)
+                unselected_metadata[breadcrumb]["selected"] = False
+                self.assert_same_transform(get_transcript(), schema, unselected_metadata)
+
+    def test_unselected_nested_fields(self):
+        schema, stream_metadata = get_stream("transcripts")
+        nested_metadata = copy.deepcopy(stream_metadata)
+        nested_metadata[("properties", "summary", "properties", "overview")] = {"selected": False}
+        self.assert_same_transform(get_transcript(), schema, nested_metadata)
+
+    def test_any_of(self):
+        schema = {
+            "type": "object",
+            "properties": {
+                "value": {"anyOf": [{"type": "integer"}, {"type": "string", "format": "date-time"}, {"type": "null"}]},
+                "name": {"type": ["null", "string"]},
+            },
+        }
+        for value in [1, "2", "2020-09-13T12:26:40Z", None, 1.5, [1]]:
+            with self.subTest(value=value):
+                self.assert_same_transform({"value": value, "name": "name"}, schema)
+
+    def test_multiple_types(self):
+        schema = {
+            "type": "object",
+            "properties": {
+                "value": {"type": ["null", "integer", "string"]},
+                "flag": {"type": ["boolean", "null"]},
+                "any": {},
+            },
+        }
+        for value in [1, 1.0, "1", "", None, {"a": 1}]:
+            with self.subTest(value=value):
+                self.assert_same_transform({"value": value, "flag": value, "any": value}, schema)
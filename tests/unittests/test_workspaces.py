@@ -0,0 +1,86 @@
+import collections
+import unittest
+
+from helpers import Dataset, MockFirefliesServer, get_config, get_records, get_states, run_sync
+
+from tap_fireflies.client import FirefliesForbiddenError
+from tap_fireflies.streams import RECORD_HASHES_KEY
+from tap_fireflies.writer import WORKSPACE_PROPERTY, WORKSPACES_STATE_KEY
+
+STREAM_NAMES = ["users", "transcripts", "transcript_sentences"]
+NUM_TRANSCRIPTS = {"sales": 30, "support": 50}
+END_DATE = "2020-09-13T14:00:00Z"
+
+
+def get_access_token(*labels):
+    return [{"label": label, "access_token": "{}-token".format(label)} for label in labels]
+
+
+def count_by_workspace(records):
+    return dict(collections.Counter(record[WORKSPACE_PROPERTY] for record in records))
+
+
+class TestWorkspaces(unittest.TestCase):
+    """
+    A list of labelled access tokens syncs each workspace with its own token, see `sync_workspaces_in_parallel`.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockFirefliesServer(None, datasets={
+            "{}-token".format(label): Dataset(num_transcripts=num_transcripts, num_sentences=2)
+            for label, num_transcripts in NUM_TRANSCRIPTS.items()
+        }).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def get_config(self, *labels, **settings):
+        return get_config(self.server, access_token=get_access_token(*labels), end_date=END_DATE, page_size=20,
+                          **settings)
+
+    def test_records_tagged_with_their_workspace(self):
+        messages = run_sync(self.get_config("sales", "support"), {}, STREAM_NAMES)
+
+        # One SCHEMA message per stream, with the workspace in its key properties
+        schemas = [message for message in messages if message["type"] == "SCHEMA"]
+        self.assertEqual(sorted(schema["stream"] for schema in schemas), sorted(STREAM_NAMES))
+        for schema in schemas:
+            self.assertEqual(schema["key_properties"][0], WORKSPACE_PROPERTY)
+            self.assertIn(WORKSPACE_PROPERTY, schema["schema"]["properties"])
+
+        self.assertEqual(count_by_workspace(get_records(messages, "users")), {"sales": 20, "support": 20})
+        self.assertEqual(count_by_workspace(get_records(messages, "transcripts")), NUM_TRANSCRIPTS)
+        self.assertEqual(count_by_workspace(get_records(messages, "transcript_sentences")),
+                         {label: 2 * num_transcripts for label, num_transcripts in NUM_TRANSCRIPTS.items()})
+        # The table versions would delete the users of the other workspace
+        self.assertNotIn("ACTIVATE_VERSION", [message["type"] for message in messages])
+        self.assertFalse([message for message in messages if message["type"] == "RECORD" and "version" in message])
+
+    def test_state_kept_per_workspace(self):
+        messages = run_sync(self.get_config("sales", "support"), {}, STREAM_NAMES)
+        state = get_states(messages)[-1]
+        self.assertNotIn("bookmarks", state)
+        self.assertEqual(set(state[WORKSPACES_STATE_KEY]), {"sales", "support"})
+        for workspace_state in state[WORKSPACES_STATE_KEY].values():
+            self.assertEqual(set(workspace_state["bookmarks"]), set(STREAM_NAMES))
+            self.assertEqual(len(workspace_state["bookmarks"]["users"][RECORD_HASHES_KEY]), 20)
+
+        # Each workspace resumes from its own state, a new workspace from the start date
+        resumed_messages = run_sync(self.get_config("sales", "support"), state, ["users"])
+        self.assertEqual(get_records(resumed_messages, "users"), [])
+        del state[WORKSPACES_STATE_KEY]["support"]
+        resumed_messages = run_sync(self.get_config("sales", "support"), state, ["users"])
+        self.assertEqual(count_by_workspace(get_records(resumed_messages, "users")), {"support": 20})
+
+    def test_failed_workspace_does_not_stop_the_others(self):
+        # The workspaces are synced one after the other, the first one fails
+        messages = run_sync(self.get_config("revoked", "sales", "support", workspace_workers=1), {}, STREAM_NAMES,
+                            expected_error=FirefliesForbiddenError)
+
+        self.assertEqual(count_by_workspace(get_records(messages, "transcripts")), NUM_TRANSCRIPTS)
+        workspaces_state = get_states(messages)[-1][WORKSPACES_STATE_KEY]
+        self.assertNotIn("bookmarks", workspaces_state.get("revoked", {}))
+        for label in NUM_TRANSCRIPTS:
+            self.assertEqual(set(workspaces_state[label]["bookmarks"]), set(STREAM_NAMES))